@@ -0,0 +1,33 @@
+"""knowledge embedding hnsw index
+
+Revision ID: 3c9e1f0a7b21
+Revises:
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3c9e1f0a7b21"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Tables may already exist via Base.metadata.create_all (see
+    # entrypoint.sh), so every statement here must be idempotent.
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_tenant_knowledge_embedding_hnsw "
+        "ON tenant_knowledge USING hnsw (embedding vector_cosine_ops) "
+        "WITH (m = 16, ef_construction = 64)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_tenant_knowledge_embedding_hnsw")
@@ -0,0 +1,41 @@
+"""keyset pagination indexes
+
+Revision ID: 5f7a9c2d4b16
+Revises: 8d2b4e6f1a93
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5f7a9c2d4b16"
+down_revision: Union[str, None] = "8d2b4e6f1a93"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction, and keeps the tables
+    # writable while large indexes build
+    with op.get_context().autocommit_block():
+        # One conversation page: equality on the first three columns, then
+        # ordered by (created_at, id) for the keyset cursor
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_messages_conversation "
+            "ON messages (tenant_id, user_id, session_id, created_at, id)"
+        )
+        # Notification feed, newest first
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_notifications_feed "
+            "ON notifications (tenant_id, to_user_id, created_at DESC, id DESC)"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_notifications_feed")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_messages_conversation")
@@ -0,0 +1,45 @@
+"""knowledge content hash
+
+Revision ID: 8d2b4e6f1a93
+Revises: 3c9e1f0a7b21
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8d2b4e6f1a93"
+down_revision: Union[str, None] = "3c9e1f0a7b21"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "ALTER TABLE tenant_knowledge ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)"
+    )
+    # Same normalisation as knowledge_content_hash(): collapse whitespace
+    # runs to one space first, then trim, so leading newlines or tabs go too
+    op.execute(
+        "UPDATE tenant_knowledge SET content_hash = encode(sha256(convert_to("
+        "btrim(regexp_replace(content, '\\s+', ' ', 'g')), 'UTF8')), 'hex') "
+        "WHERE content_hash IS NULL"
+    )
+    # Keep the oldest copy of duplicated chunks hashed; NULLs don't conflict
+    op.execute(
+        "UPDATE tenant_knowledge SET content_hash = NULL WHERE id NOT IN ("
+        "SELECT min(id) FROM tenant_knowledge GROUP BY tenant_id, content_hash)"
+    )
+    op.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_tenant_knowledge_tenant_hash "
+        "ON tenant_knowledge (tenant_id, content_hash)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS uq_tenant_knowledge_tenant_hash")
+    op.execute("ALTER TABLE tenant_knowledge DROP COLUMN IF EXISTS content_hash")
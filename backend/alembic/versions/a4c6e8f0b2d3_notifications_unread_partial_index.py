@@ -0,0 +1,33 @@
+"""notifications unread partial index
+
+Revision ID: a4c6e8f0b2d3
+Revises: 5f7a9c2d4b16
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a4c6e8f0b2d3"
+down_revision: Union[str, None] = "5f7a9c2d4b16"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        # Most notifications end up read, so indexing only unread rows keeps
+        # the index small and the unread count an index-only lookup
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_notifications_unread "
+            "ON notifications (tenant_id, to_user_id) WHERE read = false"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_notifications_unread")
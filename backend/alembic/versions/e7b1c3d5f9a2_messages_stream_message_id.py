@@ -0,0 +1,37 @@
+"""messages stream message id
+
+Revision ID: e7b1c3d5f9a2
+Revises: a4c6e8f0b2d3
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e7b1c3d5f9a2"
+down_revision: Union[str, None] = "a4c6e8f0b2d3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "messages", sa.Column("stream_message_id", sa.String(length=64), nullable=True)
+    )
+    with op.get_context().autocommit_block():
+        # Existing rows stay NULL and outside the index
+        op.execute(
+            "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ix_messages_stream_message "
+            "ON messages (tenant_id, stream_message_id, role) "
+            "WHERE stream_message_id IS NOT NULL"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_messages_stream_message")
+    op.drop_column("messages", "stream_message_id")
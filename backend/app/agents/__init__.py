@@ -1,4 +1,4 @@
 from app.agents.slave_agent import SlaveAgent
-from app.agents.registry import get_or_create_agent
+from app.agents.registry import get_or_create_agent, invalidate_agent
 
-__all__ = ["SlaveAgent", "get_or_create_agent"]
+__all__ = ["SlaveAgent", "get_or_create_agent", "invalidate_agent"]
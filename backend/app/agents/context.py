@@ -0,0 +1,160 @@
+"""Token-budgeted assembly of knowledge and history for an LLM call."""
+import hashlib
+import math
+import re
+from dataclasses import dataclass
+
+from app.agents.memory import ConversationMemory
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s")
+
+# Rough per-message overhead (role markers, separators) in chat formats
+MESSAGE_OVERHEAD_TOKENS = 4
+SUMMARY_LINE_MAX_CHARS = 200
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count without a model-specific tokenizer.
+
+    Sub-word tokenizers split long words into several pieces, so each word
+    counts as one token per four characters (at least one); punctuation
+    counts as one token each.
+    """
+    return sum(math.ceil(len(piece) / 4) for piece in _TOKEN_RE.findall(text))
+
+
+def _turn_tokens(turn: dict) -> int:
+    return estimate_tokens(turn["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+
+def _fingerprint(turn: dict) -> str:
+    return hashlib.sha1(f"{turn['role']}:{turn['content']}".encode()).hexdigest()[:16]
+
+
+def _summary_line(turn: dict) -> str:
+    """Condense a turn to its first sentence."""
+    text = " ".join(turn["content"].split())
+    text = _SENTENCE_END_RE.split(text, 1)[0]
+    if len(text) > SUMMARY_LINE_MAX_CHARS:
+        text = text[: SUMMARY_LINE_MAX_CHARS - 3] + "..."
+    speaker = "User" if turn["role"] == "user" else "Assistant"
+    return f"{speaker}: {text}"
+
+
+@dataclass
+class AssembledContext:
+    knowledge: list[str]
+    history: list[dict]
+    summary: str | None
+    tokens: int
+
+
+class ContextAssembler:
+    """Fit retrieved knowledge and conversation history into a token budget.
+
+    The system prompt, the new message and the space reserved for the answer
+    are fixed costs. Knowledge chunks (in relevance order) may use up to
+    `knowledge_share` of what is left; history fills the rest, newest turns
+    first. Turns that no longer fit are folded into a rolling extractive
+    summary that is cached in the memory store, so it is only extended with
+    newly dropped turns instead of being rebuilt on every call.
+    """
+
+    def __init__(
+        self,
+        memory: ConversationMemory,
+        budget: int,
+        response_reserve: int,
+        knowledge_share: float,
+        summary_max_tokens: int,
+    ):
+        self.memory = memory
+        self.budget = budget
+        self.response_reserve = response_reserve
+        self.knowledge_share = knowledge_share
+        self.summary_max_tokens = summary_max_tokens
+
+    async def assemble(
+        self,
+        memory_key: str,
+        system_tokens: int,
+        message: str,
+        knowledge: list[str],
+        history: list[dict],
+    ) -> AssembledContext:
+        used = system_tokens + estimate_tokens(message) + 2 * MESSAGE_OVERHEAD_TOKENS
+        available = max(self.budget - self.response_reserve - used, 0)
+
+        kept_knowledge = []
+        knowledge_budget = int(available * self.knowledge_share)
+        for chunk in knowledge:
+            cost = estimate_tokens(chunk) + 2
+            if cost > knowledge_budget:
+                break
+            kept_knowledge.append(chunk)
+            knowledge_budget -= cost
+            available -= cost
+
+        # Keep room for the summary if anything gets dropped
+        history_budget = available
+        history_cost = sum(_turn_tokens(turn) for turn in history)
+        if history_cost > history_budget:
+            history_budget = max(history_budget - self.summary_max_tokens, 0)
+
+        start = len(history)
+        for turn in reversed(history):
+            cost = _turn_tokens(turn)
+            if cost > history_budget:
+                break
+            history_budget -= cost
+            start -= 1
+
+        kept_history = history[start:]
+        summary = await self._summarize(memory_key, history[:start], kept_history)
+
+        tokens = (
+            used
+            + sum(estimate_tokens(chunk) + 2 for chunk in kept_knowledge)
+            + sum(_turn_tokens(turn) for turn in kept_history)
+            + (estimate_tokens(summary) if summary else 0)
+        )
+        return AssembledContext(kept_knowledge, kept_history, summary, tokens)
+
+    async def _summarize(
+        self, memory_key: str, dropped: list[dict], kept: list[dict]
+    ) -> str | None:
+        if not dropped:
+            return None
+
+        cached = await self.memory.get_summary(memory_key)
+        dropped_fps = [_fingerprint(turn) for turn in dropped]
+        if cached:
+            through = cached["through"]
+            if through == dropped_fps[-1] or through in {
+                _fingerprint(turn) for turn in kept
+            }:
+                return cached["content"]
+            lines = cached["content"].splitlines()
+            if through in dropped_fps:
+                last = len(dropped_fps) - 1 - dropped_fps[::-1].index(through)
+                new_turns = dropped[last + 1 :]
+            else:
+                # The summarised turns were trimmed from memory already
+                new_turns = dropped
+        else:
+            lines, new_turns = [], dropped
+
+        lines += [_summary_line(turn) for turn in new_turns]
+        while (
+            len(lines) > 1
+            and estimate_tokens("\n".join(lines)) > self.summary_max_tokens
+        ):
+            lines.pop(0)
+        summary = "\n".join(lines)
+
+        await self.memory.set_summary(
+            memory_key,
+            {"role": "summary", "content": summary, "through": dropped_fps[-1]},
+        )
+        return summary
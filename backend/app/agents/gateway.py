@@ -0,0 +1,274 @@
+"""Process-wide gateway for LLM calls.
+
+All agents of a process share one chat client (and therefore one connection
+pool). Every call passes through the same limits:
+
+- a per-tenant concurrency cap and optional per-tenant request rate,
+- a global concurrency cap,
+- token buckets for requests and tokens per minute,
+- retries with jittered exponential backoff on rate-limit and server errors.
+
+The client is injected (see app.agents.providers), so tests and load runs
+can use the simulated provider instead of a real model.
+"""
+import asyncio
+import itertools
+import logging
+import random
+import time
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Any, AsyncIterator
+
+from app.agents.providers import get_llm_provider
+from app.core import metrics
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+_RETRYABLE_MARKERS = ("RESOURCE_EXHAUSTED", "UNAVAILABLE", "DEADLINE_EXCEEDED")
+
+
+class TokenBucket:
+    """Refills continuously at `per_minute` units per minute.
+
+    Waiters are served in arrival order. A request larger than the bucket is
+    charged the full bucket, so it waits for a refill but never forever.
+    """
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1):
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def idle(self) -> bool:
+        """Full and without waiters: equivalent to a freshly created bucket."""
+        self._refill()
+        return self.tokens >= self.capacity and not self._lock.locked()
+
+    def adjust(self, amount: float):
+        """Charge (or refund, if negative) units after the fact."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+
+def _status_code(exc: Exception) -> int | None:
+    for value in (
+        getattr(exc, "status_code", None),
+        getattr(exc, "code", None),
+        getattr(getattr(exc, "response", None), "status_code", None),
+    ):
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def is_retryable(exc: Exception) -> bool:
+    """True for rate limiting, timeouts and server-side errors."""
+    if isinstance(exc, asyncio.TimeoutError):
+        return True
+    status = _status_code(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    text = str(exc)
+    return "429" in text or any(marker in text for marker in _RETRYABLE_MARKERS)
+
+
+class _Usage:
+    """Token accounting of one request, settled against the TPM bucket."""
+
+    def __init__(self, charged: int):
+        self.charged = charged
+        self.total_tokens: int | None = None
+
+    def record(self, message: Any):
+        usage = getattr(message, "usage_metadata", None)
+        if usage and usage.get("total_tokens"):
+            self.total_tokens = max(self.total_tokens or 0, usage["total_tokens"])
+
+
+class LLMGateway:
+    def __init__(
+        self,
+        client: Any,
+        max_concurrency: int,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+        tenant_max_concurrency: int = 0,
+        tenant_requests_per_minute: int = 0,
+        response_tokens: int = 0,
+        max_retries: int = 4,
+        backoff_base_seconds: float = 0.5,
+        backoff_max_seconds: float = 20.0,
+    ):
+        """Limits of 0 are disabled. `client` is an LLMProvider."""
+        self.client = client
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.response_tokens = response_tokens
+        self.tenant_max_concurrency = tenant_max_concurrency
+        self.tenant_requests_per_minute = tenant_requests_per_minute
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._requests = (
+            TokenBucket(requests_per_minute) if requests_per_minute else None
+        )
+        self._tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        # Per-tenant limiters exist only while a tenant is active: slots while
+        # a call holds or waits for one, request buckets until they refill
+        self._tenant_slots: dict[int, asyncio.Semaphore] = {}
+        self._tenant_callers: dict[int, int] = {}
+        self._tenant_requests: dict[int, TokenBucket] = {}
+        self._tenant_requests_swept = time.monotonic()
+        self._in_flight = 0
+
+    async def invoke(self, tenant_id: int, messages: list, prompt_tokens: int) -> str:
+        """Run one chat completion and return its text."""
+        async with self._tenant_slot(tenant_id):
+            for attempt in itertools.count():
+                try:
+                    async with self._request(tenant_id, prompt_tokens) as usage:
+                        response = await self.client.ainvoke(messages)
+                        usage.record(response)
+                        return response.content
+                except Exception as e:
+                    await self._backoff(attempt, e)
+
+    async def stream(
+        self, tenant_id: int, messages: list, prompt_tokens: int
+    ) -> AsyncIterator[str]:
+        """Stream a chat completion as text pieces.
+
+        Failures are only retried before the first piece has been yielded;
+        after that the caller has already forwarded partial output.
+        """
+        async with self._tenant_slot(tenant_id):
+            for attempt in itertools.count():
+                started = False
+                try:
+                    async with self._request(tenant_id, prompt_tokens) as usage:
+                        async for chunk in self.client.astream(messages):
+                            usage.record(chunk)
+                            if chunk.content:
+                                started = True
+                                yield chunk.content
+                    return
+                except Exception as e:
+                    if started:
+                        raise
+                    await self._backoff(attempt, e)
+
+    @asynccontextmanager
+    async def _tenant_slot(self, tenant_id: int):
+        if not self.tenant_max_concurrency:
+            yield
+            return
+        if tenant_id not in self._tenant_slots:
+            self._tenant_slots[tenant_id] = asyncio.Semaphore(
+                self.tenant_max_concurrency
+            )
+        self._tenant_callers[tenant_id] = self._tenant_callers.get(tenant_id, 0) + 1
+        try:
+            async with self._tenant_slots[tenant_id]:
+                yield
+        finally:
+            self._tenant_callers[tenant_id] -= 1
+            if not self._tenant_callers[tenant_id]:
+                del self._tenant_callers[tenant_id]
+                del self._tenant_slots[tenant_id]
+
+    async def _acquire_tenant_request(self, tenant_id: int):
+        now = time.monotonic()
+        # A bucket unused for a minute has refilled completely; dropping it
+        # loses nothing and keeps one bucket per tenant ever seen from piling up
+        if now - self._tenant_requests_swept >= 60:
+            self._tenant_requests_swept = now
+            for idle in [t for t, b in self._tenant_requests.items() if b.idle()]:
+                del self._tenant_requests[idle]
+        if tenant_id not in self._tenant_requests:
+            self._tenant_requests[tenant_id] = TokenBucket(
+                self.tenant_requests_per_minute
+            )
+        await self._tenant_requests[tenant_id].acquire()
+
+    @asynccontextmanager
+    async def _request(self, tenant_id: int, prompt_tokens: int):
+        """Hold a global slot and rate budget for one provider request.
+
+        The rate budget is acquired first: waiting for a bucket to refill
+        must not occupy a global slot that other tenants could be using.
+        """
+        waited_from = time.monotonic()
+        if self.tenant_requests_per_minute:
+            await self._acquire_tenant_request(tenant_id)
+        if self._requests:
+            await self._requests.acquire()
+        usage = _Usage(prompt_tokens + self.response_tokens)
+        if self._tokens:
+            await self._tokens.acquire(usage.charged)
+
+        async with self._slots:
+            started = time.monotonic()
+            metrics.observe("llm.wait_seconds", started - waited_from)
+            metrics.incr("llm.requests")
+            self._in_flight += 1
+            metrics.set_gauge("llm.in_flight", self._in_flight)
+            try:
+                yield usage
+            finally:
+                self._in_flight -= 1
+                metrics.set_gauge("llm.in_flight", self._in_flight)
+                metrics.observe("llm.latency_seconds", time.monotonic() - started)
+                if self._tokens and usage.total_tokens is not None:
+                    self._tokens.adjust(usage.total_tokens - usage.charged)
+
+    async def _backoff(self, attempt: int, exc: Exception):
+        """Sleep before the next attempt, or re-raise if it should not retry."""
+        if attempt >= self.max_retries or not is_retryable(exc):
+            metrics.incr("llm.failures")
+            raise exc
+        delay = random.uniform(
+            0, min(self.backoff_max_seconds, self.backoff_base_seconds * 2**attempt)
+        )
+        metrics.incr("llm.retries")
+        logger.warning(
+            f"LLM request failed ({exc}); retry {attempt + 1}/{self.max_retries} "
+            f"in {delay:.2f}s"
+        )
+        await asyncio.sleep(delay)
+
+
+@lru_cache()
+def get_llm_gateway() -> LLMGateway:
+    """Return the process-wide gateway around the configured provider."""
+    return LLMGateway(
+        get_llm_provider(),
+        max_concurrency=settings.llm_max_concurrency,
+        requests_per_minute=settings.llm_requests_per_minute,
+        tokens_per_minute=settings.llm_tokens_per_minute,
+        tenant_max_concurrency=settings.llm_tenant_max_concurrency,
+        tenant_requests_per_minute=settings.llm_tenant_requests_per_minute,
+        response_tokens=settings.llm_response_token_reserve,
+        max_retries=settings.llm_max_retries,
+        backoff_base_seconds=settings.llm_backoff_base_seconds,
+        backoff_max_seconds=settings.llm_backoff_max_seconds,
+    )
@@ -0,0 +1,204 @@
+"""Conversation memory backends shared by all agents in a process."""
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import lru_cache
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.models import Message
+from app.services.redis_service import get_redis
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+# Extends a conversation list only if it is still cached; a missing key must
+# stay missing so the next get() hydrates the full history from the database
+_APPEND_IF_EXISTS = """
+if redis.call("EXISTS", KEYS[1]) == 0 then
+    return 0
+end
+redis.call("RPUSH", KEYS[1], unpack(ARGV, 3))
+redis.call("LTRIM", KEYS[1], -tonumber(ARGV[1]), -1)
+redis.call("EXPIRE", KEYS[1], ARGV[2])
+return 1
+"""
+
+
+def memory_key(tenant_id: int, user_id: int, session_id: str) -> str:
+    return f"{tenant_id}:{user_id}:{session_id}"
+
+
+class ConversationMemory(ABC):
+    """Recent turns per conversation, as {"role", "content"} dicts.
+
+    get() returns None on a miss so callers can hydrate from the database;
+    an empty list means the conversation is known to have no turns.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> list[dict] | None:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, turns: list[dict]):
+        ...
+
+    @abstractmethod
+    async def append(self, key: str, turns: list[dict]):
+        """Add turns to a cached conversation; a no-op on a miss.
+
+        Starting a list from just the new turns would turn the next get()
+        into a hit and hide the earlier history in the database.
+        """
+
+    async def get_summary(self, key: str) -> dict | None:
+        """Rolling summary of turns that no longer fit the context window."""
+        turns = await self.get(f"{key}:summary")
+        return turns[0] if turns else None
+
+    async def set_summary(self, key: str, summary: dict):
+        await self.set(f"{key}:summary", [summary])
+
+
+class InProcessMemory(ConversationMemory):
+    """LRU of conversations with a sliding TTL and a total byte budget."""
+
+    def __init__(self, max_turns: int, ttl_seconds: int, max_bytes: int):
+        self.max_turns = max_turns
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[float, list[dict], int]] = OrderedDict()
+        self._bytes = 0
+
+    async def get(self, key: str) -> list[dict] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, turns, size = entry
+        if expires_at < time.monotonic():
+            self._remove(key)
+            return None
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, turns, size)
+        self._entries.move_to_end(key)
+        return list(turns)
+
+    async def set(self, key: str, turns: list[dict]):
+        self._store(key, turns[-self.max_turns :])
+
+    async def append(self, key: str, turns: list[dict]):
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            # Gone or expired: stay a miss, as with RedisMemory
+            self._remove(key)
+            return
+        self._store(key, (entry[1] + turns)[-self.max_turns :])
+
+    def _store(self, key: str, turns: list[dict]):
+        self._remove(key)
+        size = sum(len(turn["content"].encode("utf-8")) for turn in turns)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, turns, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry:
+            self._bytes -= entry[2]
+
+
+class RedisMemory(ConversationMemory):
+    """Capped Redis list per conversation, visible to every worker."""
+
+    def __init__(self, max_turns: int, ttl_seconds: int):
+        self.max_turns = max_turns
+        self.ttl_seconds = ttl_seconds
+
+    def _key(self, key: str) -> str:
+        return f"memory:{key}"
+
+    async def get(self, key: str) -> list[dict] | None:
+        redis = await get_redis()
+        items = await redis.lrange(self._key(key), 0, -1)
+        if not items:
+            return None
+        return [json.loads(item) for item in items]
+
+    async def set(self, key: str, turns: list[dict]):
+        redis = await get_redis()
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.delete(self._key(key))
+            if turns:
+                pipe.rpush(self._key(key), *[json.dumps(t) for t in turns])
+                pipe.ltrim(self._key(key), -self.max_turns, -1)
+                pipe.expire(self._key(key), self.ttl_seconds)
+            await pipe.execute()
+
+    async def append(self, key: str, turns: list[dict]):
+        redis = await get_redis()
+        await redis.eval(
+            _APPEND_IF_EXISTS,
+            1,
+            self._key(key),
+            self.max_turns,
+            self.ttl_seconds,
+            *[json.dumps(t) for t in turns],
+        )
+
+
+@lru_cache()
+def get_memory_store() -> ConversationMemory:
+    """Return the process-wide memory store selected by MEMORY_BACKEND."""
+    if settings.memory_backend == "redis":
+        return RedisMemory(settings.memory_max_turns, settings.memory_ttl_seconds)
+    if settings.memory_backend == "memory":
+        return InProcessMemory(
+            settings.memory_max_turns,
+            settings.memory_ttl_seconds,
+            settings.memory_max_bytes,
+        )
+    raise ValueError(f"Unknown memory backend: {settings.memory_backend}")
+
+
+def history_query(tenant_id: int, user_id: int, session_id: str, limit: int):
+    """Latest turns of a conversation, newest first."""
+    return (
+        select(Message.role, Message.content)
+        .where(
+            Message.tenant_id == tenant_id,
+            Message.user_id == user_id,
+            Message.session_id == session_id,
+        )
+        .order_by(Message.created_at.desc(), Message.id.desc())
+        .limit(limit)
+    )
+
+
+async def load_history(
+    store: ConversationMemory,
+    session: AsyncSession,
+    tenant_id: int,
+    user_id: int,
+    session_id: str,
+) -> list[dict]:
+    """Get conversation turns, hydrating from the messages table on a miss."""
+    key = memory_key(tenant_id, user_id, session_id)
+    turns = await store.get(key)
+    if turns is not None:
+        return turns
+
+    result = await session.execute(
+        history_query(tenant_id, user_id, session_id, settings.memory_max_turns)
+    )
+    turns = [{"role": role, "content": content} for role, content in result.all()]
+    turns.reverse()
+    await store.set(key, turns)
+    logger.debug(f"Hydrated {len(turns)} turns for conversation {key}")
+    return turns
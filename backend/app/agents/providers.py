@@ -0,0 +1,197 @@
+"""LLM providers behind the gateway, selected by LLM_PROVIDER.
+
+A provider exposes the two LangChain chat model calls the gateway uses:
+`ainvoke(messages)` returning a message and `astream(messages)` yielding
+message chunks, both with `content` and optional `usage_metadata`.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import random
+import re
+from abc import ABC, abstractmethod
+from typing import AsyncIterator
+
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+
+from app.agents.context import estimate_tokens
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_ROSTER_ID_RE = re.compile(r"^- .+ \(ID: (\d+), Role:", re.MULTILINE)
+_CURRENT_USER_RE = re.compile(r"^Current user: .* \(ID: (\d+),", re.MULTILINE)
+_FILLER = (
+    "noted the team schedule is updated and everyone on shift has what they "
+    "need for today please check the board before starting"
+).split()
+
+
+class LLMProvider(ABC):
+    @abstractmethod
+    async def ainvoke(self, messages: list[BaseMessage]) -> AIMessage:
+        ...
+
+    @abstractmethod
+    def astream(self, messages: list[BaseMessage]) -> AsyncIterator[AIMessageChunk]:
+        ...
+
+
+class GeminiProvider(LLMProvider):
+    """Google Gemini chat model."""
+
+    def __init__(self, model: str, temperature: float):
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        api_key = settings.google_api_key
+        if not api_key:
+            logger.warning("GOOGLE_API_KEY not set - LLM calls will fail")
+        else:
+            logger.info(f"Using Gemini API key: {api_key[:10]}...")
+
+        self.client = ChatGoogleGenerativeAI(
+            model=model,
+            google_api_key=api_key,
+            temperature=temperature,
+            # Retries are handled by the gateway so they respect its limits
+            max_retries=0,
+        )
+
+    async def ainvoke(self, messages: list[BaseMessage]) -> AIMessage:
+        return await self.client.ainvoke(messages)
+
+    def astream(self, messages: list[BaseMessage]) -> AsyncIterator[AIMessageChunk]:
+        return self.client.astream(messages)
+
+
+class SimulatedProviderError(Exception):
+    """Injected failure, carrying the HTTP status a real provider would send."""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"Simulated provider error {status_code}")
+        self.status_code = status_code
+
+
+class SimulatedProvider(LLMProvider):
+    """Local stand-in for an LLM, for load and soak tests.
+
+    Replies are schema-valid LLMResponse JSON. Replies and timings are
+    seeded from `seed` and the conversation, so the same input always gets
+    the same reply regardless of request interleaving. Injected errors come
+    from a separate sequence seeded from `seed`, so retries can succeed.
+
+    Time to first token is log-normal around `latency_ms` (spread `sigma`);
+    output then arrives at `tokens_per_second`. `error_rate` of requests fail
+    with a 429 or 503 before producing output. `notify_probability` of
+    replies notify a random roster member other than the current user, and
+    `log_event_probability` add a log_event action.
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 800,
+        latency_sigma: float = 0.5,
+        tokens_per_second: float = 50,
+        response_tokens: int = 60,
+        error_rate: float = 0.0,
+        notify_probability: float = 0.3,
+        log_event_probability: float = 0.1,
+        seed: int = 0,
+    ):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.tokens_per_second = tokens_per_second
+        self.response_tokens = response_tokens
+        self.error_rate = error_rate
+        self.notify_probability = notify_probability
+        self.log_event_probability = log_event_probability
+        self.seed = seed
+        self._errors = random.Random(seed)
+
+    async def ainvoke(self, messages: list[BaseMessage]) -> AIMessage:
+        rng, text, usage = self._reply(messages)
+        generation = usage["output_tokens"] / self.tokens_per_second
+        await asyncio.sleep(self._first_token_delay(rng) + generation)
+        return AIMessage(content=text, usage_metadata=usage)
+
+    async def astream(
+        self, messages: list[BaseMessage]
+    ) -> AsyncIterator[AIMessageChunk]:
+        rng, text, usage = self._reply(messages)
+        await asyncio.sleep(self._first_token_delay(rng))
+
+        # Roughly one token per four characters
+        step = 16
+        for start in range(0, len(text), step):
+            piece = text[start : start + step]
+            last = start + step >= len(text)
+            yield AIMessageChunk(content=piece, usage_metadata=usage if last else None)
+            await asyncio.sleep(math.ceil(len(piece) / 4) / self.tokens_per_second)
+
+    def _first_token_delay(self, rng: random.Random) -> float:
+        return rng.lognormvariate(math.log(self.latency_ms / 1000), self.latency_sigma)
+
+    def _reply(self, messages: list[BaseMessage]) -> tuple[random.Random, str, dict]:
+        if self._errors.random() < self.error_rate:
+            raise SimulatedProviderError(self._errors.choice((429, 503)))
+
+        transcript = "\n".join(str(m.content) for m in messages)
+        digest = hashlib.sha256(f"{self.seed}:{transcript}".encode()).hexdigest()
+        rng = random.Random(digest)
+
+        system = str(messages[0].content) if messages else ""
+        last = str(messages[-1].content) if messages else ""
+        current = _CURRENT_USER_RE.search(system)
+        roster = [
+            int(user_id)
+            for user_id in _ROSTER_ID_RE.findall(system)
+            if not current or user_id != current.group(1)
+        ]
+
+        words = rng.randint(self.response_tokens // 2, self.response_tokens)
+        filler = " ".join(rng.choice(_FILLER) for _ in range(words))
+        reply = {
+            "response": f"Simulated reply to: {last[:80]}. {filler}.",
+            "actions": [],
+        }
+        if roster and rng.random() < self.notify_probability:
+            reply["actions"].append(
+                {
+                    "type": "notify_user",
+                    "user_id": rng.choice(roster),
+                    "message": f"Heads up: {last[:120]}",
+                }
+            )
+        if rng.random() < self.log_event_probability:
+            reply["actions"].append({"type": "log_event", "event": last[:120]})
+
+        text = json.dumps(reply)
+        input_tokens = estimate_tokens(transcript)
+        output_tokens = estimate_tokens(text)
+        usage = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+        return rng, text, usage
+
+
+def get_llm_provider() -> LLMProvider:
+    """Build the provider selected by LLM_PROVIDER."""
+    if settings.llm_provider == "gemini":
+        return GeminiProvider(settings.llm_model, settings.llm_temperature)
+    if settings.llm_provider == "simulated":
+        return SimulatedProvider(
+            latency_ms=settings.llm_sim_latency_ms,
+            latency_sigma=settings.llm_sim_latency_sigma,
+            tokens_per_second=settings.llm_sim_tokens_per_second,
+            response_tokens=settings.llm_sim_response_tokens,
+            error_rate=settings.llm_sim_error_rate,
+            notify_probability=settings.llm_sim_notify_probability,
+            log_event_probability=settings.llm_sim_log_event_probability,
+            seed=settings.llm_sim_seed,
+        )
+    raise ValueError(f"Unknown LLM provider: {settings.llm_provider}")
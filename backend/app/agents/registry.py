@@ -1,25 +1,100 @@
-"""Registry for managing SlaveAgent instances."""
+"""Registry for managing SlaveAgent instances.
+
+The registry is a bounded LRU cache. Agents not used within the context TTL
+are dropped, used ones get their tenant context reloaded periodically, and
+invalidation messages (see publish_tenant_invalidation) drop an agent right
+away so its next use loads fresh tenant data.
+"""
 import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import metrics
+from app.core.config import get_settings
+from app.core.database import async_session_maker
 from app.agents.slave_agent import SlaveAgent
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+@dataclass
+class _Entry:
+    agent: SlaveAgent
+    loaded_at: float
+    last_used: float
 
-# In-memory registry of agent instances
-_agent_registry: dict[int, SlaveAgent] = {}
+
+# In-memory registry of agent instances, least recently used first
+_agent_registry: OrderedDict[int, _Entry] = OrderedDict()
 
 
 async def get_or_create_agent(tenant_id: int, session: AsyncSession) -> SlaveAgent:
     """Get existing agent for tenant or create new one."""
-    if tenant_id not in _agent_registry:
-        logger.info(f"Creating new SlaveAgent for tenant {tenant_id}")
-        agent = SlaveAgent(tenant_id)
-        await agent.load_tenant_context(session)
-        _agent_registry[tenant_id] = agent
-    else:
+    entry = _agent_registry.get(tenant_id)
+    if entry is not None:
         logger.debug(f"Reusing existing SlaveAgent for tenant {tenant_id}")
+        metrics.incr("agent_registry.hits")
+        entry.last_used = time.monotonic()
+        _agent_registry.move_to_end(tenant_id)
+        return entry.agent
+
+    logger.info(f"Creating new SlaveAgent for tenant {tenant_id}")
+    metrics.incr("agent_registry.misses")
+    agent = SlaveAgent(tenant_id)
+    await agent.load_tenant_context(session)
+
+    # Another task may have loaded the same tenant while we were awaiting
+    if tenant_id in _agent_registry:
+        return _agent_registry[tenant_id].agent
+
+    now = time.monotonic()
+    _agent_registry[tenant_id] = _Entry(agent, loaded_at=now, last_used=now)
+    while len(_agent_registry) > settings.agent_registry_max_size:
+        evicted_id, _ = _agent_registry.popitem(last=False)
+        metrics.incr("agent_registry.evictions")
+        logger.info(f"Evicted SlaveAgent for tenant {evicted_id}")
+    metrics.set_gauge("agent_registry.size", len(_agent_registry))
+    return agent
+
+
+def invalidate_agent(tenant_id: int):
+    """Drop a tenant's agent so the next message reloads its context."""
+    if _agent_registry.pop(tenant_id, None) is not None:
+        metrics.incr("agent_registry.invalidations")
+        metrics.set_gauge("agent_registry.size", len(_agent_registry))
+        logger.info(f"Invalidated SlaveAgent for tenant {tenant_id}")
+
+
+async def refresh_stale_agents():
+    """Reload context of agents older than the TTL; drop ones left unused."""
+    now = time.monotonic()
+    cutoff = now - settings.agent_context_ttl_seconds
+    stale = [
+        (tenant_id, entry)
+        for tenant_id, entry in _agent_registry.items()
+        if entry.loaded_at < cutoff
+    ]
+
+    for tenant_id, entry in stale:
+        if entry.last_used < cutoff:
+            _agent_registry.pop(tenant_id, None)
+            metrics.incr("agent_registry.expirations")
+            continue
+
+        try:
+            async with async_session_maker() as session:
+                await entry.agent.load_tenant_context(session)
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Failed to refresh context for tenant {tenant_id}: {e}")
+            continue
+        entry.loaded_at = time.monotonic()
+        metrics.incr("agent_registry.refreshes")
 
-    return _agent_registry[tenant_id]
+    metrics.set_gauge("agent_registry.size", len(_agent_registry))
 
 
 def clear_agent_registry():
@@ -1,15 +1,25 @@
+import asyncio
+import hashlib
 import json
 import logging
-from typing import Any
+from contextlib import aclosing
+from typing import Any, Awaitable, Callable
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from langchain_google_genai import ChatGoogleGenerativeAI
+from sqlalchemy import select, func
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from langchain_core.output_parsers import JsonOutputParser
 
+from app.core import metrics
 from app.core.config import get_settings
+from app.core.database import async_session_maker
 from app.models import Tenant, User, TenantKnowledge, Notification, Message
 from app.schemas.action import LLMResponse, NotifyUserAction, LogEventAction
+from app.agents.gateway import get_llm_gateway
+from app.agents.streaming import ResponseFieldParser
+from app.agents.memory import get_memory_store, load_history, memory_key
+from app.agents.context import ContextAssembler, estimate_tokens
+from app.services.embeddings import get_embedder
+from app.services.retrieval import backfill_embeddings, search_knowledge
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -22,21 +32,25 @@ class SlaveAgent:
         self.tenant_id = tenant_id
         self.tenant_info: dict[str, Any] = {}
         self.user_roster: list[dict] = []
-        self.knowledge_base: list[str] = []
-        self.conversation_memory: dict[str, list] = {}  # key: user_id:session_id
-
-        # Initialize LLM
-        api_key = settings.google_api_key
-        if not api_key:
-            logger.warning("GOOGLE_API_KEY not set - LLM calls will fail")
-        else:
-            logger.info(f"Using Gemini API key: {api_key[:10]}...")
-
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-2.5-flash",
-            google_api_key=api_key,
-            temperature=0.3,
+        # Small knowledge bases are kept inline; larger ones are searched
+        # per message (None) so only the top-k chunks reach the prompt.
+        self.knowledge_base: list[str] | None = []
+        # Cached tenant-wide prompt prefix, rebuilt when tenant data changes
+        self.static_prompt = ""
+        self.static_prompt_tokens = 0
+        self.prompt_version = ""
+        self.embedder = get_embedder()
+        self._backfill: asyncio.Task | None = None
+        self.memory = get_memory_store()
+        self.context_assembler = ContextAssembler(
+            self.memory,
+            budget=settings.llm_context_token_budget,
+            response_reserve=settings.llm_response_token_reserve,
+            knowledge_share=settings.context_knowledge_token_share,
+            summary_max_tokens=settings.context_summary_max_tokens,
         )
+        # Shared by all agents in the process
+        self.llm = get_llm_gateway()
         self.parser = JsonOutputParser(pydantic_object=LLMResponse)
 
     async def load_tenant_context(self, session: AsyncSession):
@@ -60,35 +74,80 @@ class SlaveAgent:
             for u in users
         ]
 
-        # Load knowledge base (simple text retrieval for PoC)
-        result = await session.execute(
-            select(TenantKnowledge).where(TenantKnowledge.tenant_id == self.tenant_id)
+        # Load the knowledge base inline only if it fits in top-k anyway
+        knowledge_count = await session.scalar(
+            select(func.count(TenantKnowledge.id)).where(
+                TenantKnowledge.tenant_id == self.tenant_id
+            )
         )
-        knowledge = result.scalars().all()
-        self.knowledge_base = [k.content for k in knowledge]
+        if knowledge_count <= settings.knowledge_top_k:
+            result = await session.execute(
+                select(TenantKnowledge.content).where(
+                    TenantKnowledge.tenant_id == self.tenant_id
+                )
+            )
+            self.knowledge_base = list(result.scalars().all())
+        else:
+            self.knowledge_base = None
+            self._start_backfill()
+
+        self._refresh_static_prompt()
 
         logger.info(
-            f"Loaded context for tenant {self.tenant_id}: {len(self.user_roster)} users, {len(self.knowledge_base)} knowledge items"
+            f"Loaded context for tenant {self.tenant_id}: {len(self.user_roster)} users, {knowledge_count} knowledge items"
         )
 
-    def _get_memory_key(self, user_id: int, session_id: str) -> str:
-        return f"{user_id}:{session_id}"
+    def _start_backfill(self):
+        """Embed knowledge rows missing embeddings, in the background.
 
-    def _get_conversation_history(self, user_id: int, session_id: str) -> list:
-        key = self._get_memory_key(user_id, session_id)
-        return self.conversation_memory.get(key, [])
+        Runs outside the caller's session so the embedder's network calls
+        hold no connection; failures are logged and retried on the next
+        context load. Until then retrieval just skips unembedded rows.
+        """
+        if self._backfill is not None and not self._backfill.done():
+            return
+        self._backfill = asyncio.create_task(self._run_backfill())
 
-    def _add_to_memory(self, user_id: int, session_id: str, role: str, content: str):
-        key = self._get_memory_key(user_id, session_id)
-        if key not in self.conversation_memory:
-            self.conversation_memory[key] = []
-        self.conversation_memory[key].append({"role": role, "content": content})
+    async def _run_backfill(self):
+        try:
+            await backfill_embeddings(self.tenant_id, self.embedder)
+        except Exception as e:
+            logger.error(f"Embedding backfill failed for tenant {self.tenant_id}: {e}")
 
-    def _build_system_prompt(self, user_info: dict) -> str:
-        """Build system prompt with tenant context."""
-        knowledge_text = "\n".join(
-            [f"- {k}" for k in self.knowledge_base]
+    async def retrieve_knowledge(self, message: str) -> list[str]:
+        """Return the knowledge chunks most relevant to the message."""
+        if self.knowledge_base is not None:
+            return self.knowledge_base
+
+        try:
+            embedding = await self.embedder.embed_query(message)
+            async with async_session_maker() as session:
+                return await search_knowledge(
+                    session, self.tenant_id, embedding, settings.knowledge_top_k
+                )
+        except Exception as e:
+            logger.error(f"Knowledge retrieval failed for tenant {self.tenant_id}: {e}")
+            return []
+
+    async def load_history(
+        self, session: AsyncSession, user_id: int, session_id: str
+    ) -> list[dict]:
+        """Get the conversation so far, hydrating it from the database if needed.
+
+        Call before the current user message is saved, so it is not part of
+        the returned history.
+        """
+        return await load_history(
+            self.memory, session, self.tenant_id, user_id, session_id
         )
+
+    def _build_static_prompt(self) -> str:
+        """Tenant-wide part of the system prompt.
+
+        It only depends on tenant data, so it is built once per context load
+        and is byte-identical for every user of the tenant. Keeping it first
+        lets the provider reuse the cached prompt prefix.
+        """
         roster_text = "\n".join(
             [
                 f"- {u['name']} (ID: {u['id']}, Role: {u['role']}, Email: {u['email']})"
@@ -98,14 +157,9 @@ class SlaveAgent:
 
         return f"""You are an AI assistant for {self.tenant_info.get('name', 'Unknown')} ({self.tenant_info.get('type', 'business')}).
 
-Current user: {user_info.get('name')} (ID: {user_info.get('id')}, Role: {user_info.get('role')})
-
 Team Members:
 {roster_text}
 
-Business Knowledge:
-{knowledge_text}
-
 Your role:
 1. Help users with their queries using the business context provided
 2. When appropriate, notify other team members about important information
@@ -146,25 +200,85 @@ Example response without notification:
 }}
 """
 
+    def _refresh_static_prompt(self):
+        """Rebuild the cached static prompt, bumping the version on change."""
+        prompt = self._build_static_prompt()
+        version = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+        if version != self.prompt_version:
+            self.static_prompt = prompt
+            self.static_prompt_tokens = estimate_tokens(prompt)
+            self.prompt_version = version
+            metrics.incr("llm.static_prompt.rebuilds")
+            logger.info(
+                f"Static prompt for tenant {self.tenant_id} is now version {version}"
+            )
+
+    def _build_dynamic_prompt(
+        self, user_info: dict, knowledge: list[str], summary: str | None = None
+    ) -> str:
+        """Per-request tail of the system prompt."""
+        knowledge_text = "\n".join([f"- {k}" for k in knowledge])
+        summary_text = (
+            f"\nSummary of the earlier conversation:\n{summary}\n" if summary else ""
+        )
+
+        return f"""
+Business Knowledge:
+{knowledge_text}
+{summary_text}
+Current user: {user_info.get('name')} (ID: {user_info.get('id')}, Role: {user_info.get('role')})
+"""
+
+    def _build_system_prompt(
+        self, user_info: dict, knowledge: list[str], summary: str | None = None
+    ) -> str:
+        """Build system prompt: cached tenant prefix plus per-request tail."""
+        return self.static_prompt + self._build_dynamic_prompt(
+            user_info, knowledge, summary
+        )
+
     async def process_message(
         self,
-        session: AsyncSession,
         user_id: int,
         user_info: dict,
         session_id: str,
         message: str,
+        history: list[dict],
+        on_delta: Callable[[str], Awaitable[None]] | None = None,
     ) -> LLMResponse:
-        """Process a user message and return response with actions."""
-        # Ensure context is loaded
-        if not self.tenant_info:
-            await self.load_tenant_context(session)
+        """Process a user message and return response with actions.
+
+        Runs without a database session: tenant context must already be
+        loaded (see get_or_create_agent), so no connection is held while
+        waiting on the LLM. When on_delta is given the LLM output is streamed
+        and each new piece of the response text is passed to it. The exchange
+        is not added to memory here; call remember() once it is stored.
+        """
+        knowledge = await self.retrieve_knowledge(message)
+
+        # Fit knowledge and history into the token budget
+        context = await self.context_assembler.assemble(
+            memory_key(self.tenant_id, user_id, session_id),
+            self.static_prompt_tokens
+            + estimate_tokens(self._build_dynamic_prompt(user_info, [])),
+            message,
+            knowledge,
+            history,
+        )
+        logger.debug(
+            f"Context for tenant {self.tenant_id}: ~{context.tokens} tokens, "
+            f"{len(context.knowledge)}/{len(knowledge)} knowledge chunks, "
+            f"{len(context.history)}/{len(history)} history turns"
+        )
 
         # Build messages for LLM
-        messages = [SystemMessage(content=self._build_system_prompt(user_info))]
+        system_prompt = self._build_system_prompt(
+            user_info, context.knowledge, context.summary
+        )
+        messages = [SystemMessage(content=system_prompt)]
 
         # Add conversation history
-        history = self._get_conversation_history(user_id, session_id)
-        for msg in history[-10:]:  # Last 10 messages for context
+        for msg in context.history:
             if msg["role"] == "user":
                 messages.append(HumanMessage(content=msg["content"]))
             else:
@@ -173,10 +287,23 @@ Example response without notification:
         # Add current message
         messages.append(HumanMessage(content=message))
 
+        prompt_bytes = sum(len(m.content.encode("utf-8")) for m in messages)
+        metrics.observe("llm.prompt_bytes", prompt_bytes)
+        metrics.observe(
+            "llm.prompt_static_bytes", len(self.static_prompt.encode("utf-8"))
+        )
+        metrics.observe("llm.prompt_tokens_estimate", context.tokens)
+
         # Call LLM
         try:
-            response = await self.llm.ainvoke(messages)
-            response_text = response.content
+            if on_delta is None:
+                response_text = await self.llm.invoke(
+                    self.tenant_id, messages, context.tokens
+                )
+            else:
+                response_text = await self._stream_llm(
+                    messages, context.tokens, on_delta
+                )
 
             # Parse JSON response
             try:
@@ -188,14 +315,6 @@ Example response without notification:
                 # Fallback: treat entire response as text, no actions
                 llm_response = LLMResponse(response=response_text, actions=[])
 
-            # Update memory
-            self._add_to_memory(user_id, session_id, "user", message)
-            self._add_to_memory(
-                user_id, session_id, "assistant", llm_response.response
-            )
-
-            return llm_response
-
         except Exception as e:
             logger.error(f"LLM invocation failed: {e}")
             return LLMResponse(
@@ -203,6 +322,56 @@ Example response without notification:
                 actions=[],
             )
 
+        return llm_response
+
+    async def remember(
+        self, user_id: int, session_id: str, message: str, response: str
+    ):
+        """Add a stored exchange to conversation memory (see process_message).
+
+        Called by the worker once the exchange is committed, so memory never
+        holds turns the messages table doesn't.
+        """
+        try:
+            await self.memory.append(
+                memory_key(self.tenant_id, user_id, session_id),
+                [
+                    {"role": "user", "content": message},
+                    {"role": "assistant", "content": response},
+                ],
+            )
+        except Exception as e:
+            logger.error(f"Failed to update conversation memory: {e}")
+
+    async def _stream_llm(
+        self,
+        messages: list,
+        prompt_tokens: int,
+        on_delta: Callable[[str], Awaitable[None]],
+    ) -> str:
+        """Stream the LLM reply, forwarding response text as it arrives.
+
+        Forwarding is best effort: a failed delta is logged and the reply
+        still completes, since the final message carries the full text.
+        """
+        parser = ResponseFieldParser()
+        parts = []
+        # Closed explicitly so the gateway's slots are released right away,
+        # not when the generator is garbage collected
+        async with aclosing(
+            self.llm.stream(self.tenant_id, messages, prompt_tokens)
+        ) as stream:
+            async for text in stream:
+                parts.append(text)
+                delta = parser.feed(text)
+                if delta:
+                    try:
+                        await on_delta(delta)
+                    except Exception as e:
+                        metrics.incr("llm.delta_failures")
+                        logger.warning(f"Failed to forward response delta: {e}")
+        return "".join(parts)
+
     def _parse_llm_response(self, text: str) -> dict:
         """Extract JSON from LLM response text."""
         # Try to find JSON in the response
@@ -226,17 +395,25 @@ Example response without notification:
         session: AsyncSession,
         from_user_id: int,
         actions: list,
-    ):
-        """Execute actions returned by the LLM."""
+    ) -> list[Notification]:
+        """Execute actions returned by the LLM.
+
+        Returns the notifications created, so the caller can announce them
+        once its transaction has committed.
+        """
+        notifications = []
         for action in actions:
             if isinstance(action, NotifyUserAction):
-                await self._execute_notify_user(
+                notification = await self._execute_notify_user(
                     session, from_user_id, action.user_id, action.message
                 )
+                if notification:
+                    notifications.append(notification)
             elif isinstance(action, LogEventAction):
                 logger.info(f"Event logged: {action.event}")
             else:
                 logger.warning(f"Unknown action type: {type(action)}")
+        return notifications
 
     async def _execute_notify_user(
         self,
@@ -244,7 +421,7 @@ Example response without notification:
         from_user_id: int,
         to_user_id: int,
         message: str,
-    ):
+    ) -> Notification | None:
         """Create notification for a user."""
         # Verify target user belongs to same tenant
         target_user = await session.get(User, to_user_id)
@@ -252,7 +429,7 @@ Example response without notification:
             logger.error(
                 f"Cannot notify user {to_user_id}: not in tenant {self.tenant_id}"
             )
-            return
+            return None
 
         notification = Notification(
             tenant_id=self.tenant_id,
@@ -264,3 +441,4 @@ Example response without notification:
         session.add(notification)
         await session.flush()
         logger.info(f"Created notification from user {from_user_id} to {to_user_id}")
+        return notification
@@ -0,0 +1,82 @@
+"""Incremental extraction of the response text from a streamed LLM reply."""
+import json
+import re
+
+_RESPONSE_KEY = re.compile(r'"response"\s*:\s*"')
+_ESCAPES = {
+    '"': '"',
+    "\\": "\\",
+    "/": "/",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+}
+
+
+class ResponseFieldParser:
+    """Pull the "response" string out of a JSON envelope as it streams in.
+
+    The LLM answers with {"response": "...", "actions": [...]}. Feeding the
+    raw chunks to this parser yields only the decoded text of the response
+    field, so it can be shown to the user before the whole envelope (and the
+    actions) has arrived. Escape sequences split across chunks are held back
+    until complete.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._in_string = False
+        self.done = False
+
+    def feed(self, chunk: str) -> str:
+        """Add a raw chunk and return newly decoded response text."""
+        if self.done:
+            return ""
+        self._buffer += chunk
+
+        if not self._in_string:
+            match = _RESPONSE_KEY.search(self._buffer)
+            if not match:
+                return ""
+            self._in_string = True
+            self._pos = match.end()
+
+        out = []
+        buffer = self._buffer
+        while self._pos < len(buffer):
+            char = buffer[self._pos]
+            if char == '"':
+                self.done = True
+                break
+            if char != "\\":
+                out.append(char)
+                self._pos += 1
+                continue
+
+            # Escape sequence: wait for the rest of it if it is incomplete
+            if self._pos + 1 >= len(buffer):
+                break
+            code = buffer[self._pos + 1]
+            if code == "u":
+                if self._pos + 6 > len(buffer):
+                    break
+                # Surrogate pairs span two \uXXXX escapes
+                high = buffer[self._pos + 2 : self._pos + 4].lower()
+                length = 12 if high in ("d8", "d9", "da", "db") else 6
+                if self._pos + length > len(buffer):
+                    break
+                out.append(self._decode_unicode(self._pos, length))
+                self._pos += length
+            else:
+                out.append(_ESCAPES.get(code, code))
+                self._pos += 2
+        return "".join(out)
+
+    def _decode_unicode(self, pos: int, length: int) -> str:
+        try:
+            return json.loads(f'"{self._buffer[pos:pos + length]}"')
+        except ValueError:
+            return ""
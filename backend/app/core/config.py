@@ -14,9 +14,126 @@ class Settings(BaseSettings):
     jwt_secret_key: str = "your-secret-key-change-in-production"
     jwt_algorithm: str = "HS256"
     jwt_access_token_expire_minutes: int = 60
+    jwt_refresh_token_expire_days: int = 14
+    # Verified access tokens cached per process; entries never outlive the
+    # token's exp, and the TTL bounds how long a missed revocation lingers
+    token_cache_max_size: int = 10000
+    token_cache_ttl_seconds: int = 300
+    # bcrypt runs on a bounded thread pool (0 = one thread per CPU); logins
+    # beyond the workers plus this queue are refused with 503
+    password_hash_workers: int = 0
+    password_hash_max_queue: int = 64
 
+    # Agent registry: bounded LRU with periodic context refresh
+    agent_registry_max_size: int = 1000
+    agent_context_ttl_seconds: int = 300
+    agent_refresh_interval_seconds: int = 30
+
+    # LLM provider: "gemini", or "simulated" for offline load and soak tests
+    llm_provider: str = "gemini"
     # Gemini API
     google_api_key: str = ""
+    llm_model: str = "gemini-2.5-flash"
+    llm_temperature: float = 0.3
+    # Process-wide LLM gateway limits (0 disables a rate limit)
+    llm_max_concurrency: int = 32
+    llm_requests_per_minute: int = 1000
+    llm_tokens_per_minute: int = 1_000_000
+    llm_tenant_max_concurrency: int = 4
+    llm_tenant_requests_per_minute: int = 0
+    llm_max_retries: int = 4
+    llm_backoff_base_seconds: float = 0.5
+    llm_backoff_max_seconds: float = 20.0
+    # Simulated provider: latency, output rate, failures and action mix
+    llm_sim_latency_ms: float = 800  # median time to first token
+    llm_sim_latency_sigma: float = 0.5  # log-normal spread
+    llm_sim_tokens_per_second: float = 50
+    llm_sim_response_tokens: int = 60
+    llm_sim_error_rate: float = 0.0
+    llm_sim_notify_probability: float = 0.3
+    llm_sim_log_event_probability: float = 0.1
+    llm_sim_seed: int = 0
+    # Stream partial responses to the client as "delta" frames
+    llm_streaming: bool = True
+
+    # Conversation memory: "redis" (shared by all workers) or "memory"
+    memory_backend: str = "redis"
+    memory_max_turns: int = 50
+    memory_ttl_seconds: int = 24 * 3600
+    memory_max_bytes: int = 64 * 1024 * 1024  # in-process backend only
+
+    # Prompt token budget (estimated) for system prompt, knowledge and history
+    llm_context_token_budget: int = 8000
+    llm_response_token_reserve: int = 1024
+    context_knowledge_token_share: float = 0.4
+    context_summary_max_tokens: int = 400
+
+    # Knowledge retrieval: "gemini" or "local" (deterministic, offline)
+    embedding_provider: str = "gemini"
+    embedding_model: str = "models/text-embedding-004"
+    embedding_dimensions: int = 768
+    knowledge_top_k: int = 5
+    # pgvector hnsw.iterative_scan mode for filtered searches; "" to skip
+    knowledge_hnsw_iterative_scan: str = "strict_order"
+
+    # Knowledge ingestion
+    knowledge_chunk_size: int = 1000  # characters
+    knowledge_chunk_overlap: int = 100
+    embedding_batch_size: int = 64
+    embedding_cache_ttl_seconds: int = 30 * 24 * 3600
+
+    # Unread notification counters cached in Redis
+    unread_count_ttl_seconds: int = 24 * 3600
+    unread_reconcile_interval_seconds: int = 300
+
+    # WebSocket replay: recent frames kept per user for reconnecting clients
+    ws_replay_max_events: int = 500
+    ws_replay_ttl_seconds: int = 3600
+    # Bounded send queue per connection. On overflow: "drop_deltas" (drop
+    # streaming deltas), "coalesce" (merge queued deltas) or "disconnect";
+    # a connection is closed if that doesn't free space, and recovers by
+    # reconnecting with replay
+    ws_send_queue_size: int = 256
+    ws_overflow_policy: str = "drop_deltas"
+    # Frames smaller than this are held briefly and sent as one "batch" frame
+    ws_batch_window_ms: int = 20
+    ws_batch_max_bytes: int = 16 * 1024
+
+    # Worker
+    worker_batch_size: int = 10
+    worker_max_concurrency: int = 16
+    worker_tenant_max_concurrency: int = 4
+    # Per-tenant overrides, e.g. WORKER_TENANT_CONCURRENCY_OVERRIDES='{"1": 8}'
+    worker_tenant_concurrency_overrides: dict[int, int] = {}
+    # Fair scheduling: fetched messages buffered locally, and tenant weights
+    # for deficit round-robin, e.g. WORKER_TENANT_WEIGHTS='{"1": 2.0}'
+    worker_buffer_size: int = 64
+    worker_default_tenant_weight: float = 1.0
+    worker_tenant_weights: dict[int, float] = {}
+    # Consumer name in the stream group; defaults to <hostname>-<pid>-<random>
+    worker_consumer_name: str = ""
+    worker_heartbeat_interval_seconds: int = 5
+    worker_heartbeat_ttl_seconds: int = 30
+    # Pending entries idle longer than this are taken over from dead consumers
+    worker_claim_idle_ms: int = 60000
+    worker_claim_interval_seconds: int = 15
+    # Each reclaim cycle only claims from streams with pending entries, and
+    # checks this many of the other streams (in rotation) for dead consumers
+    worker_consumer_cleanup_streams: int = 200
+    # Messages of one chat session never run concurrently on any worker: a
+    # Redis lock (renewed by the heartbeat) guards each session, and a message
+    # whose session is busy elsewhere is retried after this delay
+    worker_session_lock_ttl_seconds: int = 30
+    worker_session_lock_retry_ms: int = 250
+    # How long a message remembers which of its side effects already ran,
+    # so a redelivered message doesn't repeat them
+    worker_processed_ttl_seconds: int = 86400
+    worker_block_ms: int = 1000
+    # Streams whose reads stay empty for this long are no longer polled
+    worker_stream_idle_seconds: int = 60
+    # Activity timestamps are written with API hosts' clocks; rescan this far
+    # back so skew between hosts can't hide an enqueue
+    worker_activity_skew_seconds: float = 5.0
 
     # App
     app_name: str = "Agent Prototype"
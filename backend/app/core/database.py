@@ -1,5 +1,6 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
+from app.core import metrics
 from app.core.config import get_settings
 
 settings = get_settings()
@@ -19,6 +20,14 @@ async_session_maker = async_sessionmaker(
 Base = declarative_base()
 
 
+def record_pool_metrics():
+    """Store connection pool usage as gauges (see GET /api/metrics)."""
+    pool = engine.pool
+    metrics.set_gauge("db.pool.size", pool.size())
+    metrics.set_gauge("db.pool.checked_out", pool.checkedout())
+    metrics.set_gauge("db.pool.overflow", max(pool.overflow(), 0))
+
+
 async def get_db():
     async with async_session_maker() as session:
         try:
@@ -2,8 +2,8 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
-from app.core.security import decode_access_token
 from app.schemas.auth import TokenData
+from app.services.token_cache import get_token_cache
 
 security = HTTPBearer()
 
@@ -12,7 +12,8 @@ async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
 ) -> TokenData:
     token = credentials.credentials
-    token_data = decode_access_token(token)
+    # Usually a dictionary lookup; tokens are verified once per process
+    token_data = await get_token_cache().authenticate(token)
 
     if token_data is None:
         raise HTTPException(
@@ -0,0 +1,74 @@
+"""Lightweight in-process metrics (counters, gauges and value summaries)."""
+import math
+from collections import defaultdict, deque
+
+# Recent observations kept per summary for percentile estimates
+_WINDOW = 1024
+
+_counters: dict[str, float] = defaultdict(float)
+_gauges: dict[str, float] = {}
+_summaries: dict[str, "_Summary"] = {}
+
+
+class _Summary:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent: deque[float] = deque(maxlen=_WINDOW)
+
+    def observe(self, value: float):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.recent.append(value)
+
+    def snapshot(self) -> dict:
+        ordered = sorted(self.recent)
+
+        def percentile(p: float) -> float:
+            if not ordered:
+                return 0.0
+            return ordered[min(len(ordered) - 1, math.ceil(p * len(ordered)) - 1)]
+
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+            "p50": percentile(0.50),
+            "p95": percentile(0.95),
+            "p99": percentile(0.99),
+        }
+
+
+def incr(name: str, value: float = 1):
+    """Increase a counter."""
+    _counters[name] += value
+
+
+def set_gauge(name: str, value: float):
+    """Record the current value of something (queue depth, pool usage...)."""
+    _gauges[name] = value
+
+
+def observe(name: str, value: float):
+    """Record one observation of a distribution (sizes, latencies...)."""
+    if name not in _summaries:
+        _summaries[name] = _Summary()
+    _summaries[name].observe(value)
+
+
+def snapshot() -> dict:
+    """All metrics of this process as plain JSON-serialisable data."""
+    return {
+        "counters": dict(_counters),
+        "gauges": dict(_gauges),
+        "summaries": {name: s.snapshot() for name, s in _summaries.items()},
+    }
+
+
+def reset():
+    """Clear all metrics (for tests and benchmarks)."""
+    _counters.clear()
+    _gauges.clear()
+    _summaries.clear()
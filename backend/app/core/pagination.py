@@ -0,0 +1,63 @@
+"""Keyset (cursor) pagination on (created_at, id)."""
+import base64
+from datetime import datetime
+
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Opaque cursor pointing at one row."""
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(created_at), int(row_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+def keyset_page(query, created_at_column, id_column, limit, before=None, after=None):
+    """Apply a keyset filter, ordering and limit to a select.
+
+    Without a cursor (or with `before`) rows are read newest first; with
+    `after` they are read oldest first. One extra row is fetched so the
+    caller can tell whether another page exists (see page_rows).
+    """
+    if before and after:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Use either before or after, not both",
+        )
+
+    key = tuple_(created_at_column, id_column)
+    if after:
+        query = query.where(key > tuple_(*decode_cursor(after)))
+        query = query.order_by(created_at_column.asc(), id_column.asc())
+    else:
+        if before:
+            query = query.where(key < tuple_(*decode_cursor(before)))
+        query = query.order_by(created_at_column.desc(), id_column.desc())
+    return query.limit(limit + 1)
+
+
+def page_rows(rows: list, limit: int, key) -> tuple[list, str | None]:
+    """Trim the extra row and build the cursor for the next page.
+
+    `key` maps a row to its (created_at, id). The next cursor continues in
+    the same direction as the request: pass it back as the same parameter
+    (before or after) to get the following page.
+    """
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(*key(rows[-1])) if has_more else None
+    return rows, next_cursor
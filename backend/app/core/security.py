@@ -1,6 +1,12 @@
+import asyncio
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from jose import jwt, JWTError
 from passlib.context import CryptContext
+from app.core import metrics
 from app.core.config import get_settings
 from app.schemas.auth import TokenData
 
@@ -8,6 +14,17 @@ settings = get_settings()
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+ACCESS_TOKEN_TYPE = "access"
+REFRESH_TOKEN_TYPE = "refresh"
+
+
+class PasswordHasherBusy(Exception):
+    """Too many password hashes are already running or waiting."""
+
+
+_hash_executor: ThreadPoolExecutor | None = None
+_hash_pending = 0
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -17,23 +34,96 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password on the hashing pool, without blocking the event loop."""
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_in_hash_pool(get_password_hash, password)
+
+
+def password_hash_workers() -> int:
+    return settings.password_hash_workers or os.cpu_count() or 1
+
+
+async def _run_in_hash_pool(func, *args):
+    """Run a bcrypt call on the bounded thread pool.
+
+    bcrypt releases the GIL, so the threads hash in parallel while the loop
+    keeps serving other requests and WebSockets. Calls beyond the workers
+    plus password_hash_max_queue raise PasswordHasherBusy instead of
+    queueing, so a burst of logins can't build an unbounded backlog.
+    """
+    global _hash_executor, _hash_pending
+    if _hash_pending >= password_hash_workers() + settings.password_hash_max_queue:
+        metrics.incr("auth.password_hash.rejected")
+        raise PasswordHasherBusy()
+    if _hash_executor is None:
+        _hash_executor = ThreadPoolExecutor(
+            max_workers=password_hash_workers(), thread_name_prefix="password-hash"
+        )
+
+    _hash_pending += 1
+    metrics.set_gauge("auth.password_hash.pending", _hash_pending)
+    started = time.perf_counter()
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor, func, *args)
+    finally:
+        _hash_pending -= 1
+        metrics.set_gauge("auth.password_hash.pending", _hash_pending)
+        metrics.observe("auth.password_hash.seconds", time.perf_counter() - started)
+
+
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(
         minutes=settings.jwt_access_token_expire_minutes
     )
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "type": ACCESS_TOKEN_TYPE})
     encoded_jwt = jwt.encode(
         to_encode, settings.jwt_secret_key, algorithm=settings.jwt_algorithm
     )
     return encoded_jwt
 
 
+def create_refresh_token(
+    user_id: int, tenant_id: int, family: str | None = None
+) -> str:
+    """Long-lived token that can only be exchanged for new tokens.
+
+    It carries no profile claims; those are reloaded from the database on
+    refresh, so changes to the user show up in the next access token. Every
+    token is unique (jti), and tokens rotated from one login share a family
+    id so the whole chain can be revoked at once.
+    """
+    expire = datetime.now(timezone.utc) + timedelta(
+        days=settings.jwt_refresh_token_expire_days
+    )
+    return jwt.encode(
+        {
+            "user_id": user_id,
+            "tenant_id": tenant_id,
+            "type": REFRESH_TOKEN_TYPE,
+            "fam": family or uuid.uuid4().hex,
+            "jti": uuid.uuid4().hex,
+            "exp": expire,
+        },
+        settings.jwt_secret_key,
+        algorithm=settings.jwt_algorithm,
+    )
+
+
 def decode_access_token(token: str) -> TokenData | None:
     try:
         payload = jwt.decode(
             token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm]
         )
+        # Tokens issued before token types existed are access tokens
+        if payload.get("type", ACCESS_TOKEN_TYPE) != ACCESS_TOKEN_TYPE:
+            return None
+
         user_id = payload.get("user_id")
         tenant_id = payload.get("tenant_id")
         email = payload.get("email")
@@ -41,6 +131,7 @@ def decode_access_token(token: str) -> TokenData | None:
         role = payload.get("role")
         tenant_name = payload.get("tenant_name")
         tenant_type = payload.get("tenant_type")
+        exp = payload.get("exp")
 
         if user_id is None or tenant_id is None:
             return None
@@ -53,6 +144,32 @@ def decode_access_token(token: str) -> TokenData | None:
             role=role,
             tenant_name=tenant_name,
             tenant_type=tenant_type,
+            exp=exp,
+        )
+    except JWTError:
+        return None
+
+
+def token_expiry(token: str) -> int | None:
+    """exp claim of a token that was already verified."""
+    try:
+        return jwt.get_unverified_claims(token).get("exp")
+    except JWTError:
+        return None
+
+
+def decode_refresh_token(token: str) -> tuple[int, int, str | None] | None:
+    """(user_id, tenant_id, family) of a valid refresh token, else None."""
+    try:
+        payload = jwt.decode(
+            token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm]
         )
     except JWTError:
         return None
+    if payload.get("type") != REFRESH_TOKEN_TYPE:
+        return None
+    user_id = payload.get("user_id")
+    tenant_id = payload.get("tenant_id")
+    if user_id is None or tenant_id is None:
+        return None
+    return user_id, tenant_id, payload.get("fam")
@@ -1,12 +1,24 @@
 """Main FastAPI application."""
+import json
 import logging
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import get_settings
-from app.services.redis_service import close_redis
-from app.routers import auth, messages, notifications, websocket
+from app.core import metrics
+from app.core.dependencies import get_current_user
+from app.core.database import record_pool_metrics
+from app.schemas.auth import TokenData
+from app.services.redis_service import (
+    WORKER_METRICS_KEY_PREFIX,
+    WORKER_REGISTRY_KEY,
+    close_redis,
+    get_redis,
+)
+from app.services.token_cache import get_token_cache
+from app.services.ws_hub import get_hub
+from app.routers import auth, messages, notifications, websocket, knowledge
 
 settings = get_settings()
 
@@ -22,9 +34,13 @@ async def lifespan(app: FastAPI):
     """Application lifespan manager."""
     # Startup
     logging.info("Starting application...")
+    await get_hub().start()
+    await get_token_cache().start()
     yield
     # Shutdown
     logging.info("Shutting down application...")
+    await get_token_cache().stop()
+    await get_hub().stop()
     await close_redis()
 
 
@@ -49,6 +65,7 @@ app.add_middleware(
 app.include_router(auth.router, prefix="/api")
 app.include_router(messages.router, prefix="/api")
 app.include_router(notifications.router, prefix="/api")
+app.include_router(knowledge.router, prefix="/api")
 app.include_router(websocket.router)
 
 
@@ -64,6 +81,35 @@ async def health_check():
     return {"status": "healthy", "app": settings.app_name}
 
 
+@app.get("/api/metrics")
+async def get_metrics(current_user: TokenData = Depends(get_current_user)):
+    """Metrics of this API process and of every live worker (managers only)."""
+    if current_user.role != "manager":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only managers can view metrics",
+        )
+
+    record_pool_metrics()
+    redis = await get_redis()
+    names = sorted(await redis.smembers(WORKER_REGISTRY_KEY))
+    workers = {}
+    if names:
+        snapshots = await redis.mget(
+            [f"{WORKER_METRICS_KEY_PREFIX}{name}" for name in names]
+        )
+        gone = []
+        for name, data in zip(names, snapshots):
+            if data:
+                workers[name] = json.loads(data)
+            else:
+                gone.append(name)
+        if gone:
+            # Workers that died without unregistering; their snapshot expired
+            await redis.srem(WORKER_REGISTRY_KEY, *gone)
+    return {"api": metrics.snapshot(), "workers": workers}
+
+
 @app.get("/")
 async def root():
     """Root endpoint."""
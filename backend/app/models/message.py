@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -13,8 +13,31 @@ class Message(Base):
     session_id = Column(String(255), nullable=False, index=True)
     role = Column(String(50), nullable=False)  # user, assistant
     content = Column(Text, nullable=False)
+    # Stream entry the row was written for; a redelivered entry finds its
+    # rows already there instead of adding them again
+    stream_message_id = Column(String(64), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
     tenant = relationship("Tenant", back_populates="messages")
     user = relationship("User", back_populates="messages")
+
+    __table_args__ = (
+        # Conversation pages, keyset-paginated on (created_at, id)
+        Index(
+            "ix_messages_conversation",
+            "tenant_id",
+            "user_id",
+            "session_id",
+            "created_at",
+            "id",
+        ),
+        Index(
+            "ix_messages_stream_message",
+            "tenant_id",
+            "stream_message_id",
+            "role",
+            unique=True,
+            postgresql_where=stream_message_id.isnot(None),
+        ),
+    )
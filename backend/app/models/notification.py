@@ -1,4 +1,13 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    DateTime,
+    ForeignKey,
+    Text,
+    Boolean,
+    Index,
+)
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -19,3 +28,25 @@ class Notification(Base):
     tenant = relationship("Tenant", back_populates="notifications")
     from_user = relationship("User", foreign_keys=[from_user_id], back_populates="sent_notifications")
     to_user = relationship("User", foreign_keys=[to_user_id], back_populates="received_notifications")
+
+    # Fetch created_at via RETURNING on insert, so notifications can be
+    # serialised for push delivery after their session has closed
+    __mapper_args__ = {"eager_defaults": True}
+
+    __table_args__ = (
+        # Notification feed, newest first, keyset-paginated on (created_at, id)
+        Index(
+            "ix_notifications_feed",
+            tenant_id,
+            to_user_id,
+            created_at.desc(),
+            id.desc(),
+        ),
+        # Unread counts only touch the (small) unread part of the table
+        Index(
+            "ix_notifications_unread",
+            tenant_id,
+            to_user_id,
+            postgresql_where=read == False,
+        ),
+    )
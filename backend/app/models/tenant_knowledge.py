@@ -1,10 +1,20 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+import hashlib
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from pgvector.sqlalchemy import Vector
 from app.core.database import Base
 
 
+def knowledge_content_hash(content: str) -> str:
+    """Hash used to dedupe knowledge chunks (whitespace-insensitive)."""
+    return hashlib.sha256(" ".join(content.split()).encode("utf-8")).hexdigest()
+
+
+def _default_content_hash(context) -> str:
+    return knowledge_content_hash(context.get_current_parameters()["content"])
+
+
 class TenantKnowledge(Base):
     __tablename__ = "tenant_knowledge"
 
@@ -13,7 +23,22 @@ class TenantKnowledge(Base):
     content = Column(Text, nullable=False)
     embedding = Column(Vector(768))  # Gemini embedding dimension
     category = Column(String(100), nullable=False)  # schedule, roster, rules, etc.
+    content_hash = Column(String(64), default=_default_content_hash)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
     tenant = relationship("Tenant", back_populates="knowledge")
+
+    __table_args__ = (
+        Index(
+            "uq_tenant_knowledge_tenant_hash", "tenant_id", "content_hash", unique=True
+        ),
+        # Approximate nearest-neighbour index for cosine similarity search
+        Index(
+            "ix_tenant_knowledge_embedding_hnsw",
+            "embedding",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding": "vector_cosine_ops"},
+        ),
+    )
@@ -1,13 +1,27 @@
 """Authentication endpoints."""
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 
 from app.core.database import get_db
-from app.core.security import verify_password, create_access_token
-from app.schemas.auth import Token, LoginRequest
+from app.core.dependencies import get_current_user, security
+from app.core.security import (
+    PasswordHasherBusy,
+    create_access_token,
+    create_refresh_token,
+    decode_refresh_token,
+    verify_password_async,
+)
+from app.schemas.auth import Token, TokenData, LoginRequest, RefreshRequest
 from app.models import User
+from app.services.token_cache import (
+    is_token_family_revoked,
+    revoke_token,
+    revoke_token_family,
+    use_refresh_token,
+)
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -23,12 +37,86 @@ async def login(
     )
     user = result.scalar_one_or_none()
 
-    if not user or not verify_password(request.password, user.password_hash):
+    try:
+        valid = user is not None and await verify_password_async(
+            request.password, user.password_hash
+        )
+    except PasswordHasherBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many logins in progress, please retry",
+            headers={"Retry-After": "1"},
+        )
+
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password",
         )
 
+    return _issue_tokens(user)
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh(
+    request: RefreshRequest, session: AsyncSession = Depends(get_db)
+) -> Token:
+    """Exchange a refresh token for new tokens, without a password check.
+
+    Refresh tokens are single use: the presented one is marked used atomically,
+    so each login keeps exactly one live refresh token. Presenting a token
+    that was already rotated means it leaked (or raced); the whole family
+    is revoked, ending the session for whoever holds its newest token.
+    """
+    claims = decode_refresh_token(request.refresh_token)
+    if claims is None:
+        raise _invalid_refresh_token()
+    user_id, tenant_id, family = claims
+
+    if not await use_refresh_token(request.refresh_token):
+        if family:
+            await revoke_token_family(family)
+        raise _invalid_refresh_token()
+    if family and await is_token_family_revoked(family):
+        raise _invalid_refresh_token()
+
+    result = await session.execute(
+        select(User)
+        .where(User.id == user_id, User.tenant_id == tenant_id)
+        .options(selectinload(User.tenant))
+    )
+    user = result.scalar_one_or_none()
+    if user is None:
+        raise _invalid_refresh_token()
+
+    return _issue_tokens(user, family)
+
+
+@router.post("/logout")
+async def logout(
+    request: RefreshRequest | None = None,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: TokenData = Depends(get_current_user),
+):
+    """Revoke the access token, and the refresh token family if one is given."""
+    await revoke_token(credentials.credentials)
+    if request is not None:
+        claims = decode_refresh_token(request.refresh_token)
+        if claims and claims[:2] == (current_user.user_id, current_user.tenant_id):
+            await use_refresh_token(request.refresh_token)
+            if claims[2]:
+                await revoke_token_family(claims[2])
+    return {"status": "logged_out"}
+
+
+def _invalid_refresh_token() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid or expired refresh token",
+    )
+
+
+def _issue_tokens(user: User, family: str | None = None) -> Token:
     # Tenant is already loaded
     tenant = user.tenant
 
@@ -43,6 +131,7 @@ async def login(
         "tenant_type": tenant.type,
     }
 
-    access_token = create_access_token(token_data)
-
-    return Token(access_token=access_token)
+    return Token(
+        access_token=create_access_token(token_data),
+        refresh_token=create_refresh_token(user.id, user.tenant_id, family),
+    )
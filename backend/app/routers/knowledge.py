@@ -0,0 +1,33 @@
+"""Knowledge ingestion endpoints."""
+from dataclasses import asdict
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_db
+from app.core.dependencies import get_current_user
+from app.schemas.auth import TokenData
+from app.schemas.knowledge import KnowledgeIngestRequest, KnowledgeIngestResponse
+from app.services.ingestion import ingest_documents
+
+router = APIRouter(prefix="/knowledge", tags=["knowledge"])
+
+
+@router.post("", response_model=KnowledgeIngestResponse)
+async def ingest_knowledge(
+    request: KnowledgeIngestRequest,
+    current_user: TokenData = Depends(get_current_user),
+    session: AsyncSession = Depends(get_db),
+):
+    """Chunk, embed and store documents in the current tenant's knowledge base."""
+    if current_user.role != "manager":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only managers can add knowledge",
+        )
+
+    result = await ingest_documents(
+        session,
+        current_user.tenant_id,
+        [(doc.content, doc.category) for doc in request.documents],
+    )
+    return KnowledgeIngestResponse(**asdict(result))
@@ -1,18 +1,47 @@
 """Message endpoints."""
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from app.core.database import get_db
 from app.core.dependencies import get_current_user
+from app.core.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    keyset_page,
+    page_rows,
+)
 from app.schemas.auth import TokenData
-from app.schemas.message import MessageCreate, MessageResponse
+from app.schemas.message import MessageCreate, MessagePage
 from app.services.redis_service import enqueue_message
 from app.models import Message
 
 router = APIRouter(prefix="/messages", tags=["messages"])
 
 
+def conversation_page_query(
+    tenant_id: int,
+    user_id: int,
+    session_id: str,
+    limit: int,
+    before: str | None = None,
+    after: str | None = None,
+):
+    """One page of a conversation (see scripts/check_query_plans.py)."""
+    return keyset_page(
+        select(Message).where(
+            Message.tenant_id == tenant_id,
+            Message.user_id == user_id,
+            Message.session_id == session_id,
+        ),
+        Message.created_at,
+        Message.id,
+        limit,
+        before=before,
+        after=after,
+    )
+
+
 @router.post("", status_code=status.HTTP_202_ACCEPTED)
 async def send_message(
     message: MessageCreate,
@@ -43,21 +72,33 @@ async def send_message(
     }
 
 
-@router.get("", response_model=list[MessageResponse])
+@router.get("", response_model=MessagePage)
 async def get_messages(
     session_id: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    before: str | None = None,
+    after: str | None = None,
     current_user: TokenData = Depends(get_current_user),
     session: AsyncSession = Depends(get_db),
 ):
-    """Get conversation history for a session."""
-    result = await session.execute(
-        select(Message)
-        .where(
-            Message.tenant_id == current_user.tenant_id,
-            Message.user_id == current_user.user_id,
-            Message.session_id == session_id,
-        )
-        .order_by(Message.created_at)
+    """Get a page of conversation history for a session.
+
+    Without a cursor this is the latest page; next_cursor then pages further
+    back via `before`. With `after` it returns messages newer than the
+    cursor. Items are always in chronological order.
+    """
+    query = conversation_page_query(
+        current_user.tenant_id,
+        current_user.user_id,
+        session_id,
+        limit,
+        before,
+        after,
+    )
+    result = await session.execute(query)
+    messages, next_cursor = page_rows(
+        result.scalars().all(), limit, lambda m: (m.created_at, m.id)
     )
-    messages = result.scalars().all()
-    return messages
+    if not after:
+        messages.reverse()
+    return MessagePage(items=messages, next_cursor=next_cursor)
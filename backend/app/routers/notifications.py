@@ -1,33 +1,70 @@
 """Notification endpoints."""
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
 
 from app.core.database import get_db
 from app.core.dependencies import get_current_user
+from app.core.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    keyset_page,
+    page_rows,
+)
 from app.schemas.auth import TokenData
-from app.schemas.notification import NotificationResponse
+from app.schemas.notification import NotificationResponse, NotificationPage
 from app.models import Notification, User
+from app.services import unread_counts
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
 
 
-@router.get("", response_model=list[NotificationResponse])
-async def get_notifications(
-    current_user: TokenData = Depends(get_current_user),
-    session: AsyncSession = Depends(get_db),
+def feed_page_query(
+    tenant_id: int,
+    user_id: int,
+    limit: int,
+    before: str | None = None,
+    after: str | None = None,
 ):
-    """Get all notifications for current user."""
-    result = await session.execute(
+    """One page of a user's notifications (see scripts/check_query_plans.py)."""
+    return keyset_page(
         select(Notification, User.name.label("from_user_name"))
         .join(User, Notification.from_user_id == User.id)
         .where(
-            Notification.tenant_id == current_user.tenant_id,
-            Notification.to_user_id == current_user.user_id,
-        )
-        .order_by(Notification.created_at.desc())
+            Notification.tenant_id == tenant_id,
+            Notification.to_user_id == user_id,
+        ),
+        Notification.created_at,
+        Notification.id,
+        limit,
+        before=before,
+        after=after,
+    )
+
+
+@router.get("", response_model=NotificationPage)
+async def get_notifications(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    before: str | None = None,
+    after: str | None = None,
+    current_user: TokenData = Depends(get_current_user),
+    session: AsyncSession = Depends(get_db),
+):
+    """Get a page of notifications for current user, newest first.
+
+    Without a cursor this is the latest page; next_cursor then pages further
+    back via `before`. With `after` it returns notifications newer than the
+    cursor.
+    """
+    query = feed_page_query(
+        current_user.tenant_id, current_user.user_id, limit, before, after
     )
-    rows = result.all()
+    result = await session.execute(query)
+    rows, next_cursor = page_rows(
+        result.all(), limit, lambda row: (row[0].created_at, row[0].id)
+    )
+    if after:
+        rows.reverse()
 
     notifications = []
     for notification, from_user_name in rows:
@@ -43,7 +80,7 @@ async def get_notifications(
         }
         notifications.append(NotificationResponse(**notif_dict))
 
-    return notifications
+    return NotificationPage(items=notifications, next_cursor=next_cursor)
 
 
 @router.get("/unread/count")
@@ -51,17 +88,10 @@ async def get_unread_count(
     current_user: TokenData = Depends(get_current_user),
     session: AsyncSession = Depends(get_db),
 ):
-    """Get count of unread notifications."""
-    from sqlalchemy import func
-
-    result = await session.execute(
-        select(func.count(Notification.id)).where(
-            Notification.tenant_id == current_user.tenant_id,
-            Notification.to_user_id == current_user.user_id,
-            Notification.read == False,
-        )
+    """Get count of unread notifications (a Redis GET when cached)."""
+    count = await unread_counts.get_unread_count(
+        session, current_user.tenant_id, current_user.user_id
     )
-    count = result.scalar()
     return {"unread_count": count}
 
 
@@ -89,7 +119,16 @@ async def mark_notification_read(
             detail="Not authorized to modify this notification",
         )
 
-    notification.read = True
+    # Conditional update, so concurrent requests decrement the counter once
+    result = await session.execute(
+        update(Notification)
+        .where(Notification.id == notification_id, Notification.read == False)
+        .values(read=True)
+    )
     await session.commit()
+    if result.rowcount:
+        await unread_counts.decrement_unread(
+            current_user.tenant_id, current_user.user_id
+        )
 
     return {"status": "ok", "id": notification_id}
@@ -1,22 +1,34 @@
 """WebSocket endpoint for real-time updates."""
+import asyncio
 import json
 import logging
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query
-from redis import asyncio as aioredis
 
-from app.core.security import decode_access_token
-from app.services.redis_service import get_redis
+from app.core import metrics
+from app.core.config import get_settings
+from app.services.redis_service import parse_event_id, read_replay, user_channel
+from app.services.token_cache import get_token_cache
+from app.services.ws_hub import SendQueue, SendQueueOverflow, get_hub
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 router = APIRouter()
 
 
 @router.websocket("/ws/")
-async def websocket_endpoint(websocket: WebSocket, token: str = Query(...)):
-    """WebSocket endpoint for real-time message updates."""
+async def websocket_endpoint(
+    websocket: WebSocket,
+    token: str = Query(...),
+    last_event_id: str | None = Query(None),
+):
+    """WebSocket endpoint for real-time message updates.
+
+    Reconnecting clients pass the `event_id` of the last frame they saw as
+    `last_event_id` and receive the frames they missed before live ones.
+    """
     try:
         # Authenticate token
-        token_data = decode_access_token(token)
+        token_data = await get_token_cache().authenticate(token)
         if not token_data:
             logger.warning(f"Invalid token in WebSocket connection")
             await websocket.close(code=4001, reason="Invalid token")
@@ -31,17 +43,13 @@ async def websocket_endpoint(websocket: WebSocket, token: str = Query(...)):
         await websocket.close(code=4002, reason=str(e))
         return
 
-    redis = await get_redis()
-    pubsub = redis.pubsub()
-
-    # Subscribe to user's response channels
-    # We'll use a pattern to catch all sessions for this user
-    channel_pattern = f"response:{token_data.tenant_id}:{token_data.user_id}:*"
+    # All of the user's events (response frames of every chat session and
+    # notifications) arrive on one channel, shared through the process hub
+    hub = get_hub()
+    channel = user_channel(token_data.tenant_id, token_data.user_id)
+    queue = await hub.subscribe(channel)
 
     try:
-        await pubsub.psubscribe(channel_pattern)
-        logger.info(f"Subscribed to pattern {channel_pattern}")
-
         # Send initial connection success
         await websocket.send_json(
             {
@@ -51,17 +59,95 @@ async def websocket_endpoint(websocket: WebSocket, token: str = Query(...)):
             }
         )
 
-        # Listen for messages
-        async for message in pubsub.listen():
-            if message["type"] == "pmessage":
-                data = json.loads(message["data"])
-                await websocket.send_json(data)
-                logger.debug(f"Sent message to user {token_data.user_id}")
+        # Subscribed before reading the replay stream, so nothing published
+        # in between is lost; overlapping frames are skipped while forwarding
+        replayed_up_to = None
+        if last_event_id:
+            replayed_up_to = await _replay(websocket, token_data, last_event_id)
+
+        # Forward until either side goes away
+        forward = asyncio.create_task(_forward(websocket, queue, replayed_up_to))
+        receive = asyncio.create_task(_wait_for_disconnect(websocket))
+        done, pending = await asyncio.wait(
+            {forward, receive}, return_when=asyncio.FIRST_COMPLETED
+        )
+        for task in pending:
+            task.cancel()
+        for task in done:
+            task.result()
 
     except WebSocketDisconnect:
         logger.info(f"WebSocket disconnected for user {token_data.user_id}")
+    except SendQueueOverflow:
+        # The client reconnects and catches up from its replay stream
+        logger.warning(f"WebSocket too slow for user {token_data.user_id}, closing")
+        await websocket.close(code=1013, reason="Send queue overflow")
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
     finally:
-        await pubsub.punsubscribe(channel_pattern)
-        await pubsub.close()
+        await hub.unsubscribe(channel, queue)
+
+
+async def _replay(websocket: WebSocket, token_data, last_event_id: str):
+    """Send frames missed since `last_event_id`; returns the newest id sent.
+
+    If they can't be replayed (trimmed or expired), sends a "resync" frame
+    telling the client to reload its state over HTTP instead.
+    """
+    frames = await read_replay(token_data.tenant_id, token_data.user_id, last_event_id)
+    if frames is None:
+        metrics.incr("ws.resyncs")
+        await websocket.send_json({"type": "resync"})
+        return None
+
+    metrics.incr("ws.replayed", len(frames))
+    if frames:
+        await _send(websocket, [frame for _, frame in frames])
+    return parse_event_id(frames[-1][0] if frames else last_event_id)
+
+
+async def _forward(
+    websocket: WebSocket,
+    queue: SendQueue,
+    replayed_up_to: tuple[int, int] | None = None,
+):
+    """Send frames ("delta", "message", "error", "notification") as published.
+
+    Live frames up to `replayed_up_to` were already sent from the replay
+    stream and are dropped; checking stops at the first newer event.
+    """
+    window = settings.ws_batch_window_ms / 1000
+    while True:
+        frames = await queue.get_batch(window, settings.ws_batch_max_bytes)
+        if replayed_up_to is not None:
+            fresh = []
+            for frame in frames:
+                if replayed_up_to is not None:
+                    event_id = json.loads(frame).get("event_id")
+                    if event_id is not None:
+                        if parse_event_id(event_id) <= replayed_up_to:
+                            continue
+                        replayed_up_to = None
+                fresh.append(frame)
+            frames = fresh
+        if frames:
+            await _send(websocket, frames)
+
+
+async def _send(websocket: WebSocket, frames: list[str]):
+    """Send frames, several at once as a "batch" frame listing them in order."""
+    metrics.observe("ws.batch.frames", len(frames))
+    if len(frames) == 1:
+        await websocket.send_text(frames[0])
+    else:
+        # Frames are already JSON; splice them in rather than re-encoding
+        await websocket.send_text(
+            '{"type": "batch", "frames": [' + ", ".join(frames) + "]}"
+        )
+
+
+async def _wait_for_disconnect(websocket: WebSocket):
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
@@ -1,18 +1,29 @@
-from app.schemas.auth import Token, TokenData, LoginRequest
+from app.schemas.auth import Token, TokenData, LoginRequest, RefreshRequest
 from app.schemas.user import UserResponse, UserCreate
-from app.schemas.message import MessageCreate, MessageResponse
-from app.schemas.notification import NotificationResponse
+from app.schemas.message import MessageCreate, MessageResponse, MessagePage
+from app.schemas.notification import NotificationResponse, NotificationPage
 from app.schemas.action import ActionSchema, LLMResponse
+from app.schemas.knowledge import (
+    KnowledgeDocument,
+    KnowledgeIngestRequest,
+    KnowledgeIngestResponse,
+)
 
 __all__ = [
     "Token",
     "TokenData",
     "LoginRequest",
+    "RefreshRequest",
     "UserResponse",
     "UserCreate",
     "MessageCreate",
     "MessageResponse",
+    "MessagePage",
     "NotificationResponse",
+    "NotificationPage",
     "ActionSchema",
     "LLMResponse",
+    "KnowledgeDocument",
+    "KnowledgeIngestRequest",
+    "KnowledgeIngestResponse",
 ]
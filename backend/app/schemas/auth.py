@@ -3,6 +3,7 @@ from pydantic import BaseModel, EmailStr
 
 class Token(BaseModel):
     access_token: str
+    refresh_token: str
     token_type: str = "bearer"
 
 
@@ -14,8 +15,13 @@ class TokenData(BaseModel):
     role: str
     tenant_name: str
     tenant_type: str
+    exp: int | None = None
 
 
 class LoginRequest(BaseModel):
     email: EmailStr
     password: str
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
@@ -0,0 +1,18 @@
+from pydantic import BaseModel, Field
+
+
+class KnowledgeDocument(BaseModel):
+    content: str = Field(..., min_length=1)
+    category: str = Field(..., max_length=100)
+
+
+class KnowledgeIngestRequest(BaseModel):
+    documents: list[KnowledgeDocument] = Field(..., min_length=1)
+
+
+class KnowledgeIngestResponse(BaseModel):
+    chunks: int
+    inserted: int
+    duplicates: int
+    embedded: int
+    cache_hits: int
@@ -18,3 +18,10 @@ class MessageResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class MessagePage(BaseModel):
+    """Messages in chronological order plus the cursor of the next page."""
+
+    items: list[MessageResponse]
+    next_cursor: str | None = None
@@ -14,3 +14,10 @@ class NotificationResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class NotificationPage(BaseModel):
+    """Notifications newest first plus the cursor of the next page."""
+
+    items: list[NotificationResponse]
+    next_cursor: str | None = None
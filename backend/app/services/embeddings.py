@@ -0,0 +1,85 @@
+"""Text embedding providers for knowledge retrieval."""
+import hashlib
+import logging
+import math
+import re
+from abc import ABC, abstractmethod
+from functools import lru_cache
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+class Embedder(ABC):
+    """Turns text into vectors of a fixed dimension."""
+
+    dimensions: int
+
+    @abstractmethod
+    async def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        ...
+
+    async def embed_query(self, text: str) -> list[float]:
+        return (await self.embed_documents([text]))[0]
+
+
+class GeminiEmbedder(Embedder):
+    """Embeddings from the Gemini embedding API."""
+
+    def __init__(self, model: str, dimensions: int):
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+        self.dimensions = dimensions
+        self.client = GoogleGenerativeAIEmbeddings(
+            model=model, google_api_key=settings.google_api_key
+        )
+
+    async def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return await self.client.aembed_documents(texts)
+
+    async def embed_query(self, text: str) -> list[float]:
+        return await self.client.aembed_query(text)
+
+
+class LocalEmbedder(Embedder):
+    """Deterministic feature-hashing embedder that needs no network access.
+
+    Words and word bigrams are hashed into signed buckets and the result is
+    L2-normalised, so texts sharing vocabulary end up close in cosine space.
+    Good enough for offline tests and load runs, not for real relevance.
+    """
+
+    def __init__(self, dimensions: int):
+        self.dimensions = dimensions
+
+    async def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed(text) for text in texts]
+
+    def _embed(self, text: str) -> list[float]:
+        vector = [0.0] * self.dimensions
+        tokens = _TOKEN_RE.findall(text.lower())
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        for feature in features:
+            digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            sign = 1.0 if value & 1 else -1.0
+            vector[(value >> 1) % self.dimensions] += sign
+
+        norm = math.sqrt(sum(v * v for v in vector))
+        if norm:
+            vector = [v / norm for v in vector]
+        return vector
+
+
+@lru_cache()
+def get_embedder() -> Embedder:
+    """Return the process-wide embedder selected by EMBEDDING_PROVIDER."""
+    if settings.embedding_provider == "local":
+        return LocalEmbedder(settings.embedding_dimensions)
+    if settings.embedding_provider == "gemini":
+        return GeminiEmbedder(settings.embedding_model, settings.embedding_dimensions)
+    raise ValueError(f"Unknown embedding provider: {settings.embedding_provider}")
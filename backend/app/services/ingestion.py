@@ -0,0 +1,207 @@
+"""Knowledge ingestion: chunking, deduplication, embedding and bulk insert."""
+import base64
+import logging
+import re
+from array import array
+from dataclasses import dataclass
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.models import TenantKnowledge
+from app.models.tenant_knowledge import knowledge_content_hash
+from app.services.embeddings import Embedder, get_embedder
+from app.services.redis_service import get_redis, publish_tenant_invalidation
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+@dataclass
+class IngestResult:
+    chunks: int = 0
+    inserted: int = 0
+    duplicates: int = 0
+    embedded: int = 0
+    cache_hits: int = 0
+
+
+def chunk_text(text: str, max_chars: int, overlap: int = 0) -> list[str]:
+    """Split text into chunks of at most max_chars, on paragraph/sentence breaks.
+
+    Consecutive chunks share up to `overlap` trailing characters of the
+    previous chunk so facts spanning a boundary stay retrievable.
+    """
+    pieces: list[str] = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = " ".join(paragraph.split())
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        for sentence in _SENTENCE_RE.split(paragraph):
+            # Hard-split sentences that are longer than a chunk on their own
+            while len(sentence) > max_chars:
+                pieces.append(sentence[:max_chars])
+                sentence = sentence[max_chars:]
+            if sentence:
+                pieces.append(sentence)
+
+    chunks: list[str] = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + 1 + len(piece) > max_chars:
+            chunks.append(current)
+            tail = current[-overlap:] if overlap else ""
+            if " " in tail:
+                tail = tail.split(" ", 1)[1]  # start the overlap on a word
+            current = f"{tail} {piece}".strip() if tail else piece
+            if len(current) > max_chars:
+                current = piece
+        else:
+            current = f"{current} {piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class EmbeddingCache:
+    """Redis cache of embeddings keyed by model and content hash."""
+
+    def __init__(self, namespace: str, ttl_seconds: int):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+
+    def _key(self, content_hash: str) -> str:
+        return f"embedding:{self.namespace}:{content_hash}"
+
+    async def get_many(self, hashes: list[str]) -> dict[str, list[float]]:
+        if not hashes:
+            return {}
+        redis = await get_redis()
+        values = await redis.mget([self._key(h) for h in hashes])
+        return {
+            h: array("f", base64.b64decode(value)).tolist()
+            for h, value in zip(hashes, values)
+            if value is not None
+        }
+
+    async def set_many(self, vectors: dict[str, list[float]]):
+        if not vectors:
+            return
+        redis = await get_redis()
+        async with redis.pipeline(transaction=False) as pipe:
+            for h, vector in vectors.items():
+                encoded = base64.b64encode(array("f", vector).tobytes()).decode()
+                pipe.set(self._key(h), encoded, ex=self.ttl_seconds)
+            await pipe.execute()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    namespace = f"{settings.embedding_provider}:{settings.embedding_model}"
+    return EmbeddingCache(namespace, settings.embedding_cache_ttl_seconds)
+
+
+async def embed_with_cache(
+    hashed_texts: dict[str, str],
+    embedder: Embedder,
+    cache: EmbeddingCache,
+    result: IngestResult,
+) -> dict[str, list[float]]:
+    """Embed texts keyed by content hash, calling the embedder only on misses."""
+    vectors = await cache.get_many(list(hashed_texts))
+    result.cache_hits += len(vectors)
+
+    missing = [h for h in hashed_texts if h not in vectors]
+    batch_size = settings.embedding_batch_size
+    for start in range(0, len(missing), batch_size):
+        batch = missing[start : start + batch_size]
+        embedded = await embedder.embed_documents([hashed_texts[h] for h in batch])
+        fresh = dict(zip(batch, embedded))
+        await cache.set_many(fresh)
+        vectors.update(fresh)
+        result.embedded += len(batch)
+    return vectors
+
+
+async def ingest_documents(
+    session: AsyncSession,
+    tenant_id: int,
+    documents: list[tuple[str, str]],
+    embedder: Embedder | None = None,
+    cache: EmbeddingCache | None = None,
+) -> IngestResult:
+    """Chunk, dedupe, embed and insert (content, category) documents.
+
+    Commits its own transaction. The existing-hash lookup is finished before
+    embedding starts, so no connection is held during embedding calls.
+    """
+    embedder = embedder or get_embedder()
+    cache = cache or get_embedding_cache()
+    result = IngestResult()
+
+    # Chunk and dedupe within the request
+    chunks: dict[str, tuple[str, str]] = {}
+    for content, category in documents:
+        for chunk in chunk_text(
+            content, settings.knowledge_chunk_size, settings.knowledge_chunk_overlap
+        ):
+            result.chunks += 1
+            chunks.setdefault(knowledge_content_hash(chunk), (chunk, category))
+
+    # Dedupe against what the tenant already has
+    existing = set()
+    if chunks:
+        existing_result = await session.execute(
+            select(TenantKnowledge.content_hash).where(
+                TenantKnowledge.tenant_id == tenant_id,
+                TenantKnowledge.content_hash.in_(list(chunks)),
+            )
+        )
+        existing = set(existing_result.scalars().all())
+        await session.rollback()
+    new_chunks = {h: chunk for h, chunk in chunks.items() if h not in existing}
+    result.duplicates = result.chunks - len(new_chunks)
+    if not new_chunks:
+        return result
+
+    vectors = await embed_with_cache(
+        {h: content for h, (content, _) in new_chunks.items()}, embedder, cache, result
+    )
+
+    # One executemany round; concurrent ingests of the same chunk are no-ops
+    rows = [
+        {
+            "tenant_id": tenant_id,
+            "content": content,
+            "category": category,
+            "content_hash": h,
+            "embedding": vectors[h],
+        }
+        for h, (content, category) in new_chunks.items()
+    ]
+    # RETURNING only yields rows that were written, not those skipped on
+    # conflict, so chunks ingested concurrently aren't counted twice
+    inserted = await session.execute(
+        insert(TenantKnowledge)
+        .on_conflict_do_nothing(index_elements=["tenant_id", "content_hash"])
+        .returning(TenantKnowledge.id),
+        rows,
+    )
+    result.inserted = len(inserted.scalars().all())
+    result.duplicates += len(rows) - result.inserted
+    await session.commit()
+    if result.inserted:
+        await publish_tenant_invalidation(tenant_id)
+
+    logger.info(
+        f"Ingested knowledge for tenant {tenant_id}: {result.inserted} new chunks, "
+        f"{result.duplicates} duplicates, {result.embedded} embedded, "
+        f"{result.cache_hits} cache hits"
+    )
+    return result
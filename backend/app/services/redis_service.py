@@ -1,12 +1,25 @@
 """Redis service for message queue operations."""
 import json
 import logging
+import time
 from redis import asyncio as aioredis
 from app.core.config import get_settings
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Set of all tenant ids, used by workers to discover streams on startup
+TENANT_REGISTRY_KEY = "tenants:registry"
+# Sorted set of tenant id -> time of last enqueue, polled by workers
+STREAM_ACTIVITY_KEY = "streams:activity"
+# Set of consumer names of running workers, added by their heartbeats
+WORKER_REGISTRY_KEY = "workers:registry"
+# Per-worker metrics snapshot, written by the heartbeat
+WORKER_METRICS_KEY_PREFIX = "metrics:worker:"
+
+# Pub/sub channel carrying ids of tenants whose data changed
+TENANT_INVALIDATION_CHANNEL = "tenants:invalidate"
+
 # Global Redis connection
 _redis_client: aioredis.Redis | None = None
 
@@ -48,13 +61,119 @@ async def enqueue_message(
         "user_info": json.dumps(user_info),
     }
 
-    message_id = await redis.xadd(stream_key, message_data)
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.xadd(stream_key, message_data)
+        # Signal activity so workers start (or keep) polling this stream
+        pipe.zadd(STREAM_ACTIVITY_KEY, {str(tenant_id): time.time()})
+        message_id, _ = await pipe.execute()
     logger.info(f"Enqueued message {message_id} to stream {stream_key}")
     return message_id
 
 
+async def register_tenant(tenant_id: int):
+    """Announce a new tenant so running workers pick up its stream."""
+    redis = await get_redis()
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.sadd(TENANT_REGISTRY_KEY, str(tenant_id))
+        pipe.zadd(STREAM_ACTIVITY_KEY, {str(tenant_id): time.time()})
+        await pipe.execute()
+    logger.info(f"Registered tenant {tenant_id}")
+
+
+async def publish_tenant_invalidation(tenant_id: int):
+    """Tell workers that a tenant's users or knowledge changed."""
+    redis = await get_redis()
+    await redis.publish(TENANT_INVALIDATION_CHANNEL, str(tenant_id))
+    logger.info(f"Published invalidation for tenant {tenant_id}")
+
+
+def user_channel(tenant_id: int, user_id: int) -> str:
+    """Pub/sub channel carrying every WebSocket event for one user.
+
+    Response frames of all chat sessions and notifications share it; frames
+    carry their session_id where relevant.
+    """
+    return f"events:{tenant_id}:{user_id}"
+
+
+def replay_key(tenant_id: int, user_id: int) -> str:
+    """Capped stream of the user's recent frames, replayed on reconnect."""
+    return f"replay:{tenant_id}:{user_id}"
+
+
 async def publish_response(channel: str, data: dict):
-    """Publish response to Redis pub/sub channel."""
+    """Publish response to Redis pub/sub channel.
+
+    Fire-and-forget: used for frames that are useless once missed, like
+    streaming deltas (the final message supersedes them).
+    """
     redis = await get_redis()
     await redis.publish(channel, json.dumps(data))
     logger.debug(f"Published response to channel {channel}")
+
+
+async def publish_event(tenant_id: int, user_id: int, data: dict) -> str:
+    """Record a frame in the user's replay stream, then publish it.
+
+    The published frame carries the stream entry id as `event_id`, which
+    clients send back as `last_event_id` when they reconnect.
+    """
+    redis = await get_redis()
+    key = replay_key(tenant_id, user_id)
+    event_id = await redis.xadd(
+        key,
+        {"frame": json.dumps(data)},
+        maxlen=settings.ws_replay_max_events,
+        approximate=True,
+    )
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.expire(key, settings.ws_replay_ttl_seconds)
+        pipe.publish(
+            user_channel(tenant_id, user_id),
+            json.dumps({**data, "event_id": event_id}),
+        )
+        await pipe.execute()
+    logger.debug(f"Published event {event_id} to {key}")
+    return event_id
+
+
+def parse_event_id(event_id: str) -> tuple[int, int] | None:
+    """Stream entry id as a comparable tuple, or None if malformed."""
+    ms, _, seq = event_id.partition("-")
+    if not (ms.isdigit() and seq.isdigit()):
+        return None
+    return int(ms), int(seq)
+
+
+async def read_replay(
+    tenant_id: int, user_id: int, last_event_id: str
+) -> list[tuple[str, str]] | None:
+    """Frames published after `last_event_id`, as (event_id, frame JSON).
+
+    Returns None when the missed frames can't all be replayed: the id is
+    malformed, the stream expired, or entries after it were trimmed. The
+    client then has to reload its state instead.
+    """
+    last = parse_event_id(last_event_id)
+    if last is None:
+        return None
+
+    redis = await get_redis()
+    key = replay_key(tenant_id, user_id)
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.exists(key)
+        # Redis 7 tracks the newest entry removed by MAXLEN trimming
+        pipe.xinfo_stream(key)
+        pipe.xrange(key, min=f"({last_event_id}", max="+")
+        exists, info, entries = await pipe.execute(raise_on_error=False)
+    if not exists or isinstance(info, Exception) or isinstance(entries, Exception):
+        return None
+    trimmed = parse_event_id(info.get("max-deleted-entry-id") or "0-0")
+    if trimmed is not None and trimmed > last:
+        return None
+
+    frames = []
+    for event_id, fields in entries:
+        frame = json.loads(fields["frame"])
+        frames.append((event_id, json.dumps({**frame, "event_id": event_id})))
+    return frames
@@ -0,0 +1,80 @@
+"""Vector similarity search over tenant knowledge."""
+import logging
+from sqlalchemy import select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.database import async_session_maker
+from app.models import TenantKnowledge
+from app.services.embeddings import Embedder
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_ITERATIVE_SCAN_MODES = {"off", "strict_order", "relaxed_order"}
+
+
+async def search_knowledge(
+    session: AsyncSession, tenant_id: int, embedding: list[float], k: int
+) -> list[str]:
+    """Return the k knowledge chunks closest to the embedding (cosine)."""
+    mode = settings.knowledge_hnsw_iterative_scan
+    if mode:
+        if mode not in _ITERATIVE_SCAN_MODES:
+            raise ValueError(f"Invalid hnsw.iterative_scan mode: {mode}")
+        # The HNSW index is shared by all tenants; iterative scans keep
+        # searching until k rows pass the tenant filter (pgvector >= 0.8).
+        await session.execute(text(f"SET LOCAL hnsw.iterative_scan = {mode}"))
+
+    result = await session.execute(
+        select(TenantKnowledge.content)
+        .where(
+            TenantKnowledge.tenant_id == tenant_id,
+            TenantKnowledge.embedding.is_not(None),
+        )
+        .order_by(TenantKnowledge.embedding.cosine_distance(embedding))
+        .limit(k)
+    )
+    return list(result.scalars().all())
+
+
+async def backfill_embeddings(
+    tenant_id: int, embedder: Embedder, batch_size: int = 256
+) -> int:
+    """Embed a tenant's knowledge rows that have no embedding yet.
+
+    Each batch is read and written in its own short session, so no pooled
+    connection is held while the embedder is called. Returns rows updated.
+    """
+    total = 0
+    while True:
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(TenantKnowledge.id, TenantKnowledge.content)
+                .where(
+                    TenantKnowledge.tenant_id == tenant_id,
+                    TenantKnowledge.embedding.is_(None),
+                )
+                .limit(batch_size)
+            )
+            rows = result.all()
+        if not rows:
+            break
+
+        vectors = await embedder.embed_documents([content for _, content in rows])
+        async with async_session_maker() as session:
+            await session.execute(
+                update(TenantKnowledge),
+                [
+                    {"id": row_id, "embedding": vector}
+                    for (row_id, _), vector in zip(rows, vectors)
+                ],
+            )
+            await session.commit()
+        total += len(rows)
+        if len(rows) < batch_size:
+            break
+
+    if total:
+        logger.info(f"Backfilled {total} knowledge embeddings for tenant {tenant_id}")
+    return total
@@ -0,0 +1,158 @@
+"""Weighted fair scheduling of queued messages across tenants."""
+import asyncio
+from collections import deque
+from typing import Any
+
+
+class FairScheduler:
+    """Deficit round-robin over per-tenant FIFO queues.
+
+    Every time a tenant's turn comes up its weight is added to its deficit, and
+    each dispatched message costs one unit, so a tenant with weight 2 gets
+    twice the share of a tenant with weight 1 while both are backlogged.
+    Tenants at their in-flight cap are skipped until one of their messages
+    finishes, which keeps a bursting tenant from occupying the whole worker.
+
+    Items may belong to a session. Only one item per session is handed out
+    at a time, and a session's items keep their queue order: later ones are
+    passed over (not blocked on) until the running one is done, so a user
+    sending several messages quickly never ties up the tenant's other slots.
+    """
+
+    def __init__(
+        self,
+        default_weight: float = 1.0,
+        weights: dict[str, float] | None = None,
+        default_max_in_flight: int = 4,
+        max_in_flight: dict[str, int] | None = None,
+    ):
+        for weight in [default_weight, *(weights or {}).values()]:
+            if weight <= 0:
+                raise ValueError(f"Tenant weights must be positive, got {weight}")
+        self.default_weight = default_weight
+        self.weights = weights or {}
+        self.default_max_in_flight = default_max_in_flight
+        self.max_in_flight = max_in_flight or {}
+
+        # Per tenant: (session, item) pairs in arrival order
+        self._queues: dict[str, deque[tuple[str | None, Any]]] = {}
+        self._deficit: dict[str, float] = {}
+        self._in_flight: dict[str, int] = {}
+        # Sessions with an item handed out and not yet done
+        self._busy_sessions: set[str] = set()
+        # Round-robin order of tenants that have queued items
+        self._active: deque[str] = deque()
+        self._changed = asyncio.Event()
+        self._closed = False
+
+    def put(
+        self, tenant: str, item: Any, session: str | None = None, front: bool = False
+    ):
+        """Queue an item for a tenant, at the back or (front=True) the front."""
+        queue = self._queues.setdefault(tenant, deque())
+        if not queue:
+            self._active.append(tenant)
+            self._deficit[tenant] = 0.0
+        if front:
+            queue.appendleft((session, item))
+        else:
+            queue.append((session, item))
+        self._changed.set()
+
+    async def get(self) -> Any | None:
+        """Wait for the next item to run; None once closed and drained."""
+        while True:
+            item = self._next()
+            if item is not None:
+                return item
+            if self._closed and not self.queued():
+                return None
+            self._changed.clear()
+            await self._changed.wait()
+
+    def done(self, tenant: str, session: str | None = None):
+        """Mark an item previously returned by get() as finished."""
+        self._in_flight[tenant] -= 1
+        if not self._in_flight[tenant]:
+            del self._in_flight[tenant]
+        self._busy_sessions.discard(session)
+        self._changed.set()
+
+    def retry_later(self, tenant: str, session: str | None, item: Any, delay: float):
+        """Hand back an item's in-flight slot and queue it again after delay.
+
+        The session stays busy in the meantime and the item returns to the
+        front, so none of its session's later items can overtake it.
+        """
+        self._in_flight[tenant] -= 1
+        if not self._in_flight[tenant]:
+            del self._in_flight[tenant]
+        self._changed.set()
+        asyncio.get_running_loop().call_later(
+            delay, self._requeue, tenant, session, item
+        )
+
+    def _requeue(self, tenant: str, session: str | None, item: Any):
+        self._busy_sessions.discard(session)
+        self.put(tenant, item, session=session, front=True)
+
+    def close(self):
+        """Make get() return None once no items are left."""
+        self._closed = True
+        self._changed.set()
+
+    def queued(self, tenant: str | None = None) -> int:
+        """Number of items waiting, for one tenant or in total."""
+        if tenant is not None:
+            return len(self._queues.get(tenant, ()))
+        return sum(len(queue) for queue in self._queues.values())
+
+    def in_flight(self, tenant: str) -> int:
+        return self._in_flight.get(tenant, 0)
+
+    def _runnable(self, tenant: str) -> int | None:
+        """Queue position of the tenant's next runnable item, if it may run."""
+        limit = self.max_in_flight.get(tenant, self.default_max_in_flight)
+        if self.in_flight(tenant) >= limit:
+            return None
+        for index, (session, _) in enumerate(self._queues[tenant]):
+            if session is None or session not in self._busy_sessions:
+                return index
+        return None
+
+    def _next(self) -> Any | None:
+        if all(self._runnable(tenant) is None for tenant in self._active):
+            return None
+        # Keep cycling until a runnable tenant has a full unit of credit;
+        # weights are positive, so fractional ones get there within
+        # ceil(1 / weight) passes
+        while True:
+            tenant = self._active[0]
+            index = self._runnable(tenant)
+            if index is None:
+                self._active.rotate(-1)
+                continue
+
+            if self._deficit[tenant] < 1:
+                self._deficit[tenant] += self.weights.get(tenant, self.default_weight)
+            if self._deficit[tenant] < 1:
+                # Fractional weights accumulate over several rounds
+                self._active.rotate(-1)
+                continue
+
+            queue = self._queues[tenant]
+            session, item = queue[index]
+            del queue[index]
+            self._deficit[tenant] -= 1
+            self._in_flight[tenant] = self.in_flight(tenant) + 1
+            if session is not None:
+                self._busy_sessions.add(session)
+
+            if not queue:
+                # Idle tenants don't bank credit for later bursts
+                self._active.popleft()
+                del self._queues[tenant]
+                del self._deficit[tenant]
+            elif self._deficit[tenant] < 1:
+                self._active.rotate(-1)
+            return item
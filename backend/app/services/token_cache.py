@@ -0,0 +1,207 @@
+"""Per-process cache of verified access tokens, with Redis-backed revocation.
+
+Entries are keyed by a SHA-256 digest of the token, so raw tokens are never
+held, and expire at the token's exp or after token_cache_ttl_seconds,
+whichever comes first. A hit is a dictionary lookup; a miss verifies the
+JWT and checks the revocation list in Redis.
+
+Revoking an access token stores `revoked:{digest}` until the token expires
+and broadcasts the digest, so every process evicts it from its cache at once.
+Refresh tokens are never cached, so using one up only needs the Redis marker.
+"""
+import asyncio
+import hashlib
+import heapq
+import logging
+import time
+from collections import OrderedDict
+
+from app.core import metrics
+from app.core.config import get_settings
+from app.core.security import decode_access_token, token_expiry
+from app.schemas.auth import TokenData
+from app.services.redis_service import get_redis
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+REVOKED_KEY_PREFIX = "revoked:"
+REVOKED_FAMILY_KEY_PREFIX = "revoked:family:"
+# Pub/sub channel carrying digests of revoked tokens
+TOKEN_REVOCATION_CHANNEL = "tokens:revoked"
+
+
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def revoked_key(digest: str) -> str:
+    return f"{REVOKED_KEY_PREFIX}{digest}"
+
+
+async def is_token_revoked(token: str) -> bool:
+    redis = await get_redis()
+    return bool(await redis.exists(revoked_key(token_digest(token))))
+
+
+async def _mark_revoked(token: str) -> tuple[str, int] | None:
+    """Store the revocation marker; (digest, exp) unless already revoked.
+
+    The check and the revocation are one atomic SET NX, so of several
+    concurrent calls for the same token exactly one succeeds.
+    """
+    exp = token_expiry(token)
+    ttl = int(exp - time.time()) if exp is not None else 0
+    if ttl <= 0:
+        return None
+    digest = token_digest(token)
+    redis = await get_redis()
+    if not await redis.set(revoked_key(digest), "1", nx=True, ex=ttl):
+        return None
+    return digest, exp
+
+
+async def use_refresh_token(token: str) -> bool:
+    """Mark a verified refresh token as used; False if it already was.
+
+    Only the Redis marker is written: refresh tokens never enter the token
+    cache, so there is nothing for other processes to evict.
+    """
+    return await _mark_revoked(token) is not None
+
+
+async def revoke_token(token: str) -> bool:
+    """Reject a verified access token everywhere until it expires.
+
+    Returns False if it was already revoked (or expired).
+    """
+    revoked = await _mark_revoked(token)
+    if revoked is None:
+        return False
+    digest, exp = revoked
+    redis = await get_redis()
+    await redis.publish(TOKEN_REVOCATION_CHANNEL, f"{digest}:{exp}")
+    # Other processes evict on the broadcast; this one right away
+    get_token_cache().evict(digest, exp)
+    logger.info(f"Revoked token {digest[:12]}")
+    return True
+
+
+async def revoke_token_family(family: str):
+    """Revoke every refresh token rotated from the same login."""
+    redis = await get_redis()
+    await redis.set(
+        f"{REVOKED_FAMILY_KEY_PREFIX}{family}",
+        "1",
+        ex=settings.jwt_refresh_token_expire_days * 24 * 3600,
+    )
+    logger.info(f"Revoked refresh token family {family[:12]}")
+
+
+async def is_token_family_revoked(family: str) -> bool:
+    redis = await get_redis()
+    return bool(await redis.exists(f"{REVOKED_FAMILY_KEY_PREFIX}{family}"))
+
+
+class TokenCache:
+    def __init__(self):
+        # digest -> (token data, time the entry expires)
+        self._entries: OrderedDict[str, tuple[TokenData, float]] = OrderedDict()
+        # Digests revoked while this process runs -> token exp. Keeps a
+        # verification that raced with the broadcast from caching the token.
+        self._revoked: dict[str, float] = {}
+        # (exp, digest) of the entries above, to prune them as they expire
+        self._revoked_expiry: list[tuple[float, str]] = []
+        self._pubsub = None
+        self._listener: asyncio.Task | None = None
+
+    async def start(self):
+        redis = await get_redis()
+        self._pubsub = redis.pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(TOKEN_REVOCATION_CHANNEL)
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+        if self._pubsub:
+            await self._pubsub.close()
+        self.clear()
+
+    async def authenticate(self, token: str) -> TokenData | None:
+        """TokenData of a valid, unrevoked access token, else None."""
+        digest = token_digest(token)
+        now = time.time()
+        entry = self._entries.get(digest)
+        if entry is not None:
+            token_data, expires_at = entry
+            if now < expires_at:
+                self._entries.move_to_end(digest)
+                metrics.incr("auth.token_cache.hits")
+                return token_data
+            del self._entries[digest]
+
+        metrics.incr("auth.token_cache.misses")
+        token_data = decode_access_token(token)
+        if token_data is None:
+            return None
+        if digest in self._revoked or await is_token_revoked(token):
+            metrics.incr("auth.token_cache.revoked")
+            return None
+
+        expires_at = now + settings.token_cache_ttl_seconds
+        if token_data.exp is not None:
+            expires_at = min(expires_at, token_data.exp)
+        if digest not in self._revoked:
+            self._entries[digest] = (token_data, expires_at)
+            while len(self._entries) > settings.token_cache_max_size:
+                self._entries.popitem(last=False)
+            metrics.set_gauge("auth.token_cache.size", len(self._entries))
+        return token_data
+
+    def evict(self, digest: str, exp: float):
+        self._entries.pop(digest, None)
+        now = time.time()
+        while self._revoked_expiry and self._revoked_expiry[0][0] <= now:
+            _, expired = heapq.heappop(self._revoked_expiry)
+            if self._revoked.get(expired, now) <= now:
+                self._revoked.pop(expired, None)
+        if exp > now:
+            self._revoked[digest] = exp
+            heapq.heappush(self._revoked_expiry, (exp, digest))
+
+    def clear(self):
+        self._entries.clear()
+        self._revoked.clear()
+        self._revoked_expiry.clear()
+
+    async def _listen(self):
+        while True:
+            try:
+                message = await self._pubsub.get_message(timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # redis-py reconnects and resubscribes on the next read
+                logger.error(f"Token revocation listener failed: {e}")
+                await asyncio.sleep(1)
+                continue
+            if message is None or message["type"] != "message":
+                continue
+            digest, _, exp = message["data"].partition(":")
+            self.evict(digest, float(exp or 0))
+
+
+_token_cache: TokenCache | None = None
+
+
+def get_token_cache() -> TokenCache:
+    """Return this process's token cache (started in the app lifespan)."""
+    global _token_cache
+    if _token_cache is None:
+        _token_cache = TokenCache()
+    return _token_cache
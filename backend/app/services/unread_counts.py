@@ -0,0 +1,170 @@
+"""Unread notification counters cached in Redis.
+
+Each (tenant, user) has a counter at `unread:{tenant_id}:{user_id}`. It is
+filled from Postgres on a miss, then adjusted atomically: incremented after
+the worker commits new notifications and decremented when one is marked
+read. Adjustments only apply to existing counters, so a missing counter is
+never initialised from a partial delta. A periodic reconciliation (run by
+the worker) resets existing counters to the database count to fix drift;
+it finds them in the `unread:registry` set, which every fill adds to.
+"""
+import logging
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import metrics
+from app.core.config import get_settings
+from app.models import Notification
+from app.services.redis_service import get_redis
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+UNREAD_KEY_PREFIX = "unread:"
+RECONCILE_LOCK_KEY = "unread:reconcile:lock"
+# Set of cached counter keys, so reconciliation never scans the keyspace
+UNREAD_REGISTRY_KEY = "unread:registry"
+
+_INCR_IF_EXISTS = """
+if redis.call("EXISTS", KEYS[1]) == 1 then
+    return redis.call("INCRBY", KEYS[1], ARGV[1])
+end
+return nil
+"""
+
+_DECR_IF_POSITIVE = """
+local value = tonumber(redis.call("GET", KEYS[1]))
+if value and value > 0 then
+    return redis.call("DECR", KEYS[1])
+end
+return value
+"""
+
+
+def unread_key(tenant_id: int, user_id: int) -> str:
+    return f"{UNREAD_KEY_PREFIX}{tenant_id}:{user_id}"
+
+
+async def get_unread_count(session: AsyncSession, tenant_id: int, user_id: int) -> int:
+    """Unread count from Redis, falling back to (and caching) the DB count."""
+    redis = await get_redis()
+    cached = await redis.get(unread_key(tenant_id, user_id))
+    if cached is not None:
+        metrics.incr("unread_count.hits")
+        return int(cached)
+
+    metrics.incr("unread_count.misses")
+    count = await count_unread(session, tenant_id, user_id)
+    key = unread_key(tenant_id, user_id)
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.set(key, count, ex=settings.unread_count_ttl_seconds)
+        pipe.sadd(UNREAD_REGISTRY_KEY, key)
+        await pipe.execute()
+    return count
+
+
+async def count_unread(session: AsyncSession, tenant_id: int, user_id: int) -> int:
+    result = await session.execute(unread_count_query(tenant_id, user_id))
+    return result.scalar()
+
+
+def unread_count_query(tenant_id: int, user_id: int):
+    # count(*) lets Postgres answer from ix_notifications_unread alone
+    return (
+        select(func.count())
+        .select_from(Notification)
+        .where(
+            Notification.tenant_id == tenant_id,
+            Notification.to_user_id == user_id,
+            Notification.read == False,
+        )
+    )
+
+
+async def increment_unread(tenant_id: int, user_ids: list[int]):
+    """Count newly committed notifications for their recipients."""
+    if not user_ids:
+        return
+    per_user: dict[int, int] = {}
+    for user_id in user_ids:
+        per_user[user_id] = per_user.get(user_id, 0) + 1
+    redis = await get_redis()
+    async with redis.pipeline(transaction=False) as pipe:
+        for user_id, amount in per_user.items():
+            pipe.eval(_INCR_IF_EXISTS, 1, unread_key(tenant_id, user_id), amount)
+        await pipe.execute()
+
+
+async def decrement_unread(tenant_id: int, user_id: int):
+    """Count one notification as read."""
+    redis = await get_redis()
+    await redis.eval(_DECR_IF_POSITIVE, 1, unread_key(tenant_id, user_id))
+
+
+async def reconcile_unread_counts(session: AsyncSession, batch_size: int = 500) -> int:
+    """Reset every cached counter to the database count; returns how many.
+
+    A short Redis lock makes sure only one worker reconciles at a time.
+    """
+    redis = await get_redis()
+    locked = await redis.set(
+        RECONCILE_LOCK_KEY,
+        "1",
+        nx=True,
+        ex=settings.unread_reconcile_interval_seconds,
+    )
+    if not locked:
+        return 0
+
+    corrected = 0
+    keys: list[str] = []
+    async for key in redis.sscan_iter(UNREAD_REGISTRY_KEY, count=batch_size):
+        keys.append(key)
+        if len(keys) >= batch_size:
+            corrected += await _reconcile_batch(session, keys)
+            keys = []
+    if keys:
+        corrected += await _reconcile_batch(session, keys)
+    metrics.incr("unread_count.reconciled", corrected)
+    return corrected
+
+
+async def _reconcile_batch(session: AsyncSession, keys: list[str]) -> int:
+    pairs = []
+    for key in keys:
+        tenant_id, user_id = key[len(UNREAD_KEY_PREFIX) :].split(":")
+        pairs.append((int(tenant_id), int(user_id)))
+
+    result = await session.execute(
+        select(Notification.tenant_id, Notification.to_user_id, func.count())
+        .where(
+            Notification.read == False,
+            Notification.tenant_id.in_({t for t, _ in pairs}),
+            Notification.to_user_id.in_({u for _, u in pairs}),
+        )
+        .group_by(Notification.tenant_id, Notification.to_user_id)
+    )
+    counts = {(t, u): count for t, u, count in result.all()}
+    await session.rollback()
+
+    redis = await get_redis()
+    cached = await redis.mget(keys)
+    corrected = 0
+    expired = []
+    async with redis.pipeline(transaction=False) as pipe:
+        for key, pair, value in zip(keys, pairs, cached):
+            actual = counts.get(pair, 0)
+            if value is None:
+                expired.append(key)
+            elif int(value) != actual:
+                # Keep the key's expiry; vanished keys are simply skipped
+                pipe.set(key, actual, xx=True, keepttl=True)
+                corrected += 1
+        if expired:
+            # The next fill registers them again
+            pipe.srem(UNREAD_REGISTRY_KEY, *expired)
+        await pipe.execute()
+    if corrected:
+        logger.info(f"Corrected {corrected} drifted unread counters")
+    return corrected
@@ -2,78 +2,167 @@
 import asyncio
 import json
 import logging
+import os
 import signal
+import socket
+import time
+import uuid
 from redis import asyncio as aioredis
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core import metrics
 from app.core.config import get_settings
-from app.core.database import async_session_maker
-from app.services.redis_service import get_redis, publish_response
-from app.agents.registry import get_or_create_agent
-from app.models import Message, Tenant
+from app.core.database import async_session_maker, record_pool_metrics
+from app.services.scheduler import FairScheduler
+from app.services.unread_counts import increment_unread, reconcile_unread_counts
+from app.services.redis_service import (
+    STREAM_ACTIVITY_KEY,
+    TENANT_INVALIDATION_CHANNEL,
+    TENANT_REGISTRY_KEY,
+    WORKER_METRICS_KEY_PREFIX,
+    WORKER_REGISTRY_KEY,
+    get_redis,
+    publish_event,
+    publish_response,
+    user_channel,
+)
+from app.agents.registry import (
+    get_or_create_agent,
+    invalidate_agent,
+    refresh_stale_agents,
+)
+from app.models import Message, Notification, Tenant
+from app.schemas.notification import NotificationResponse
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
 CONSUMER_GROUP = "message_workers"
-CONSUMER_NAME = "worker_1"
+HEARTBEAT_KEY_PREFIX = "workers:heartbeat:"
+SESSION_LOCK_KEY_PREFIX = "workers:session-lock:"
+# Side effects of a stream message that already ran: {stream}:{id}:{step}
+PROCESSED_KEY_PREFIX = "workers:processed:"
+
+_RELEASE_IF_OWNER = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+_EXTEND_IF_OWNER = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("EXPIRE", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+def _tenant_key(stream_key: str) -> str:
+    """Tenant id part of a messages:{tenant_id} stream key."""
+    return stream_key.split(":", 1)[1]
+
+
+def _session_key(stream_key: str, message_data: dict) -> str:
+    """Identifies one conversation: tenant stream, user and chat session."""
+    return (
+        f"{stream_key}:{message_data.get('user_id')}:"
+        f"{message_data.get('session_id')}"
+    )
+
+
+def _default_consumer_name() -> str:
+    """Build a consumer name that is unique per worker process."""
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
 
 
 class MessageWorker:
     def __init__(self):
         self.running = False
         self.redis: aioredis.Redis | None = None
+        self.consumer_name = settings.worker_consumer_name or _default_consumer_name()
+
+        # Streams with a consumer group, and when each last saw activity
+        self._known_streams: set[str] = set()
+        self._stream_activity: dict[str, float] = {}
+        self._activity_cursor = 0.0
+
+        # Fetched messages wait in per-tenant queues; the scheduler hands
+        # them out fairly and enforces the per-tenant in-flight caps.
+        self._scheduler = FairScheduler(
+            default_weight=settings.worker_default_tenant_weight,
+            weights={str(k): v for k, v in settings.worker_tenant_weights.items()},
+            default_max_in_flight=settings.worker_tenant_max_concurrency,
+            max_in_flight={
+                str(k): v
+                for k, v in settings.worker_tenant_concurrency_overrides.items()
+            },
+        )
+        self._global_slots = asyncio.Semaphore(settings.worker_max_concurrency)
+        # Sessions whose Redis lock this worker holds
+        self._session_locks: set[str] = set()
+
+        self._in_flight: set[asyncio.Task] = set()
+        # Message ids this consumer is processing right now, per stream
+        self._pending_ids: dict[str, set[str]] = {}
+        self._background: list[asyncio.Task] = []
 
     async def start(self):
         """Start the worker process."""
         self.running = True
         self.redis = await get_redis()
 
-        # Get all tenant streams to consume
-        async with async_session_maker() as session:
-            result = await session.execute(select(Tenant.id))
-            tenant_ids = [row[0] for row in result.fetchall()]
+        await self._bootstrap_streams()
 
-        if not tenant_ids:
-            logger.warning("No tenants found, worker waiting...")
-            tenant_ids = [1]  # Default
+        await self._heartbeat()
+        dispatcher = asyncio.create_task(self._dispatch_loop())
+        self._background = [
+            asyncio.create_task(self._heartbeat_loop()),
+            asyncio.create_task(self._reclaim_loop()),
+            asyncio.create_task(self._invalidation_loop()),
+            asyncio.create_task(self._agent_refresh_loop()),
+            asyncio.create_task(self._unread_reconcile_loop()),
+        ]
 
-        streams = {f"messages:{tid}": ">" for tid in tenant_ids}
-
-        # Create consumer groups if they don't exist
-        for stream_key in streams.keys():
-            try:
-                await self.redis.xgroup_create(
-                    stream_key, CONSUMER_GROUP, id="0", mkstream=True
-                )
-                logger.info(f"Created consumer group for {stream_key}")
-            except Exception as e:
-                if "BUSYGROUP" not in str(e):
-                    logger.error(f"Error creating consumer group: {e}")
-
-        logger.info(f"Worker started, consuming from streams: {list(streams.keys())}")
+        logger.info(
+            f"Worker {self.consumer_name} started, {len(self._known_streams)} "
+            f"tenant streams known (max concurrency {settings.worker_max_concurrency})"
+        )
 
         while self.running:
             try:
-                # Read from streams
+                # Keep the local buffer bounded so unprocessed work stays in
+                # Redis, where other workers can pick it up.
+                if self._scheduler.queued() >= settings.worker_buffer_size:
+                    # Not reading isn't idleness; keep every stream tracked
+                    self._touch_streams(self._stream_activity)
+                    await asyncio.sleep(0.05)
+                    continue
+
+                # Pick up new tenants and only poll streams with recent activity
+                await self._refresh_streams()
+                streams = self._active_streams()
+                if not streams:
+                    await asyncio.sleep(settings.worker_block_ms / 1000)
+                    continue
+
+                # Read a batch from the streams (count applies per stream)
                 messages = await self.redis.xreadgroup(
                     CONSUMER_GROUP,
-                    CONSUMER_NAME,
+                    self.consumer_name,
                     streams=streams,
-                    count=1,
-                    block=5000,  # 5 second timeout
+                    count=settings.worker_batch_size,
+                    block=settings.worker_block_ms,
                 )
 
-                if messages:
-                    for stream_key, stream_messages in messages:
-                        for message_id, message_data in stream_messages:
-                            await self.process_message(
-                                stream_key, message_id, message_data
-                            )
-                            # Acknowledge message
-                            await self.redis.xack(
-                                stream_key, CONSUMER_GROUP, message_id
-                            )
+                for stream_key, stream_messages in messages or []:
+                    for message_id, message_data in stream_messages:
+                        self._dispatch(stream_key, message_id, message_data)
+                self._expire_streams(
+                    streams, {stream_key for stream_key, _ in messages or []}
+                )
 
             except asyncio.CancelledError:
                 logger.info("Worker cancelled, shutting down...")
@@ -82,16 +171,479 @@ class MessageWorker:
                 logger.error(f"Worker error: {e}")
                 await asyncio.sleep(1)
 
+        # Let buffered and in-flight messages finish so they get acknowledged
+        self._scheduler.close()
+        await dispatcher
+        if self._in_flight:
+            logger.info(f"Waiting for {len(self._in_flight)} in-flight messages...")
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+        for task in self._background:
+            task.cancel()
+        await asyncio.gather(*self._background, return_exceptions=True)
+        try:
+            await self.redis.srem(WORKER_REGISTRY_KEY, self.consumer_name)
+            await self.redis.delete(f"{HEARTBEAT_KEY_PREFIX}{self.consumer_name}")
+        except Exception as e:
+            logger.error(f"Failed to clear heartbeat: {e}")
+
         logger.info("Worker stopped")
 
     async def stop(self):
         """Stop the worker gracefully."""
         self.running = False
 
+    async def _bootstrap_streams(self):
+        """Track every tenant known from the database and the Redis registry.
+
+        All of them start out active so any backlog left while the worker was
+        down gets drained; idle streams then drop out of the polling set.
+        """
+        async with async_session_maker() as session:
+            result = await session.execute(select(Tenant.id))
+            tenant_ids = {str(row[0]) for row in result.fetchall()}
+        tenant_ids.update(await self.redis.smembers(TENANT_REGISTRY_KEY))
+
+        if not tenant_ids:
+            logger.warning("No tenants found, waiting for stream activity...")
+
+        now = time.time()
+        for tenant_id in tenant_ids:
+            await self._track_stream(f"messages:{tenant_id}", now)
+        self._activity_cursor = now
+
+    async def _refresh_streams(self):
+        """Pull tenants that enqueued messages since the last refresh.
+
+        Scores come from the API hosts' clocks, so the scan starts a skew
+        margin before the newest score seen; rescanning a known stream only
+        refreshes it. Activity itself is stamped with this worker's clock.
+        """
+        active = await self.redis.zrangebyscore(
+            STREAM_ACTIVITY_KEY,
+            self._activity_cursor - settings.worker_activity_skew_seconds,
+            "+inf",
+            withscores=True,
+        )
+        now = time.time()
+        for tenant_id, score in active:
+            await self._track_stream(f"messages:{tenant_id}", now)
+            self._activity_cursor = max(self._activity_cursor, score)
+
+    async def _track_stream(self, stream_key: str, activity: float):
+        if stream_key not in self._known_streams:
+            # Create the consumer group from the start of the stream so
+            # messages enqueued before discovery are not skipped
+            try:
+                await self.redis.xgroup_create(
+                    stream_key, CONSUMER_GROUP, id="0", mkstream=True
+                )
+                logger.info(f"Created consumer group for {stream_key}")
+            except Exception as e:
+                if "BUSYGROUP" not in str(e):
+                    logger.error(f"Error creating consumer group: {e}")
+                    return
+            self._known_streams.add(stream_key)
+        self._stream_activity[stream_key] = max(
+            self._stream_activity.get(stream_key, 0.0), activity
+        )
+
+    def _touch_streams(self, stream_keys):
+        now = time.time()
+        for stream_key in stream_keys:
+            self._stream_activity[stream_key] = now
+
+    def _active_streams(self) -> dict[str, str]:
+        """Streams to read from.
+
+        Tenants that already have a full local queue are left out, so a
+        flooding tenant's backlog stays in Redis instead of crowding the
+        buffer that every other tenant shares. They stay tracked meanwhile:
+        being held back is not the same as being idle.
+        """
+        streams, held_back = {}, []
+        for stream_key in self._stream_activity:
+            if self._scheduler.queued(_tenant_key(stream_key)) < (
+                settings.worker_batch_size
+            ):
+                streams[stream_key] = ">"
+            else:
+                held_back.append(stream_key)
+        self._touch_streams(held_back)
+        return streams
+
+    def _expire_streams(self, read: dict[str, str], returned: set[str]):
+        """Update activity after a read; drop streams that stayed empty.
+
+        Only a stream that was actually read and had nothing new counts as
+        idle, so an undelivered backlog is never dropped from polling.
+        """
+        now = time.time()
+        cutoff = now - settings.worker_stream_idle_seconds
+        for stream_key in read:
+            if stream_key in returned:
+                self._stream_activity[stream_key] = now
+            elif self._stream_activity.get(stream_key, now) < cutoff:
+                del self._stream_activity[stream_key]
+
+    def _dispatch(
+        self,
+        stream_key: str,
+        message_id: str,
+        message_data: dict,
+        reclaimed: bool = False,
+    ):
+        """Queue a message with the fair scheduler.
+
+        Reclaimed messages are older than anything read since, so they go to
+        the front, ahead of later messages of the same session.
+        """
+        pending = self._pending_ids.setdefault(stream_key, set())
+        if message_id in pending:
+            return
+        pending.add(message_id)
+        # One message per session at a time keeps conversations ordered
+        self._scheduler.put(
+            _tenant_key(stream_key),
+            (stream_key, message_id, message_data),
+            session=_session_key(stream_key, message_data),
+            front=reclaimed,
+        )
+
+    async def _dispatch_loop(self):
+        """Start scheduled messages as tasks whenever a global slot is free."""
+        while True:
+            await self._global_slots.acquire()
+            item = await self._scheduler.get()
+            if item is None:
+                self._global_slots.release()
+                return
+
+            task = asyncio.create_task(self._handle_message(*item))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _handle_message(
+        self, stream_key: str, message_id: str, message_data: dict
+    ):
+        """Process a scheduled message, then release its slots and ack it.
+
+        Another worker may be handling the same session (consecutive messages
+        go to whichever consumer reads first); then the message gives its
+        slots back and is retried shortly, still ahead of its successors.
+        """
+        tenant = _tenant_key(stream_key)
+        session_key = _session_key(stream_key, message_data)
+        if not await self._lock_session(session_key):
+            metrics.incr("worker.session_lock.retries")
+            self._global_slots.release()
+            self._scheduler.retry_later(
+                tenant,
+                session_key,
+                (stream_key, message_id, message_data),
+                settings.worker_session_lock_retry_ms / 1000,
+            )
+            return
+
+        try:
+            await self.process_message(stream_key, message_id, message_data)
+        finally:
+            await self._unlock_session(session_key)
+            self._global_slots.release()
+            self._scheduler.done(tenant, session_key)
+
+        try:
+            await self.redis.xack(stream_key, CONSUMER_GROUP, message_id)
+        except Exception as e:
+            logger.error(f"Failed to acknowledge message {message_id}: {e}")
+        finally:
+            self._pending_ids[stream_key].discard(message_id)
+
+    async def _lock_session(self, session_key: str) -> bool:
+        try:
+            locked = await self.redis.set(
+                f"{SESSION_LOCK_KEY_PREFIX}{session_key}",
+                self.consumer_name,
+                nx=True,
+                ex=settings.worker_session_lock_ttl_seconds,
+            )
+        except Exception as e:
+            logger.error(f"Failed to lock session {session_key}: {e}")
+            return False
+        if locked:
+            self._session_locks.add(session_key)
+        return bool(locked)
+
+    async def _unlock_session(self, session_key: str):
+        self._session_locks.discard(session_key)
+        try:
+            await self.redis.eval(
+                _RELEASE_IF_OWNER,
+                1,
+                f"{SESSION_LOCK_KEY_PREFIX}{session_key}",
+                self.consumer_name,
+            )
+        except Exception as e:
+            # It expires on its own after worker_session_lock_ttl_seconds
+            logger.error(f"Failed to unlock session {session_key}: {e}")
+
+    async def _heartbeat(self):
+        """Mark this consumer alive and keep its own pending entries fresh.
+
+        Re-claiming our in-flight entries resets their idle time, so a slow
+        LLM call is never mistaken for a dead consumer by other workers; the
+        session locks of those calls are extended for the same reason.
+        """
+        await self.redis.set(
+            f"{HEARTBEAT_KEY_PREFIX}{self.consumer_name}",
+            "1",
+            ex=settings.worker_heartbeat_ttl_seconds,
+        )
+        # Publish this process's metrics for GET /api/metrics
+        record_pool_metrics()
+        await self.redis.set(
+            f"{WORKER_METRICS_KEY_PREFIX}{self.consumer_name}",
+            json.dumps(metrics.snapshot()),
+            ex=settings.worker_heartbeat_ttl_seconds,
+        )
+        await self.redis.sadd(WORKER_REGISTRY_KEY, self.consumer_name)
+        if self._session_locks:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for session_key in self._session_locks:
+                    pipe.eval(
+                        _EXTEND_IF_OWNER,
+                        1,
+                        f"{SESSION_LOCK_KEY_PREFIX}{session_key}",
+                        self.consumer_name,
+                        settings.worker_session_lock_ttl_seconds,
+                    )
+                await pipe.execute()
+        # _dispatch may add streams while xclaim is awaited
+        for stream_key, message_ids in list(self._pending_ids.items()):
+            if message_ids:
+                await self.redis.xclaim(
+                    stream_key,
+                    CONSUMER_GROUP,
+                    self.consumer_name,
+                    min_idle_time=0,
+                    message_ids=list(message_ids),
+                    justid=True,
+                )
+
+    async def _heartbeat_loop(self):
+        # Not tied to self.running: during shutdown the in-flight messages
+        # still need their pending entries and session locks kept alive, so
+        # start() cancels this only once they have drained
+        while True:
+            await asyncio.sleep(settings.worker_heartbeat_interval_seconds)
+            try:
+                await self._heartbeat()
+            except Exception as e:
+                logger.error(f"Heartbeat failed: {e}")
+
+    async def _reclaim_loop(self):
+        """Take over stale pending entries and drop dead consumers.
+
+        Most tenant streams are idle with nothing pending, so one pipelined
+        XPENDING summary picks the streams worth an XAUTOCLAIM; the rest are
+        checked for dead consumers a slice at a time.
+        """
+        cleanup_offset = 0
+        while self.running:
+            await asyncio.sleep(settings.worker_claim_interval_seconds)
+            try:
+                streams = sorted(self._known_streams)
+                pending = await self._pending_streams(streams)
+            except Exception as e:
+                logger.error(f"Reclaim failed: {e}")
+                continue
+
+            with_pending = set(pending)
+            idle = [
+                stream_key for stream_key in streams if stream_key not in with_pending
+            ]
+            batch = settings.worker_consumer_cleanup_streams
+            if cleanup_offset >= len(idle):
+                cleanup_offset = 0
+            cleanup = idle[cleanup_offset : cleanup_offset + batch]
+            cleanup_offset += batch
+
+            for stream_key in pending:
+                try:
+                    await self._reclaim_stream(stream_key)
+                    await self._remove_dead_consumers(stream_key)
+                except Exception as e:
+                    logger.error(f"Reclaim failed for {stream_key}: {e}")
+            for stream_key in cleanup:
+                try:
+                    await self._remove_dead_consumers(stream_key)
+                except Exception as e:
+                    logger.error(f"Consumer cleanup failed for {stream_key}: {e}")
+
+    async def _pending_streams(self, streams: list[str]) -> list[str]:
+        """The streams whose consumer group has pending entries."""
+        pending = []
+        for start in range(0, len(streams), 500):
+            chunk = streams[start : start + 500]
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for stream_key in chunk:
+                    pipe.xpending(stream_key, CONSUMER_GROUP)
+                summaries = await pipe.execute(raise_on_error=False)
+            for stream_key, summary in zip(chunk, summaries):
+                if isinstance(summary, Exception):
+                    logger.error(f"XPENDING failed for {stream_key}: {summary}")
+                elif summary["pending"]:
+                    pending.append(stream_key)
+        return pending
+
+    async def _reclaim_stream(self, stream_key: str):
+        """Take over entries pending too long with another consumer."""
+        start_id = "0-0"
+        while self.running:
+            capacity = settings.worker_buffer_size - self._scheduler.queued()
+            if capacity <= 0:
+                return
+            result = await self.redis.xautoclaim(
+                stream_key,
+                CONSUMER_GROUP,
+                self.consumer_name,
+                min_idle_time=settings.worker_claim_idle_ms,
+                start_id=start_id,
+                count=min(settings.worker_batch_size, capacity),
+            )
+            start_id, claimed = result[0], result[1]
+            for message_id, message_data in claimed:
+                # Entries trimmed from the stream come back without data
+                if message_data:
+                    logger.info(f"Reclaimed message {message_id} from {stream_key}")
+                    self._dispatch(stream_key, message_id, message_data, reclaimed=True)
+            if start_id == "0-0":
+                break
+
+    async def _remove_dead_consumers(self, stream_key: str):
+        for consumer in await self.redis.xinfo_consumers(stream_key, CONSUMER_GROUP):
+            name = consumer["name"]
+            if name == self.consumer_name or consumer["pending"]:
+                continue
+            if await self.redis.exists(f"{HEARTBEAT_KEY_PREFIX}{name}"):
+                continue
+            if consumer["idle"] < settings.worker_claim_idle_ms:
+                continue
+            await self.redis.xgroup_delconsumer(stream_key, CONSUMER_GROUP, name)
+            logger.info(f"Removed dead consumer {name} from {stream_key}")
+
+    async def _invalidation_loop(self):
+        """Drop cached agents of tenants whose data changed."""
+        while self.running:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(TENANT_INVALIDATION_CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        invalidate_agent(int(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Invalidation listener failed: {e}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.close()
+
+    async def _announce_notifications(
+        self, tenant_id: int, notifications: list[Notification], from_user_name: str
+    ):
+        """Update unread counters and push notifications to their recipients."""
+        try:
+            await increment_unread(tenant_id, [n.to_user_id for n in notifications])
+        except Exception as e:
+            logger.error(f"Failed to update unread counters: {e}")
+
+        for notification in notifications:
+            payload = NotificationResponse.model_validate(notification).model_copy(
+                update={"from_user_name": from_user_name}
+            )
+            try:
+                await publish_event(
+                    tenant_id,
+                    notification.to_user_id,
+                    {
+                        "type": "notification",
+                        "notification": payload.model_dump(mode="json"),
+                    },
+                )
+            except Exception as e:
+                logger.error(f"Failed to push notification {notification.id}: {e}")
+
+    async def _unread_reconcile_loop(self):
+        """Correct drift between Redis unread counters and Postgres."""
+        while self.running:
+            await asyncio.sleep(settings.unread_reconcile_interval_seconds)
+            try:
+                async with async_session_maker() as session:
+                    await reconcile_unread_counts(session)
+            except Exception as e:
+                logger.error(f"Unread counter reconciliation failed: {e}")
+
+    async def _agent_refresh_loop(self):
+        while self.running:
+            await asyncio.sleep(settings.agent_refresh_interval_seconds)
+            try:
+                await refresh_stale_agents()
+            except Exception as e:
+                logger.error(f"Agent refresh failed: {e}")
+
+    async def _insert_message(
+        self,
+        session: AsyncSession,
+        message_id: str,
+        tenant_id: int,
+        user_id: int,
+        session_id: str,
+        role: str,
+        content: str,
+    ) -> bool:
+        """Add a message row for a stream entry; False if it already exists."""
+        result = await session.execute(
+            insert(Message)
+            .values(
+                tenant_id=tenant_id,
+                user_id=user_id,
+                session_id=session_id,
+                role=role,
+                content=content,
+                stream_message_id=message_id,
+            )
+            .on_conflict_do_nothing(
+                index_elements=["tenant_id", "stream_message_id", "role"],
+                index_where=Message.stream_message_id.isnot(None),
+            )
+            .returning(Message.id)
+        )
+        return result.scalar_one_or_none() is not None
+
+    async def _first_time(self, stream_key: str, message_id: str, step: str) -> bool:
+        """Claim a side effect of a stream message; False if it already ran."""
+        return bool(
+            await self.redis.set(
+                f"{PROCESSED_KEY_PREFIX}{stream_key}:{message_id}:{step}",
+                "1",
+                nx=True,
+                ex=settings.worker_processed_ttl_seconds,
+            )
+        )
+
     async def process_message(
         self, stream_key: str, message_id: str, message_data: dict
     ):
-        """Process a single message from the queue."""
+        """Process a single message from the queue.
+
+        A message is acked only after it is processed, so one whose worker
+        died midway is delivered again. Every step is keyed on the stream
+        message id to make that safe: both rows are inserted at most once
+        (the actions commit with the answer), and the memory update and the
+        final reply are guarded by a Redis marker. A message that already has
+        its answer stored skips the LLM and only finishes the missing steps.
+        """
         logger.info(f"Processing message {message_id} from {stream_key}")
 
         try:
@@ -101,64 +653,96 @@ class MessageWorker:
             content = message_data["content"]
             user_info = json.loads(message_data["user_info"])
 
+            # Phase 1: persist the user message and make sure the agent exists
+            answer = None
             async with async_session_maker() as session:
-                # Save user message to database
-                user_message = Message(
-                    tenant_id=tenant_id,
-                    user_id=user_id,
-                    session_id=session_id,
-                    role="user",
-                    content=content,
-                )
-                session.add(user_message)
-                await session.flush()
-
-                # Get or create agent for tenant
                 agent = await get_or_create_agent(tenant_id, session)
+                history = await agent.load_history(session, user_id, session_id)
+
+                if not await self._insert_message(
+                    session, message_id, tenant_id, user_id, session_id, "user", content
+                ):
+                    logger.info(f"Message {message_id} was delivered before")
+                    # History hydrated from the database may already hold it
+                    if history and history[-1] == {"role": "user", "content": content}:
+                        history = history[:-1]
+                    answer = await session.scalar(
+                        select(Message.content).where(
+                            Message.tenant_id == tenant_id,
+                            Message.stream_message_id == message_id,
+                            Message.role == "assistant",
+                        )
+                    )
+                await session.commit()
 
-                # Process message through agent
+            notifications = []
+            actions_taken = None
+            if answer is None:
+                response_channel = user_channel(tenant_id, user_id)
+
+                async def publish_delta(text: str):
+                    await publish_response(
+                        response_channel,
+                        {"type": "delta", "content": text, "session_id": session_id},
+                    )
+
+                # Phase 2: call the LLM with no database connection checked out
                 llm_response = await agent.process_message(
-                    session, user_id, user_info, session_id, content
+                    user_id,
+                    user_info,
+                    session_id,
+                    content,
+                    history,
+                    on_delta=publish_delta if settings.llm_streaming else None,
                 )
+                answer = llm_response.response
+                actions_taken = len(llm_response.actions)
+
+                # Phase 3: persist the answer and its actions in one short
+                # transaction; if the answer is already there, so are they
+                async with async_session_maker() as session:
+                    if await self._insert_message(
+                        session,
+                        message_id,
+                        tenant_id,
+                        user_id,
+                        session_id,
+                        "assistant",
+                        answer,
+                    ):
+                        if llm_response.actions:
+                            notifications = await agent.execute_actions(
+                                session, user_id, llm_response.actions
+                            )
+                        await session.commit()
 
-                # Execute any actions
-                if llm_response.actions:
-                    await agent.execute_actions(session, user_id, llm_response.actions)
-
-                # Save assistant message to database
-                assistant_message = Message(
-                    tenant_id=tenant_id,
-                    user_id=user_id,
-                    session_id=session_id,
-                    role="assistant",
-                    content=llm_response.response,
-                )
-                session.add(assistant_message)
-                await session.commit()
+            if await self._first_time(stream_key, message_id, "memory"):
+                await agent.remember(user_id, session_id, content, answer)
 
-                # Publish response to user's channel
-                response_channel = f"response:{tenant_id}:{user_id}:{session_id}"
-                await publish_response(
-                    response_channel,
-                    {
-                        "type": "message",
-                        "content": llm_response.response,
-                        "session_id": session_id,
-                        "actions_taken": len(llm_response.actions),
-                    },
+            # Only announce notifications that are actually committed
+            if notifications:
+                await self._announce_notifications(
+                    tenant_id, notifications, user_info.get("name")
                 )
 
-                logger.info(
-                    f"Processed message {message_id}, actions: {len(llm_response.actions)}"
-                )
+            # Publish the final response once actions are executed; it is kept
+            # for replay, so a client reconnecting meanwhile still gets it
+            if await self._first_time(stream_key, message_id, "reply"):
+                reply = {"type": "message", "content": answer, "session_id": session_id}
+                # Unknown when finishing a message answered by an earlier run
+                if actions_taken is not None:
+                    reply["actions_taken"] = actions_taken
+                await publish_event(tenant_id, user_id, reply)
+
+            logger.info(f"Processed message {message_id}, actions: {actions_taken}")
 
         except Exception as e:
             logger.error(f"Error processing message {message_id}: {e}")
             # Publish error to user
             try:
-                response_channel = f"response:{message_data.get('tenant_id')}:{message_data.get('user_id')}:{message_data.get('session_id')}"
-                await publish_response(
-                    response_channel,
+                await publish_event(
+                    message_data.get("tenant_id"),
+                    message_data.get("user_id"),
                     {
                         "type": "error",
                         "content": "Sorry, I encountered an error processing your message.",
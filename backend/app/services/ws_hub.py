@@ -0,0 +1,207 @@
+"""Per-process fan-out of Redis pub/sub messages to local WebSockets.
+
+Each API process holds a single pub/sub connection. Channels are subscribed
+on the first local subscriber and unsubscribed after the last one leaves
+(reference counting), and every message is copied into the queue of each
+local subscriber. Sockets never touch Redis themselves, so the number of
+Redis connections stays constant no matter how many clients are connected.
+
+Subscriber queues are bounded (see SendQueue), so a slow client can never
+stall the listener or make this process buffer without limit.
+"""
+import asyncio
+import json
+import logging
+from collections import deque
+
+from app.core import metrics
+from app.core.config import get_settings
+from app.services.redis_service import get_redis
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Always subscribed, so the pub/sub connection exists before any socket does
+HUB_CHANNEL = "ws:hub"
+
+OVERFLOW_POLICIES = ("drop_deltas", "coalesce", "disconnect")
+
+
+class SendQueueOverflow(Exception):
+    """The client fell too far behind and its connection has to be closed."""
+
+
+class SendQueue:
+    """Bounded buffer of frames waiting to be sent to one WebSocket.
+
+    Filled by the hub listener without ever blocking it. When full, the
+    overflow policy decides what gives; if that frees no space the queue is
+    marked overflowed and the socket gets closed, after which the client
+    reconnects and catches up from its replay stream. Frames are kept as raw
+    JSON and only parsed when the queue overflows.
+    """
+
+    def __init__(self, maxsize: int, policy: str):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown WebSocket overflow policy: {policy}")
+        self._frames: deque[str] = deque()
+        self._maxsize = maxsize
+        self._policy = policy
+        self._ready = asyncio.Event()
+        self.overflowed = False
+
+    def put(self, frame: str):
+        if self.overflowed:
+            return
+        if len(self._frames) >= self._maxsize:
+            if self._policy == "drop_deltas" and _is_delta(frame):
+                metrics.incr("ws.frames.dropped")
+                return
+            if not self._make_room():
+                self.overflowed = True
+                self._frames.clear()
+                metrics.incr("ws.overflow_disconnects")
+                self._ready.set()
+                return
+        self._frames.append(frame)
+        self._ready.set()
+
+    async def get_batch(self, window: float, max_bytes: int) -> list[str]:
+        """Wait for frames and take the next ones to send together.
+
+        A lone small frame is held for `window` seconds so frames right
+        behind it (streaming deltas, mostly) share one send. Takes at most
+        `max_bytes` worth of frames, but always at least one.
+        """
+        while not self._frames:
+            if self.overflowed:
+                raise SendQueueOverflow()
+            self._ready.clear()
+            await self._ready.wait()
+
+        if window and len(self._frames) == 1 and len(self._frames[0]) < max_bytes:
+            await asyncio.sleep(window)
+            if self.overflowed:
+                raise SendQueueOverflow()
+
+        metrics.observe("ws.send_queue.depth", len(self._frames))
+        batch = [self._frames.popleft()]
+        size = len(batch[0])
+        while self._frames and size + len(self._frames[0]) <= max_bytes:
+            frame = self._frames.popleft()
+            batch.append(frame)
+            size += len(frame)
+        return batch
+
+    def _make_room(self) -> bool:
+        before = len(self._frames)
+        if self._policy == "drop_deltas":
+            self._frames = deque(f for f in self._frames if not _is_delta(f))
+            metrics.incr("ws.frames.dropped", before - len(self._frames))
+        elif self._policy == "coalesce":
+            self._frames = _coalesce_deltas(self._frames)
+            metrics.incr("ws.frames.coalesced", before - len(self._frames))
+        return len(self._frames) < self._maxsize
+
+
+def _is_delta(frame: str) -> bool:
+    return json.loads(frame).get("type") == "delta"
+
+
+def _coalesce_deltas(frames: deque[str]) -> deque[str]:
+    """Merge runs of consecutive deltas of the same session into one."""
+    merged: list[str | dict] = []
+    for frame in frames:
+        data = json.loads(frame)
+        if data.get("type") != "delta":
+            merged.append(frame)
+            continue
+        previous = merged[-1] if merged else None
+        if isinstance(previous, dict) and previous.get("session_id") == data.get(
+            "session_id"
+        ):
+            previous["content"] += data["content"]
+        else:
+            merged.append(data)
+    return deque(f if isinstance(f, str) else json.dumps(f) for f in merged)
+
+
+class ConnectionHub:
+    def __init__(self):
+        self._subscribers: dict[str, set[SendQueue]] = {}
+        self._pubsub = None
+        self._listener: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+
+    async def start(self):
+        redis = await get_redis()
+        self._pubsub = redis.pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(HUB_CHANNEL)
+        self._listener = asyncio.create_task(self._listen())
+        logger.info("WebSocket hub started")
+
+    async def stop(self):
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+        if self._pubsub:
+            await self._pubsub.close()
+        self._subscribers.clear()
+
+    async def subscribe(self, channel: str) -> SendQueue:
+        """Register a local subscriber; returns the queue it receives on."""
+        queue = SendQueue(settings.ws_send_queue_size, settings.ws_overflow_policy)
+        async with self._lock:
+            if channel not in self._subscribers:
+                self._subscribers[channel] = set()
+                await self._pubsub.subscribe(channel)
+            self._subscribers[channel].add(queue)
+            self._record_gauges()
+        return queue
+
+    async def unsubscribe(self, channel: str, queue: SendQueue):
+        async with self._lock:
+            queues = self._subscribers.get(channel)
+            if queues is None:
+                return
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[channel]
+                await self._pubsub.unsubscribe(channel)
+            self._record_gauges()
+
+    def _record_gauges(self):
+        metrics.set_gauge("ws.channels", len(self._subscribers))
+        metrics.set_gauge(
+            "ws.connections", sum(len(q) for q in self._subscribers.values())
+        )
+
+    async def _listen(self):
+        while True:
+            try:
+                message = await self._pubsub.get_message(timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # redis-py reconnects and resubscribes on the next read
+                logger.error(f"WebSocket hub listener failed: {e}")
+                await asyncio.sleep(1)
+                continue
+            if message is None or message["type"] != "message":
+                continue
+            for queue in self._subscribers.get(message["channel"], ()):
+                queue.put(message["data"])
+
+
+_hub: ConnectionHub | None = None
+
+
+def get_hub() -> ConnectionHub:
+    """Return this process's hub (started in the app lifespan)."""
+    global _hub
+    if _hub is None:
+        _hub = ConnectionHub()
+    return _hub
@@ -2,6 +2,7 @@ import asyncio
 from app.core.database import async_session_maker
 from app.core.security import get_password_hash
 from app.models import Tenant, User, TenantKnowledge
+from app.services.redis_service import register_tenant, close_redis
 from sqlalchemy import select
 
 async def seed():
@@ -66,6 +67,8 @@ async def seed():
         session.add_all(knowledge)
 
         await session.commit()
+        await register_tenant(tenant.id)
+        await close_redis()
         print(f"✓ Created tenant: {tenant.name}")
         print(f"✓ Created {len(users)} users")
         print(f"✓ Created {len(knowledge)} knowledge items")
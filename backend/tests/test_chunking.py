@@ -0,0 +1,70 @@
+import random
+
+import pytest
+
+from app.models.tenant_knowledge import knowledge_content_hash
+from app.services.ingestion import chunk_text
+
+WORDS = "pizza oven dough shift delivery order table menu kitchen".split()
+
+
+def random_text(rng: random.Random, sentences: int) -> str:
+    out = []
+    for _ in range(sentences):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(1, 30))]
+        out.append(" ".join(words).capitalize() + rng.choice(".!?"))
+        if rng.random() < 0.2:
+            out.append("\n\n")
+    return " ".join(out)
+
+
+def test_empty_and_blank_text_has_no_chunks():
+    assert chunk_text("", 100) == []
+    assert chunk_text(" \n\n\t \n", 100) == []
+
+
+def test_short_paragraphs_are_merged_with_whitespace_collapsed():
+    text = "Para  one.\n\nPara\ttwo.\n\n\n  "
+    assert chunk_text(text, 100) == ["Para one. Para two."]
+
+
+def test_splits_on_sentence_breaks():
+    text = "One two three. Four five six. Seven eight nine."
+    assert chunk_text(text, 20) == [
+        "One two three.",
+        "Four five six.",
+        "Seven eight nine.",
+    ]
+
+
+def test_hard_splits_sentences_longer_than_a_chunk():
+    assert chunk_text("x" * 25, 10) == ["x" * 10, "x" * 10, "x" * 5]
+
+
+def test_overlap_repeats_the_previous_tail_from_a_word_start():
+    text = "One two three. Four five six. Seven eight nine. Ten eleven twelve."
+    assert chunk_text(text, 32, overlap=12) == [
+        "One two three. Four five six.",
+        "five six. Seven eight nine.",
+        "eight nine. Ten eleven twelve.",
+    ]
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("overlap", [0, 40])
+def test_chunks_respect_the_size_limit_and_keep_all_text(seed, overlap):
+    rng = random.Random(seed)
+    text = random_text(rng, 40)
+    chunks = chunk_text(text, 120, overlap)
+
+    assert all(0 < len(chunk) <= 120 for chunk in chunks)
+    if not overlap:
+        # Over-long sentences are cut mid-word, so compare without whitespace
+        assert "".join("".join(chunks).split()) == "".join(text.split())
+
+
+def test_content_hash_ignores_whitespace_differences():
+    assert knowledge_content_hash("\n\tOpen at  9.\n") == knowledge_content_hash(
+        "Open at 9."
+    )
+    assert knowledge_content_hash("Open at 9.") != knowledge_content_hash("Open at 10.")
@@ -0,0 +1,113 @@
+import pytest
+
+from app.agents.context import (
+    MESSAGE_OVERHEAD_TOKENS,
+    ContextAssembler,
+    estimate_tokens,
+)
+from app.agents.memory import InProcessMemory
+
+
+def turn(role: str, content: str) -> dict:
+    return {"role": role, "content": content}
+
+
+def conversation(turns: int) -> list[dict]:
+    return [
+        turn(
+            "user" if i % 2 == 0 else "assistant",
+            f"Turn number {i} talks about the delivery schedule. More detail here.",
+        )
+        for i in range(turns)
+    ]
+
+
+def make_assembler(budget: int, **overrides) -> ContextAssembler:
+    options = {
+        "response_reserve": 50,
+        "knowledge_share": 0.5,
+        "summary_max_tokens": 60,
+    }
+    options.update(overrides)
+    memory = InProcessMemory(max_turns=100, ttl_seconds=60, max_bytes=1_000_000)
+    return ContextAssembler(memory, budget, **options)
+
+
+def test_estimate_tokens_counts_word_pieces_and_punctuation():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("hi, you") == 3
+    # Nine characters are three four-character pieces
+    assert estimate_tokens("deliverie") == 3
+
+
+async def test_everything_fits_without_a_summary():
+    assembler = make_assembler(10_000)
+    history = conversation(4)
+    context = await assembler.assemble("k", 100, "Hello?", ["Fact one."], history)
+
+    assert context.knowledge == ["Fact one."]
+    assert context.history == history
+    assert context.summary is None
+    assert context.tokens == (
+        100
+        + estimate_tokens("Hello?")
+        + 2 * MESSAGE_OVERHEAD_TOKENS
+        + estimate_tokens("Fact one.")
+        + 2
+        + sum(estimate_tokens(t["content"]) + MESSAGE_OVERHEAD_TOKENS for t in history)
+    )
+
+
+async def test_knowledge_is_capped_at_its_share_in_relevance_order():
+    assembler = make_assembler(400, knowledge_share=0.25)
+    knowledge = [f"Knowledge chunk {i} " + "word " * 10 for i in range(10)]
+    context = await assembler.assemble("k", 0, "Hi", knowledge, [])
+
+    available = 400 - 50 - estimate_tokens("Hi") - 2 * MESSAGE_OVERHEAD_TOKENS
+    assert context.knowledge == knowledge[: len(context.knowledge)]
+    assert 0 < len(context.knowledge) < len(knowledge)
+    spent = sum(estimate_tokens(chunk) + 2 for chunk in context.knowledge)
+    assert spent <= available * 0.25
+
+
+async def test_oldest_turns_are_dropped_and_summarised_within_budget():
+    assembler = make_assembler(400)
+    history = conversation(30)
+    context = await assembler.assemble("k", 50, "Hi", [], history)
+
+    assert 0 < len(context.history) < len(history)
+    assert context.history == history[-len(context.history) :]
+    assert context.summary is not None
+    assert estimate_tokens(context.summary) <= 60
+    assert context.tokens <= 400 - 50
+    # Lines are the first sentence of each dropped turn, newest last
+    dropped = history[: len(history) - len(context.history)]
+    speaker = "User" if dropped[-1]["role"] == "user" else "Assistant"
+    assert context.summary.splitlines()[-1] == (
+        f"{speaker}: Turn number {len(dropped) - 1} talks about the delivery schedule."
+    )
+    assert "More detail" not in context.summary
+
+
+async def test_summary_is_cached_and_extended_with_newly_dropped_turns():
+    assembler = make_assembler(400, summary_max_tokens=1_000)
+    history = conversation(30)
+    first = await assembler.assemble("k", 50, "Hi", [], history)
+    again = await assembler.assemble("k", 50, "Hi", [], history)
+    assert again.summary == first.summary
+
+    longer = history + conversation(34)[30:]
+    extended = await assembler.assemble("k", 50, "Hi", [], longer)
+    assert extended.summary.startswith(first.summary + "\n")
+    dropped = len(longer) - len(extended.history)
+    assert len(extended.summary.splitlines()) == dropped
+    cached = await assembler.memory.get_summary("k")
+    assert cached["content"] == extended.summary
+
+
+@pytest.mark.parametrize("budget", [0, 10, 60])
+async def test_tiny_budgets_keep_nothing_but_do_not_fail(budget):
+    assembler = make_assembler(budget)
+    context = await assembler.assemble("k", 500, "Hi", ["Fact."], conversation(3))
+    assert context.knowledge == []
+    assert context.history == []
@@ -0,0 +1,99 @@
+import base64
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.core.pagination import decode_cursor, encode_cursor, keyset_page, page_rows
+from app.models import Message
+
+CREATED = datetime(2026, 10, 17, 12, 30, 45, 123456, tzinfo=timezone.utc)
+
+
+def b64(raw: str) -> str:
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize(
+    "created_at",
+    [
+        CREATED,
+        CREATED.replace(microsecond=0),
+        CREATED.astimezone(timezone(timedelta(hours=-5))),
+    ],
+)
+@pytest.mark.parametrize("row_id", [1, 42, 2**40])
+def test_cursor_round_trips(created_at, row_id):
+    cursor = encode_cursor(created_at, row_id)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, row_id)
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "",
+        "abcde",  # impossible base64 length
+        "!!!!",
+        b64("no separator"),
+        b64(f"{CREATED.isoformat()}|1|2"),
+        b64(f"{CREATED.isoformat()}|one"),
+        b64("yesterday|1"),
+        base64.urlsafe_b64encode(b"\xff\xfe|1").decode(),
+    ],
+)
+def test_bad_cursors_are_rejected_with_400(cursor):
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor(cursor)
+    assert exc_info.value.status_code == 400
+
+
+def compile_sql(query) -> str:
+    return str(query.compile(dialect=postgresql.dialect()))
+
+
+def page(limit=10, before=None, after=None) -> str:
+    query = keyset_page(
+        select(Message), Message.created_at, Message.id, limit, before, after
+    )
+    return compile_sql(query)
+
+
+def test_first_page_reads_newest_first_and_one_extra_row():
+    sql = page(limit=10)
+    assert "WHERE" not in sql
+    assert "ORDER BY messages.created_at DESC, messages.id DESC" in sql
+    assert "LIMIT" in sql
+
+
+def test_before_and_after_filter_in_opposite_directions():
+    cursor = encode_cursor(CREATED, 7)
+    before = page(before=cursor)
+    assert "(messages.created_at, messages.id) <" in before
+    assert "DESC" in before
+
+    after = page(after=cursor)
+    assert "(messages.created_at, messages.id) >" in after
+    assert "ORDER BY messages.created_at ASC, messages.id ASC" in after
+
+
+def test_before_and_after_together_are_rejected():
+    cursor = encode_cursor(CREATED, 7)
+    with pytest.raises(HTTPException) as exc_info:
+        page(before=cursor, after=cursor)
+    assert exc_info.value.status_code == 400
+
+
+def test_page_rows_trims_the_extra_row_and_points_at_the_last_kept():
+    rows = [(CREATED - timedelta(seconds=i), 100 - i) for i in range(4)]
+    kept, next_cursor = page_rows(rows, 3, key=lambda row: row)
+    assert kept == rows[:3]
+    assert decode_cursor(next_cursor) == rows[2]
+
+
+@pytest.mark.parametrize("count", [0, 1, 3])
+def test_page_rows_has_no_cursor_on_the_last_page(count):
+    rows = [(CREATED, i) for i in range(count)]
+    assert page_rows(rows, 3, key=lambda row: row) == (rows, None)
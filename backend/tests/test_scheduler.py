@@ -0,0 +1,110 @@
+"""Tests for the deficit round-robin scheduler."""
+import asyncio
+
+import pytest
+
+from app.services.scheduler import FairScheduler
+
+
+async def next_item(scheduler: FairScheduler):
+    return await asyncio.wait_for(scheduler.get(), timeout=1)
+
+
+async def test_lone_fractional_weight_tenant_is_dispatched():
+    scheduler = FairScheduler(weights={"a": 0.5})
+    scheduler.put("a", "first")
+    scheduler.put("a", "second")
+
+    assert await next_item(scheduler) == "first"
+    scheduler.done("a")
+    assert await next_item(scheduler) == "second"
+
+
+async def test_fractional_weight_tenant_next_to_a_full_weight_one():
+    scheduler = FairScheduler(weights={"a": 0.25}, default_max_in_flight=100)
+    for i in range(8):
+        scheduler.put("a", f"a{i}")
+        scheduler.put("b", f"b{i}")
+
+    order = [await next_item(scheduler) for _ in range(10)]
+    # b (weight 1) gets four turns for each of a's (weight 0.25)
+    assert sum(item.startswith("a") for item in order) == 2
+
+
+async def test_weights_share_dispatches():
+    scheduler = FairScheduler(weights={"a": 2.0}, default_max_in_flight=100)
+    for i in range(6):
+        scheduler.put("a", f"a{i}")
+        scheduler.put("b", f"b{i}")
+
+    order = [await next_item(scheduler) for _ in range(6)]
+    assert sum(item.startswith("a") for item in order) == 4
+
+
+async def test_tenant_at_in_flight_cap_is_skipped():
+    scheduler = FairScheduler(default_max_in_flight=1)
+    scheduler.put("a", "a0")
+    scheduler.put("a", "a1")
+    scheduler.put("b", "b0")
+
+    assert await next_item(scheduler) == "a0"
+    assert await next_item(scheduler) == "b0"
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(scheduler.get(), timeout=0.05)
+    scheduler.done("a")
+    assert await next_item(scheduler) == "a1"
+
+
+@pytest.mark.parametrize("weights", [{"a": 0}, {"a": -1.0}])
+def test_non_positive_weights_are_rejected(weights):
+    with pytest.raises(ValueError):
+        FairScheduler(weights=weights)
+
+
+def test_non_positive_default_weight_is_rejected():
+    with pytest.raises(ValueError):
+        FairScheduler(default_weight=0)
+
+
+async def test_busy_session_is_passed_over_not_blocked_on():
+    scheduler = FairScheduler(default_max_in_flight=2)
+    scheduler.put("a", "s1-first", session="s1")
+    scheduler.put("a", "s1-second", session="s1")
+    scheduler.put("a", "s2-first", session="s2")
+
+    assert await next_item(scheduler) == "s1-first"
+    # s1 is busy, so the tenant's other slot goes to s2
+    assert await next_item(scheduler) == "s2-first"
+    scheduler.done("a", "s2")
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(scheduler.get(), timeout=0.05)
+
+    scheduler.done("a", "s1")
+    assert await next_item(scheduler) == "s1-second"
+
+
+async def test_item_put_at_front_runs_before_its_session_successors():
+    scheduler = FairScheduler()
+    scheduler.put("a", "newer", session="s1")
+    scheduler.put("a", "older", session="s1", front=True)
+
+    assert await next_item(scheduler) == "older"
+    scheduler.done("a", "s1")
+    assert await next_item(scheduler) == "newer"
+
+
+async def test_retried_item_keeps_its_session_busy_and_comes_back_first():
+    scheduler = FairScheduler(default_max_in_flight=1)
+    scheduler.put("a", "s1-first", session="s1")
+    scheduler.put("a", "s1-second", session="s1")
+    scheduler.put("a", "s2-first", session="s2")
+
+    assert await next_item(scheduler) == "s1-first"
+    scheduler.retry_later("a", "s1", "s1-first", delay=0.05)
+    # The slot is free again, but not for s1's later message
+    assert await next_item(scheduler) == "s2-first"
+    scheduler.done("a", "s2")
+
+    assert await next_item(scheduler) == "s1-first"
+    scheduler.done("a", "s1")
+    assert await next_item(scheduler) == "s1-second"
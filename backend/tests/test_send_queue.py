@@ -0,0 +1,124 @@
+import asyncio
+import json
+
+import pytest
+
+from app.services.ws_hub import SendQueue, SendQueueOverflow
+
+
+def delta(content: str, session: str = "s1") -> str:
+    return json.dumps({"type": "delta", "content": content, "session_id": session})
+
+
+def message(content: str, session: str = "s1") -> str:
+    return json.dumps({"type": "message", "content": content, "session_id": session})
+
+
+async def drain(queue: SendQueue) -> list[str]:
+    return await queue.get_batch(0, 1_000_000)
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        SendQueue(4, "block")
+
+
+async def test_batches_in_order_up_to_max_bytes_but_at_least_one_frame():
+    queue = SendQueue(10, "disconnect")
+    frames = ["a" * 10, "b" * 10, "c" * 10, "d" * 100]
+    for frame in frames:
+        queue.put(frame)
+
+    assert await queue.get_batch(0, 25) == frames[:2]
+    assert await queue.get_batch(0, 25) == frames[2:3]
+    assert await queue.get_batch(0, 25) == frames[3:]
+
+
+async def test_lone_small_frame_waits_for_the_window():
+    queue = SendQueue(10, "disconnect")
+    queue.put(delta("a"))
+
+    async def put_later():
+        await asyncio.sleep(0.01)
+        queue.put(delta("b"))
+
+    putter = asyncio.create_task(put_later())
+    batch = await queue.get_batch(0.05, 1_000)
+    await putter
+    assert batch == [delta("a"), delta("b")]
+
+
+async def test_get_batch_waits_for_a_frame():
+    queue = SendQueue(10, "disconnect")
+    getter = asyncio.create_task(queue.get_batch(0, 1_000))
+    await asyncio.sleep(0)
+    assert not getter.done()
+    queue.put(message("hi"))
+    assert await asyncio.wait_for(getter, 1) == [message("hi")]
+
+
+async def test_drop_deltas_drops_new_deltas_when_full():
+    queue = SendQueue(2, "drop_deltas")
+    queue.put(delta("a"))
+    queue.put(message("m"))
+    queue.put(delta("b"))
+
+    assert not queue.overflowed
+    assert await drain(queue) == [delta("a"), message("m")]
+
+
+async def test_drop_deltas_makes_room_for_other_frames():
+    queue = SendQueue(2, "drop_deltas")
+    queue.put(delta("a"))
+    queue.put(delta("b"))
+    queue.put(message("m"))
+
+    assert await drain(queue) == [message("m")]
+
+
+async def test_coalesce_merges_runs_of_deltas_per_session():
+    queue = SendQueue(5, "coalesce")
+    for frame in [
+        delta("Hel"),
+        delta("lo"),
+        delta("x", session="s2"),
+        delta("y", session="s2"),
+        message("Hello"),
+    ]:
+        queue.put(frame)
+    queue.put(delta("!"))
+
+    frames = [json.loads(frame) for frame in await drain(queue)]
+    assert [(f["type"], f["session_id"], f["content"]) for f in frames] == [
+        ("delta", "s1", "Hello"),
+        ("delta", "s2", "xy"),
+        ("message", "s1", "Hello"),
+        ("delta", "s1", "!"),
+    ]
+
+
+@pytest.mark.parametrize("policy", ["drop_deltas", "coalesce", "disconnect"])
+async def test_overflows_when_nothing_can_give(policy):
+    queue = SendQueue(2, policy)
+    queue.put(message("1"))
+    queue.put(message("2"))
+    queue.put(message("3"))
+
+    assert queue.overflowed
+    with pytest.raises(SendQueueOverflow):
+        await drain(queue)
+    # Frames after the overflow are ignored; the socket is being closed
+    queue.put(message("4"))
+    with pytest.raises(SendQueueOverflow):
+        await drain(queue)
+
+
+async def test_overflow_wakes_a_waiting_sender():
+    queue = SendQueue(1, "disconnect")
+    getter = asyncio.create_task(queue.get_batch(0.05, 1_000))
+    await asyncio.sleep(0)
+    queue.put(message("1"))
+    queue.put(message("2"))
+
+    with pytest.raises(SendQueueOverflow):
+        await asyncio.wait_for(getter, 1)
@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from app.agents.streaming import ResponseFieldParser
+
+TEXTS = [
+    "Plain text answer.",
+    'Quotes "inside", a back\\slash and a /slash/',
+    "Lines\nand\ttabs\r\n",
+    "Accents: café, naïve",
+    "Astral plane: 🍕 and 🎉",
+]
+
+
+def envelope(text: str, ensure_ascii: bool = True) -> str:
+    return json.dumps(
+        {"response": text, "actions": [{"type": "log_event", "event": "x"}]},
+        ensure_ascii=ensure_ascii,
+    )
+
+
+def feed_in_chunks(raw: str, size: int) -> str:
+    parser = ResponseFieldParser()
+    out = "".join(
+        parser.feed(raw[start : start + size]) for start in range(0, len(raw), size)
+    )
+    assert parser.done
+    return out
+
+
+@pytest.mark.parametrize("text", TEXTS)
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7, 1000])
+def test_decodes_response_at_any_chunk_boundary(text, size):
+    assert feed_in_chunks(envelope(text), size) == text
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_decodes_unescaped_unicode(text):
+    assert feed_in_chunks(envelope(text, ensure_ascii=False), 1) == text
+
+
+def test_surrogate_pair_is_held_back_until_complete():
+    parser = ResponseFieldParser()
+    assert parser.feed('{"response": "a\\ud83c') == "a"
+    assert parser.feed("\\udf55") == "🍕"
+    assert parser.feed('"}') == ""
+    assert parser.done
+
+
+def test_tolerates_whitespace_and_fields_before_response():
+    raw = '```json\n{"thought": "x",  "response" :  "hi"}'
+    assert feed_in_chunks(raw, 4) == "hi"
+
+
+def test_ignores_everything_after_the_closing_quote():
+    parser = ResponseFieldParser()
+    assert parser.feed('{"response": "done", "actions": [') == "done"
+    assert parser.feed('{"response": "again"}]}') == ""
+
+
+def test_yields_nothing_before_the_response_field():
+    parser = ResponseFieldParser()
+    assert parser.feed('{"resp') == ""
+    assert parser.feed('onse": "') == ""
+    assert parser.feed("ok") == "ok"
+    assert not parser.done
@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+from app.agents import gateway
+from app.agents.gateway import TokenBucket
+
+real_sleep = asyncio.sleep
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps: list[float] = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+        await real_sleep(0)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(gateway.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(gateway.asyncio, "sleep", clock.sleep)
+    return clock
+
+
+async def test_starts_full_and_acquires_without_waiting(clock):
+    bucket = TokenBucket(60)
+    for _ in range(60):
+        await bucket.acquire()
+    assert clock.sleeps == []
+    assert bucket.tokens == 0
+
+
+async def test_waits_exactly_for_the_missing_tokens(clock):
+    bucket = TokenBucket(60)  # one token per second
+    await bucket.acquire(58)
+    await bucket.acquire(5)
+    assert clock.sleeps == [pytest.approx(3)]
+    assert bucket.tokens == pytest.approx(0)
+
+
+async def test_refills_over_time_up_to_capacity(clock):
+    bucket = TokenBucket(120)
+    await bucket.acquire(120)
+    clock.now += 30
+    bucket._refill()
+    assert bucket.tokens == pytest.approx(60)
+    clock.now += 3600
+    assert bucket.idle()
+    assert bucket.tokens == 120
+
+
+async def test_oversized_requests_are_charged_the_full_bucket(clock):
+    bucket = TokenBucket(60)
+    await bucket.acquire(1000)
+    assert clock.sleeps == []
+    await bucket.acquire(1000)
+    assert clock.sleeps == [pytest.approx(60)]
+
+
+async def test_waiters_are_served_in_arrival_order(clock):
+    bucket = TokenBucket(60)
+    await bucket.acquire(60)
+    served = []
+
+    async def take(name: str, amount: float):
+        await bucket.acquire(amount)
+        served.append(name)
+
+    await asyncio.gather(take("big", 30), take("small", 1))
+    assert served == ["big", "small"]
+
+
+async def test_adjust_charges_and_refunds_but_never_exceeds_capacity(clock):
+    bucket = TokenBucket(100)
+    bucket.adjust(40)
+    assert bucket.tokens == 60
+    # Charges may push the bucket into debt, delaying the next acquire
+    bucket.adjust(100)
+    assert bucket.tokens == -40
+    bucket.adjust(-500)
+    assert bucket.tokens == 100
+
+
+async def test_idle_only_when_full_and_without_waiters(clock):
+    bucket = TokenBucket(60)
+    assert bucket.idle()
+    await bucket.acquire()
+    assert not bucket.idle()
+    clock.now += 1
+    assert bucket.idle()
+
+    async with bucket._lock:
+        assert not bucket.idle()
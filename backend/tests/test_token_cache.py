@@ -0,0 +1,132 @@
+import time
+
+import pytest
+
+from app.core.security import create_access_token, create_refresh_token
+from app.services import token_cache
+from app.services.token_cache import TokenCache, token_digest
+
+
+class FakeRevocations:
+    """Stands in for the Redis revocation list."""
+
+    def __init__(self):
+        self.revoked: set[str] = set()
+        self.checks = 0
+
+    async def is_token_revoked(self, token: str) -> bool:
+        self.checks += 1
+        return token in self.revoked
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    fake = FakeRevocations()
+    monkeypatch.setattr(token_cache, "is_token_revoked", fake.is_token_revoked)
+    return fake
+
+
+def access_token(user_id: int = 1) -> str:
+    return create_access_token(
+        {
+            "user_id": user_id,
+            "tenant_id": 7,
+            "email": f"user{user_id}@example.com",
+            "name": "User",
+            "role": "admin",
+            "tenant_name": "Pizzeria",
+            "tenant_type": "restaurant",
+        }
+    )
+
+
+async def test_miss_verifies_and_later_calls_hit_the_cache(redis):
+    cache = TokenCache()
+    token = access_token()
+
+    first = await cache.authenticate(token)
+    assert first.user_id == 1 and first.tenant_id == 7
+    assert redis.checks == 1
+
+    assert await cache.authenticate(token) == first
+    assert redis.checks == 1
+    assert token not in "".join(cache._entries)
+    assert token_digest(token) in cache._entries
+
+
+@pytest.mark.parametrize(
+    "token", ["not-a-jwt", access_token() + "x", create_refresh_token(1, 7)]
+)
+async def test_invalid_tokens_are_rejected_and_not_cached(redis, token):
+    cache = TokenCache()
+    assert await cache.authenticate(token) is None
+    assert not cache._entries
+
+
+async def test_revoked_in_redis_is_rejected_and_not_cached(redis):
+    cache = TokenCache()
+    token = access_token()
+    redis.revoked.add(token)
+    assert await cache.authenticate(token) is None
+    assert not cache._entries
+
+
+async def test_entry_expires_at_ttl_or_token_exp_whichever_is_first(redis, monkeypatch):
+    cache = TokenCache()
+    token = access_token()
+    data = await cache.authenticate(token)
+    _, expires_at = cache._entries[token_digest(token)]
+    ttl = token_cache.settings.token_cache_ttl_seconds
+    assert expires_at == pytest.approx(min(time.time() + ttl, data.exp), abs=1)
+
+    monkeypatch.setattr(token_cache.settings, "token_cache_ttl_seconds", 10**9)
+    cache.clear()
+    await cache.authenticate(token)
+    assert cache._entries[token_digest(token)][1] == data.exp
+
+
+async def test_expired_entries_are_verified_again(redis, monkeypatch):
+    monkeypatch.setattr(token_cache.settings, "token_cache_ttl_seconds", 0)
+    cache = TokenCache()
+    token = access_token()
+    await cache.authenticate(token)
+    await cache.authenticate(token)
+    assert redis.checks == 2
+
+
+async def test_least_recently_used_entries_are_dropped(redis, monkeypatch):
+    monkeypatch.setattr(token_cache.settings, "token_cache_max_size", 2)
+    cache = TokenCache()
+    one, two, three = (access_token(user_id) for user_id in (1, 2, 3))
+    await cache.authenticate(one)
+    await cache.authenticate(two)
+    await cache.authenticate(one)
+    await cache.authenticate(three)
+    assert list(cache._entries) == [token_digest(one), token_digest(three)]
+
+
+async def test_evict_removes_the_entry_and_blocks_recaching(redis):
+    cache = TokenCache()
+    token = access_token()
+    data = await cache.authenticate(token)
+
+    cache.evict(token_digest(token), data.exp)
+    assert not cache._entries
+    # Redis may not show the marker yet to a verification racing the broadcast
+    assert await cache.authenticate(token) is None
+    assert not cache._entries
+
+
+async def test_evict_prunes_revocations_of_expired_tokens(redis):
+    cache = TokenCache()
+    now = time.time()
+    cache.evict("gone", now - 1)
+    assert "gone" not in cache._revoked
+
+    cache.evict("old", now + 0.05)
+    cache.evict("new", now + 3600)
+    assert set(cache._revoked) == {"old", "new"}
+    time.sleep(0.06)
+    cache.evict("newer", now + 7200)
+    assert set(cache._revoked) == {"new", "newer"}
+    assert sorted(digest for _, digest in cache._revoked_expiry) == ["new", "newer"]
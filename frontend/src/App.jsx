@@ -3,6 +3,12 @@ import { Login } from './components/Login';
 import { Chat } from './components/Chat';
 import { Notifications } from './components/Notifications';
 import { useWebSocket } from './hooks/useWebSocket';
+import { logout, refreshSession } from './services/api';
+
+// Renew the access token this long before it expires, spread over a jitter
+// window so several open tabs don't refresh at the same moment
+const REFRESH_MARGIN_MS = 90 * 1000;
+const REFRESH_JITTER_MS = 30 * 1000;
 
 function App() {
   const [token, setToken] = useState(localStorage.getItem('token'));
@@ -11,6 +17,10 @@ function App() {
     localStorage.getItem('sessionId') || generateSessionId()
   );
   const addMessageRef = useRef(null);
+  const addNotificationRef = useRef(null);
+  // Bumped when missed events can't be replayed, remounting the views so
+  // they reload from the API
+  const [resyncKey, setResyncKey] = useState(0);
 
   // Parse JWT to get user info
   useEffect(() => {
@@ -33,6 +43,36 @@ function App() {
     }
   }, [token]);
 
+  // Renew the access token with the refresh token (no password needed)
+  useEffect(() => {
+    if (!token || !localStorage.getItem('refreshToken')) return;
+
+    let delay = 0;
+    try {
+      const payload = JSON.parse(atob(token.split('.')[1]));
+      delay = Math.max(0, payload.exp * 1000 - Date.now() - REFRESH_MARGIN_MS);
+    } catch (error) {
+      // Refresh right away
+    }
+
+    const timeout = setTimeout(async () => {
+      // Refresh tokens are single use: if another tab already rotated them,
+      // adopt its tokens instead of presenting the spent one
+      const latest = localStorage.getItem('token');
+      if (latest && latest !== token) {
+        setToken(latest);
+        return;
+      }
+      try {
+        handleLogin(await refreshSession(localStorage.getItem('refreshToken')));
+      } catch (error) {
+        console.error('Failed to refresh session:', error);
+        handleLogout();
+      }
+    }, delay + Math.random() * REFRESH_JITTER_MS);
+    return () => clearTimeout(timeout);
+  }, [token]);
+
   // Save session ID
   useEffect(() => {
     localStorage.setItem('sessionId', sessionId);
@@ -40,22 +80,37 @@ function App() {
 
   const handleWebSocketMessage = useCallback((data) => {
     console.log('WebSocket message:', data);
-    if (data.type === 'message' && addMessageRef.current) {
+    if (data.type === 'delta' && addMessageRef.current) {
+      addMessageRef.current(data.content, { partial: true });
+    } else if (data.type === 'message' && addMessageRef.current) {
       addMessageRef.current(data.content);
     } else if (data.type === 'error' && addMessageRef.current) {
       addMessageRef.current(data.content);
+    } else if (data.type === 'notification' && addNotificationRef.current) {
+      addNotificationRef.current(data.notification);
+    } else if (data.type === 'resync') {
+      setResyncKey((key) => key + 1);
     }
   }, []);
 
   const { connected } = useWebSocket(token, handleWebSocketMessage);
 
-  const handleLogin = (accessToken) => {
-    localStorage.setItem('token', accessToken);
-    setToken(accessToken);
+  const handleLogin = ({ access_token, refresh_token }) => {
+    localStorage.setItem('token', access_token);
+    localStorage.setItem('refreshToken', refresh_token);
+    setToken(access_token);
   };
 
   const handleLogout = () => {
+    // Revoke both tokens server-side; the local session ends regardless
+    const refreshToken = localStorage.getItem('refreshToken');
+    if (token && refreshToken) {
+      logout(token, refreshToken).catch((error) =>
+        console.error('Failed to revoke session:', error)
+      );
+    }
     localStorage.removeItem('token');
+    localStorage.removeItem('refreshToken');
     setToken(null);
     setUserInfo(null);
   };
@@ -69,6 +124,10 @@ function App() {
     addMessageRef.current = fn;
   }, []);
 
+  const setAddNotification = useCallback((fn) => {
+    addNotificationRef.current = fn;
+  }, []);
+
   if (!token) {
     return <Login onLogin={handleLogin} />;
   }
@@ -90,7 +149,11 @@ function App() {
           >
             {connected ? '● Connected' : '○ Disconnected'}
           </div>
-          <Notifications token={token} />
+          <Notifications
+            key={resyncKey}
+            token={token}
+            onNewNotification={setAddNotification}
+          />
           <button onClick={handleNewSession} className="btn btn-secondary">
             New Chat
           </button>
@@ -100,7 +163,12 @@ function App() {
         </div>
       </div>
 
-      <Chat token={token} sessionId={sessionId} onNewMessage={setAddMessage} />
+      <Chat
+        key={resyncKey}
+        token={token}
+        sessionId={sessionId}
+        onNewMessage={setAddMessage}
+      />
     </div>
   );
 }
@@ -3,10 +3,12 @@ import { sendMessage, getMessages } from '../services/api';
 
 export function Chat({ token, sessionId, onNewMessage }) {
   const [messages, setMessages] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [input, setInput] = useState('');
   const [loading, setLoading] = useState(false);
   const [sending, setSending] = useState(false);
   const messagesEndRef = useRef(null);
+  const keepScrollRef = useRef(false);
 
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
@@ -17,6 +19,11 @@ export function Chat({ token, sessionId, onNewMessage }) {
   }, [sessionId]);
 
   useEffect(() => {
+    // Loading older messages should not jump to the bottom
+    if (keepScrollRef.current) {
+      keepScrollRef.current = false;
+      return;
+    }
     scrollToBottom();
   }, [messages]);
 
@@ -24,7 +31,8 @@ export function Chat({ token, sessionId, onNewMessage }) {
     setLoading(true);
     try {
       const data = await getMessages(token, sessionId);
-      setMessages(data);
+      setMessages(data.items);
+      setNextCursor(data.next_cursor);
     } catch (error) {
       console.error('Failed to load messages:', error);
     } finally {
@@ -32,6 +40,20 @@ export function Chat({ token, sessionId, onNewMessage }) {
     }
   };
 
+  const loadEarlier = async () => {
+    setLoading(true);
+    try {
+      const data = await getMessages(token, sessionId, { before: nextCursor });
+      keepScrollRef.current = true;
+      setMessages((prev) => [...data.items, ...prev]);
+      setNextCursor(data.next_cursor);
+    } catch (error) {
+      console.error('Failed to load earlier messages:', error);
+    } finally {
+      setLoading(false);
+    }
+  };
+
   const handleSend = async (e) => {
     e.preventDefault();
     if (!input.trim() || sending) return;
@@ -66,16 +88,32 @@ export function Chat({ token, sessionId, onNewMessage }) {
     }
   };
 
-  const addMessage = (content) => {
-    setMessages((prev) => [
-      ...prev,
-      {
-        id: Date.now(),
-        role: 'assistant',
-        content,
-        created_at: new Date().toISOString(),
-      },
-    ]);
+  // Partial (streamed) content is appended to the assistant message being
+  // streamed; the final message replaces it with the complete text.
+  const addMessage = (content, { partial = false } = {}) => {
+    setMessages((prev) => {
+      const last = prev[prev.length - 1];
+      if (last && last.streaming) {
+        return [
+          ...prev.slice(0, -1),
+          {
+            ...last,
+            content: partial ? last.content + content : content,
+            streaming: partial,
+          },
+        ];
+      }
+      return [
+        ...prev,
+        {
+          id: Date.now(),
+          role: 'assistant',
+          content,
+          streaming: partial,
+          created_at: new Date().toISOString(),
+        },
+      ];
+    });
   };
 
   // Expose addMessage to parent
@@ -91,6 +129,11 @@ export function Chat({ token, sessionId, onNewMessage }) {
     <div className="chat-container">
       <div className="messages">
         {loading && <div className="loading">Loading messages...</div>}
+        {!loading && nextCursor && (
+          <button className="btn btn-secondary" onClick={loadEarlier}>
+            Load earlier messages
+          </button>
+        )}
         {messages.map((msg) => (
           <div key={msg.id} className={`message ${msg.role}`}>
             <div className="message-content">{msg.content}</div>
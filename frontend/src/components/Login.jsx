@@ -14,7 +14,7 @@ export function Login({ onLogin }) {
 
     try {
       const data = await login(email, password);
-      onLogin(data.access_token);
+      onLogin(data);
     } catch (err) {
       setError(err.message);
     } finally {
@@ -5,18 +5,37 @@ import {
   markNotificationRead,
 } from '../services/api';
 
-export function Notifications({ token }) {
+// Notifications are pushed over the WebSocket; polling only reconciles the
+// unread count in case a push was missed while disconnected.
+const RECONCILE_INTERVAL_MS = 5 * 60 * 1000;
+
+export function Notifications({ token, onNewNotification }) {
   const [notifications, setNotifications] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [unreadCount, setUnreadCount] = useState(0);
   const [showPanel, setShowPanel] = useState(false);
   const [loading, setLoading] = useState(false);
 
   useEffect(() => {
     loadUnreadCount();
-    const interval = setInterval(loadUnreadCount, 10000); // Poll every 10 seconds
+    const interval = setInterval(loadUnreadCount, RECONCILE_INTERVAL_MS);
     return () => clearInterval(interval);
   }, [token]);
 
+  const addNotification = (notification) => {
+    setNotifications((prev) =>
+      prev.some((n) => n.id === notification.id) ? prev : [notification, ...prev]
+    );
+    if (!notification.read) {
+      setUnreadCount((prev) => prev + 1);
+    }
+  };
+
+  // Expose addNotification to parent
+  useEffect(() => {
+    onNewNotification(addNotification);
+  }, [onNewNotification]);
+
   const loadUnreadCount = async () => {
     try {
       const data = await getUnreadCount(token);
@@ -30,7 +49,8 @@ export function Notifications({ token }) {
     setLoading(true);
     try {
       const data = await getNotifications(token);
-      setNotifications(data);
+      setNotifications(data.items);
+      setNextCursor(data.next_cursor);
     } catch (error) {
       console.error('Failed to load notifications:', error);
     } finally {
@@ -38,6 +58,16 @@ export function Notifications({ token }) {
     }
   };
 
+  const loadMore = async () => {
+    try {
+      const data = await getNotifications(token, { before: nextCursor });
+      setNotifications((prev) => [...prev, ...data.items]);
+      setNextCursor(data.next_cursor);
+    } catch (error) {
+      console.error('Failed to load more notifications:', error);
+    }
+  };
+
   const handleTogglePanel = () => {
     if (!showPanel) {
       loadNotifications();
@@ -112,6 +142,13 @@ export function Notifications({ token }) {
               </div>
             ))
           )}
+          {!loading && nextCursor && (
+            <div style={{ padding: '10px', textAlign: 'center' }}>
+              <button className="btn btn-secondary" onClick={loadMore}>
+                Load more
+              </button>
+            </div>
+          )}
         </div>
       )}
     </div>
@@ -4,12 +4,18 @@ export function useWebSocket(token, onMessage) {
   const [connected, setConnected] = useState(false);
   const wsRef = useRef(null);
   const reconnectTimeoutRef = useRef(null);
+  // Id of the last replayable frame seen, sent back on reconnect so the
+  // server replays only what was missed
+  const lastEventIdRef = useRef(null);
 
   const connect = useCallback(() => {
     if (!token) return;
 
     const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
-    const wsUrl = `${protocol}//${window.location.host}/ws/?token=${token}`;
+    let wsUrl = `${protocol}//${window.location.host}/ws/?token=${token}`;
+    if (lastEventIdRef.current) {
+      wsUrl += `&last_event_id=${encodeURIComponent(lastEventIdRef.current)}`;
+    }
     const ws = new WebSocket(wsUrl);
 
     ws.onopen = () => {
@@ -20,7 +26,14 @@ export function useWebSocket(token, onMessage) {
     ws.onmessage = (event) => {
       try {
         const data = JSON.parse(event.data);
-        onMessage(data);
+        // Small frames may arrive together as one batch, in order
+        const frames = data.type === 'batch' ? data.frames : [data];
+        for (const frame of frames) {
+          if (frame.event_id) {
+            lastEventIdRef.current = frame.event_id;
+          }
+          onMessage(frame);
+        }
       } catch (error) {
         console.error('Failed to parse WebSocket message:', error);
       }
@@ -50,7 +63,11 @@ export function useWebSocket(token, onMessage) {
         clearTimeout(reconnectTimeoutRef.current);
       }
       if (wsRef.current) {
+        // Closed on purpose (e.g. a refreshed token): don't auto-reconnect,
+        // the effect connects again with the new token
+        wsRef.current.onclose = null;
         wsRef.current.close();
+        setConnected(false);
       }
     };
   }, [connect]);
@@ -15,6 +15,31 @@ export async function login(email, password) {
   return response.json();
 }
 
+export async function refreshSession(refreshToken) {
+  const response = await fetch(`${API_BASE}/auth/refresh`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ refresh_token: refreshToken }),
+  });
+
+  if (!response.ok) {
+    throw new Error('Session expired');
+  }
+
+  return response.json();
+}
+
+export async function logout(token, refreshToken) {
+  await fetch(`${API_BASE}/auth/logout`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      'Authorization': `Bearer ${token}`,
+    },
+    body: JSON.stringify({ refresh_token: refreshToken }),
+  });
+}
+
 export async function sendMessage(token, content, sessionId) {
   const response = await fetch(`${API_BASE}/messages`, {
     method: 'POST',
@@ -32,8 +57,19 @@ export async function sendMessage(token, content, sessionId) {
   return response.json();
 }
 
-export async function getMessages(token, sessionId) {
-  const response = await fetch(`${API_BASE}/messages?session_id=${sessionId}`, {
+// Paginated endpoints return { items, next_cursor }; pass next_cursor back
+// as `before` to load the previous (older) page.
+function pageParams({ before, limit } = {}) {
+  const params = new URLSearchParams();
+  if (before) params.set('before', before);
+  if (limit) params.set('limit', limit);
+  return params;
+}
+
+export async function getMessages(token, sessionId, options) {
+  const params = pageParams(options);
+  params.set('session_id', sessionId);
+  const response = await fetch(`${API_BASE}/messages?${params}`, {
     headers: { 'Authorization': `Bearer ${token}` },
   });
 
@@ -44,8 +80,8 @@ export async function getMessages(token, sessionId) {
   return response.json();
 }
 
-export async function getNotifications(token) {
-  const response = await fetch(`${API_BASE}/notifications`, {
+export async function getNotifications(token, options) {
+  const response = await fetch(`${API_BASE}/notifications?${pageParams(options)}`, {
     headers: { 'Authorization': `Bearer ${token}` },
   });
 
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""Login throughput benchmark: logins per second per core.
+
+In-process mode (default) verifies one bcrypt hash repeatedly through the
+same bounded pool the login endpoint uses, while a ticker task measures how
+long the event loop stalls. --inline verifies on the loop instead, as the
+endpoint used to, for comparison.
+
+HTTP mode (--base-url) drives POST /api/auth/login of a running API with an
+existing account, e.g. one created by scripts/seed_data.py:
+
+    python scripts/bench_login.py --logins 200 --concurrency 32
+    python scripts/bench_login.py --base-url http://localhost:8000 \\
+        --email mario@pizza.com --password password123
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+# Set working directory to project root for .env loading
+project_root = Path(__file__).parent.parent
+os.chdir(project_root)
+
+# Add backend to path
+sys.path.insert(0, str(project_root / "backend"))
+
+import httpx
+
+from app.core.security import (
+    PasswordHasherBusy,
+    get_password_hash,
+    password_hash_workers,
+    verify_password,
+    verify_password_async,
+)
+
+from bench_stats import summarize
+
+
+async def measure_loop_lag(lags: list[float], stop: asyncio.Event, interval=0.01):
+    """Record how late each short sleep wakes up."""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, time.perf_counter() - started - interval))
+
+
+async def run_in_process(args: argparse.Namespace) -> dict:
+    hashed = get_password_hash(args.password)
+    latencies: list[float] = []
+    outcomes: Counter = Counter()
+    remaining = iter(range(args.logins))
+
+    async def login_loop():
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                if args.inline:
+                    ok = verify_password(args.password, hashed)
+                else:
+                    ok = await verify_password_async(args.password, hashed)
+                outcomes["ok" if ok else "invalid"] += 1
+            except PasswordHasherBusy:
+                outcomes["busy"] += 1
+            latencies.append(time.perf_counter() - started)
+
+    lags: list[float] = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(measure_loop_lag(lags, stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(login_loop() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await ticker
+
+    cores = 1 if args.inline else min(password_hash_workers(), os.cpu_count() or 1)
+    return {
+        "mode": "inline" if args.inline else "pool",
+        "workers": 1 if args.inline else password_hash_workers(),
+        "cores": cores,
+        "outcomes": dict(outcomes),
+        "logins_per_second": round(outcomes["ok"] / elapsed, 2),
+        "logins_per_second_per_core": round(outcomes["ok"] / elapsed / cores, 2),
+        "latency_ms": summarize(latencies),
+        "loop_lag_ms": summarize(lags),
+    }
+
+
+async def run_http(args: argparse.Namespace) -> dict:
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+    remaining = iter(range(args.logins))
+    body = {"email": args.email, "password": args.password}
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as client:
+
+        async def login_loop():
+            for _ in remaining:
+                started = time.perf_counter()
+                response = await client.post("/api/auth/login", json=body)
+                latencies.append(time.perf_counter() - started)
+                statuses[response.status_code] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(login_loop() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "mode": "http",
+        "cores": args.server_cores,
+        "statuses": dict(statuses),
+        "logins_per_second": round(statuses[200] / elapsed, 2),
+        "logins_per_second_per_core": round(
+            statuses[200] / elapsed / args.server_cores, 2
+        ),
+        "latency_ms": summarize(latencies),
+    }
+
+
+async def main(args: argparse.Namespace):
+    if args.base_url:
+        result = await run_http(args)
+    else:
+        result = await run_in_process(args)
+    result.update({"logins": args.logins, "concurrency": args.concurrency})
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--password", default="password123")
+    parser.add_argument(
+        "--inline", action="store_true", help="verify on the event loop (old path)"
+    )
+    parser.add_argument("--base-url", help="benchmark a running API instead")
+    parser.add_argument("--email", default="mario@pizza.com")
+    parser.add_argument(
+        "--server-cores",
+        type=int,
+        default=os.cpu_count(),
+        help="CPU cores available to the API, for the per-core figure",
+    )
+    asyncio.run(main(parser.parse_args()))
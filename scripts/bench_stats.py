@@ -0,0 +1,22 @@
+"""Latency summaries shared by the benchmark and load-test scripts."""
+import math
+
+
+def summarize(values: list[float]) -> dict:
+    """Count, mean and percentiles of latencies given in seconds, as ms."""
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def percentile(p: float) -> float:
+        index = min(len(ordered) - 1, math.ceil(p * len(ordered)) - 1)
+        return round(ordered[index] * 1000, 2)
+
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered) * 1000, 2),
+        "p50": percentile(0.50),
+        "p95": percentile(0.95),
+        "p99": percentile(0.99),
+        "max": round(ordered[-1] * 1000, 2),
+    }
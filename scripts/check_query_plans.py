@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Query-plan regression check for the hot read paths.
+
+Runs EXPLAIN on the exact queries the endpoints build (conversation pages,
+memory hydration, the notification feed and the unread count) and exits
+non-zero if any of them scans messages or notifications sequentially.
+
+Plans depend on table sizes, so run it against a database seeded with
+scripts/generate_synthetic_data.py; on a near-empty database Postgres
+rightly prefers seq scans.
+
+    python scripts/check_query_plans.py [--analyze]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+
+# Set working directory to project root for .env loading
+project_root = Path(__file__).parent.parent
+os.chdir(project_root)
+
+# Add backend to path
+sys.path.insert(0, str(project_root / "backend"))
+
+from sqlalchemy import select
+
+from app.agents.memory import history_query
+from app.core.database import async_session_maker, engine
+from app.core.pagination import encode_cursor
+from app.models import Message, Notification
+from app.routers.messages import conversation_page_query
+from app.routers.notifications import feed_page_query
+from app.services.unread_counts import unread_count_query
+
+# Tables that must never be read with a sequential scan on these paths
+CHECKED_TABLES = {"messages", "notifications"}
+PAGE_SIZE = 50
+
+
+def plan_nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+async def explain(conn, query, analyze: bool) -> dict:
+    compiled = query.compile(dialect=engine.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup or ())
+    options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+    result = await conn.exec_driver_sql(f"EXPLAIN ({options}) {compiled}", params)
+    output = result.scalar()
+    return (json.loads(output) if isinstance(output, str) else output)[0]
+
+
+async def build_cases() -> dict:
+    """Queries to check, for the most recent conversation and recipient."""
+    async with async_session_maker() as session:
+        message = await session.scalar(
+            select(Message).order_by(Message.id.desc()).limit(1)
+        )
+        notification = await session.scalar(
+            select(Notification).order_by(Notification.id.desc()).limit(1)
+        )
+        if message is None or notification is None:
+            sys.exit("No messages or notifications found; seed the database first")
+
+        conversation = (message.tenant_id, message.user_id, message.session_id)
+        recipient = (notification.tenant_id, notification.to_user_id)
+
+        # Cursors from the first page, as a client paging back would send
+        first_page = (
+            (await session.execute(conversation_page_query(*conversation, PAGE_SIZE)))
+            .scalars()
+            .all()
+        )
+        feed_page = (
+            await session.execute(feed_page_query(*recipient, PAGE_SIZE))
+        ).all()
+
+    message_cursor = encode_cursor(first_page[-1].created_at, first_page[-1].id)
+    feed_cursor = encode_cursor(feed_page[-1][0].created_at, feed_page[-1][0].id)
+    return {
+        "conversation page": conversation_page_query(*conversation, PAGE_SIZE),
+        "conversation page (before)": conversation_page_query(
+            *conversation, PAGE_SIZE, before=message_cursor
+        ),
+        "conversation page (after)": conversation_page_query(
+            *conversation, PAGE_SIZE, after=message_cursor
+        ),
+        "memory hydration": history_query(*conversation, 50),
+        "notification feed": feed_page_query(*recipient, PAGE_SIZE),
+        "notification feed (before)": feed_page_query(
+            *recipient, PAGE_SIZE, before=feed_cursor
+        ),
+        "unread count": unread_count_query(*recipient),
+    }
+
+
+async def main(args: argparse.Namespace) -> int:
+    cases = await build_cases()
+    failures = 0
+    async with engine.connect() as conn:
+        for name, query in cases.items():
+            result = await explain(conn, query, args.analyze)
+            nodes = list(plan_nodes(result["Plan"]))
+            seq_scans = sorted(
+                {
+                    node["Relation Name"]
+                    for node in nodes
+                    if node["Node Type"] == "Seq Scan"
+                    and node.get("Relation Name") in CHECKED_TABLES
+                }
+            )
+            indexes = sorted(
+                {node["Index Name"] for node in nodes if "Index Name" in node}
+            )
+
+            status = "FAIL" if seq_scans else "ok"
+            failures += bool(seq_scans)
+            line = f"{status:4}  {name:28} indexes: {', '.join(indexes) or '-'}"
+            if seq_scans:
+                line += f"  seq scan on: {', '.join(seq_scans)}"
+            if args.analyze:
+                line += f"  ({result['Execution Time']:.2f} ms)"
+            print(line)
+            if args.verbose:
+                print(json.dumps(result["Plan"], indent=2))
+    await engine.dispose()
+
+    if failures:
+        print(f"\n{failures} query plan(s) regressed to sequential scans")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument(
+        "--analyze", action="store_true", help="execute queries and show timings"
+    )
+    parser.add_argument("--verbose", action="store_true", help="print full plans")
+    sys.exit(asyncio.run(main(parser.parse_args())))
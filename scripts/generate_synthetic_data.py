@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""Generate production-scale synthetic data with COPY.
+
+Creates tenants, users, messages, notifications and knowledge in bulk
+through asyncpg's binary COPY, so tens of millions of rows load in minutes
+instead of hours. Output is deterministic for a given --seed and sizes:
+ids are assigned up front (after the current max id), and every row is
+drawn from a seeded random generator.
+
+All users share one password hash computed at start-up (bcrypt is far too
+slow to run per user), so any generated account logs in with --password.
+
+    python scripts/generate_synthetic_data.py --tenants 10000 \\
+        --users-per-tenant 100 --messages 20000000 --notifications 5000000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Set working directory to project root for .env loading
+project_root = Path(__file__).parent.parent
+os.chdir(project_root)
+
+# Add backend to path
+sys.path.insert(0, str(project_root / "backend"))
+
+import asyncpg
+
+from app.core.config import get_settings
+from app.core.security import get_password_hash
+from app.models.tenant_knowledge import knowledge_content_hash
+from app.services.redis_service import TENANT_REGISTRY_KEY, close_redis, get_redis
+
+settings = get_settings()
+
+TENANT_TYPES = ["restaurant", "property", "retail", "clinic"]
+ROLES = {
+    "restaurant": ["employee", "employee", "employee", "manager"],
+    "property": ["tenant", "tenant", "tenant", "manager"],
+    "retail": ["employee", "employee", "manager"],
+    "clinic": ["employee", "employee", "manager"],
+}
+QUESTIONS = [
+    "When is the next delivery scheduled?",
+    "Who is working the morning shift tomorrow?",
+    "Can you remind everyone about the cleaning on Tuesday?",
+    "Is the kitchen open on public holidays?",
+    "Please let the manager know the fridge is broken.",
+    "What are the quiet hours again?",
+    "I will be late today, can someone cover for me?",
+    "Where do I report a maintenance issue?",
+]
+ANSWERS = [
+    "Deliveries are accepted between 8am and 11am on weekdays.",
+    "I have notified the team about the change.",
+    "The cleaning is scheduled for Tuesday at 10am.",
+    "Quiet hours are from 10pm to 8am.",
+    "I'll let the manager know right away.",
+    "Please check the staff roster for shift times.",
+]
+KNOWLEDGE = [
+    ("schedule", "Business hours for location {n}: open {a}am to {b}pm daily."),
+    ("schedule", "Deliveries for dock {n} arrive between {a}am and {b}am."),
+    ("rules", "Rule {n}: staff must report {a} minutes before their shift."),
+    ("rules", "Policy {n}: common areas are cleaned every {a} days."),
+    ("roster", "Team {n} covers shifts from {a}am to {b}pm on weekdays."),
+]
+
+
+def dsn() -> str:
+    return settings.database_url.replace("postgresql+asyncpg://", "postgresql://")
+
+
+def _skewed(rng: random.Random, n: int, skew: float) -> int:
+    """Index in [0, n) where low indexes are picked far more often."""
+    return min(n - 1, int(n * rng.random() ** skew))
+
+
+class Generator:
+    def __init__(self, args: argparse.Namespace, base_ids: dict[str, int]):
+        self.args = args
+        self.base = base_ids
+        self.rng = random.Random(args.seed)
+        self.now = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        self.start = self.now - timedelta(days=args.days)
+        self.span = (self.now - self.start).total_seconds()
+        self.password_hash = get_password_hash(args.password)
+        self.tenant_types: list[str] = []
+
+    def tenant_id(self, index: int) -> int:
+        return self.base["tenants"] + 1 + index
+
+    def user_id(self, tenant_index: int, index: int) -> int:
+        offset = tenant_index * self.args.users_per_tenant + index
+        return self.base["users"] + 1 + offset
+
+    def timestamp(self) -> datetime:
+        return self.start + timedelta(seconds=self.rng.random() * self.span)
+
+    def tenants(self):
+        for t in range(self.args.tenants):
+            tenant_type = self.rng.choice(TENANT_TYPES)
+            self.tenant_types.append(tenant_type)
+            yield (
+                self.tenant_id(t),
+                f"Synthetic {tenant_type} {self.args.seed}-{t}",
+                tenant_type,
+                self.start,
+            )
+
+    def users(self):
+        for t in range(self.args.tenants):
+            roles = ROLES[self.tenant_types[t]]
+            for u in range(self.args.users_per_tenant):
+                user_id = self.user_id(t, u)
+                yield (
+                    user_id,
+                    self.tenant_id(t),
+                    f"user{user_id}-{self.args.seed}@synthetic.local",
+                    f"User {user_id}",
+                    self.password_hash,
+                    "manager" if u == 0 else self.rng.choice(roles),
+                    self.start,
+                )
+
+    def messages(self):
+        """User/assistant pairs in a few sessions per user, hot users skewed."""
+        message_id = self.base["messages"]
+        for _ in range(self.args.messages // 2):
+            t = _skewed(self.rng, self.args.tenants, self.args.skew)
+            u = _skewed(self.rng, self.args.users_per_tenant, self.args.skew)
+            session_number = self.rng.randrange(self.args.sessions_per_user)
+            session = f"synthetic-{self.user_id(t, u)}-{session_number}"
+            created_at = self.timestamp()
+            for role, content, delay in (
+                ("user", self.rng.choice(QUESTIONS), 0),
+                ("assistant", self.rng.choice(ANSWERS), 2),
+            ):
+                message_id += 1
+                yield (
+                    message_id,
+                    self.tenant_id(t),
+                    self.user_id(t, u),
+                    session,
+                    role,
+                    content,
+                    created_at + timedelta(seconds=delay),
+                )
+
+    def notifications(self):
+        """Mostly read; the newer a notification, the likelier it is unread."""
+        users = self.args.users_per_tenant
+        for n in range(self.args.notifications):
+            t = _skewed(self.rng, self.args.tenants, self.args.skew)
+            from_user = self.rng.randrange(users)
+            to_user = _skewed(self.rng, users, self.args.skew)
+            created_at = self.timestamp()
+            age = (self.now - created_at).total_seconds() / self.span
+            yield (
+                self.base["notifications"] + 1 + n,
+                self.tenant_id(t),
+                self.user_id(t, from_user),
+                self.user_id(t, to_user),
+                self.rng.choice(QUESTIONS),
+                self.rng.random() < 0.5 + age,
+                created_at,
+            )
+
+    def knowledge(self):
+        knowledge_id = self.base["tenant_knowledge"]
+        for t in range(self.args.tenants):
+            for k in range(self.args.knowledge_per_tenant):
+                category, template = self.rng.choice(KNOWLEDGE)
+                content = template.format(
+                    n=k + 1, a=self.rng.randint(5, 11), b=self.rng.randint(1, 11)
+                )
+                knowledge_id += 1
+                yield (
+                    knowledge_id,
+                    self.tenant_id(t),
+                    content,
+                    category,
+                    knowledge_content_hash(content),
+                    self.start,
+                )
+
+
+COLUMNS = {
+    "tenants": ["id", "name", "type", "created_at"],
+    "users": [
+        "id",
+        "tenant_id",
+        "email",
+        "name",
+        "password_hash",
+        "role",
+        "created_at",
+    ],
+    "messages": [
+        "id",
+        "tenant_id",
+        "user_id",
+        "session_id",
+        "role",
+        "content",
+        "created_at",
+    ],
+    "notifications": [
+        "id",
+        "tenant_id",
+        "from_user_id",
+        "to_user_id",
+        "message",
+        "read",
+        "created_at",
+    ],
+    "tenant_knowledge": [
+        "id",
+        "tenant_id",
+        "content",
+        "category",
+        "content_hash",
+        "created_at",
+    ],
+}
+
+
+async def copy_rows(conn: asyncpg.Connection, table: str, rows, batch_size: int):
+    """COPY rows into a table in batches, each in its own transaction."""
+    started = time.perf_counter()
+    total = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            await conn.copy_records_to_table(
+                table, records=batch, columns=COLUMNS[table]
+            )
+            total += len(batch)
+            batch = []
+            print(f"  {table}: {total:,} rows", end="\r", flush=True)
+    if batch:
+        await conn.copy_records_to_table(table, records=batch, columns=COLUMNS[table])
+        total += len(batch)
+
+    # Keep the serial sequence ahead of the explicit ids
+    await conn.execute(
+        f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+        f"(SELECT COALESCE(MAX(id), 1) FROM {table}))"
+    )
+    elapsed = time.perf_counter() - started
+    print(f"  {table}: {total:,} rows in {elapsed:.1f}s ({total / elapsed:,.0f}/s)")
+
+
+async def main(args: argparse.Namespace):
+    conn = await asyncpg.connect(dsn())
+    try:
+        if args.truncate:
+            await conn.execute(
+                "TRUNCATE tenants, users, messages, notifications, tenant_knowledge "
+                "RESTART IDENTITY CASCADE"
+            )
+        base_ids = {
+            table: await conn.fetchval(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+            for table in COLUMNS
+        }
+
+        generator = Generator(args, base_ids)
+        print(f"Generating synthetic data with seed {args.seed}")
+        await copy_rows(conn, "tenants", generator.tenants(), args.batch_size)
+        await copy_rows(conn, "users", generator.users(), args.batch_size)
+        await copy_rows(
+            conn, "tenant_knowledge", generator.knowledge(), args.batch_size
+        )
+        await copy_rows(conn, "messages", generator.messages(), args.batch_size)
+        await copy_rows(
+            conn, "notifications", generator.notifications(), args.batch_size
+        )
+
+        print("Analyzing tables")
+        await conn.execute(
+            "ANALYZE tenants, users, messages, notifications, tenant_knowledge"
+        )
+    finally:
+        await conn.close()
+
+    # Announce tenants to running workers without marking their streams active
+    redis = await get_redis()
+    tenant_ids = [str(generator.tenant_id(t)) for t in range(args.tenants)]
+    for start in range(0, len(tenant_ids), 10_000):
+        await redis.sadd(TENANT_REGISTRY_KEY, *tenant_ids[start : start + 10_000])
+    await close_redis()
+
+    print(
+        f"Done. Users log in with password {args.password!r}; knowledge "
+        "embeddings are backfilled in the background when a worker loads each tenant."
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--tenants", type=int, default=10_000)
+    parser.add_argument("--users-per-tenant", type=int, default=100)
+    parser.add_argument("--messages", type=int, default=20_000_000)
+    parser.add_argument("--notifications", type=int, default=5_000_000)
+    parser.add_argument("--knowledge-per-tenant", type=int, default=20)
+    parser.add_argument("--sessions-per-user", type=int, default=5)
+    parser.add_argument(
+        "--skew",
+        type=float,
+        default=2.0,
+        help="activity skew towards low-index tenants and users (1 = uniform)",
+    )
+    parser.add_argument("--days", type=int, default=180, help="history time span")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--password", default="password123")
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    parser.add_argument(
+        "--truncate", action="store_true", help="empty all tables before loading"
+    )
+    asyncio.run(main(parser.parse_args()))
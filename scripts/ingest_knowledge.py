@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""Ingest text files into a tenant's knowledge base.
+
+Usage:
+    python scripts/ingest_knowledge.py --tenant-id 1 --category rules docs/*.md
+"""
+import argparse
+import asyncio
+import sys
+import os
+from pathlib import Path
+
+# Set working directory to project root for .env loading
+project_root = Path(__file__).parent.parent
+os.chdir(project_root)
+
+# Add backend to path
+sys.path.insert(0, str(project_root / "backend"))
+
+from app.core.database import async_session_maker, engine
+from app.services.ingestion import ingest_documents
+from app.services.redis_service import close_redis
+
+
+async def ingest(tenant_id: int, category: str, paths: list[Path]):
+    documents = [(path.read_text(encoding="utf-8"), category) for path in paths]
+
+    async with async_session_maker() as session:
+        result = await ingest_documents(session, tenant_id, documents)
+
+    await close_redis()
+    await engine.dispose()
+
+    print(f"Ingested {len(paths)} documents into tenant {tenant_id}:")
+    print(f"  chunks:     {result.chunks}")
+    print(f"  inserted:   {result.inserted}")
+    print(f"  duplicates: {result.duplicates}")
+    print(f"  embedded:   {result.embedded}")
+    print(f"  cache hits: {result.cache_hits}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tenant-id", type=int, required=True)
+    parser.add_argument("--category", default="document")
+    parser.add_argument("files", nargs="+", type=Path)
+    args = parser.parse_args()
+    asyncio.run(ingest(args.tenant_id, args.category, args.files))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""End-to-end load test: POST /api/messages to WebSocket delivery.
+
+Seeds throwaway tenants and users, opens one WebSocket per user and sends
+messages at a fixed open-loop rate (Poisson arrivals) through the HTTP API.
+Each message gets its own session id, so the final "message" frame on the
+socket can be matched to the request that produced it.
+
+The API must already be running. The worker either runs separately (start it
+with LLM_PROVIDER=simulated) or inside this process with --in-process-worker,
+which uses the simulated LLM unless LLM_PROVIDER is set.
+
+Results are written as JSON for comparison between commits:
+
+    python scripts/loadtest.py --tenants 20 --users 10 --rate 50 \\
+        --duration 60 --in-process-worker --output loadtest.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+
+# Set working directory to project root for .env loading
+project_root = Path(__file__).parent.parent
+os.chdir(project_root)
+
+# Add backend to path
+sys.path.insert(0, str(project_root / "backend"))
+
+os.environ.setdefault("LLM_PROVIDER", "simulated")
+os.environ.setdefault("EMBEDDING_PROVIDER", "local")
+os.environ.setdefault("WORKER_HEARTBEAT_INTERVAL_SECONDS", "1")
+
+import httpx
+import websockets
+
+from app.core.database import async_session_maker, engine, Base
+from app.core.security import create_access_token, get_password_hash
+from app.models import Tenant, User
+from app.services.redis_service import close_redis, get_redis, register_tenant
+
+from bench_stats import summarize
+
+
+async def seed(run_id: str, tenants: int, users: int) -> list[dict]:
+    """Create tenants and users for this run and mint their access tokens."""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    # One bcrypt hash for everyone; nobody logs in with it
+    password_hash = get_password_hash(uuid.uuid4().hex)
+    async with async_session_maker() as session:
+        tenant_rows = [
+            Tenant(name=f"Load test {run_id} #{t}", type="restaurant")
+            for t in range(tenants)
+        ]
+        session.add_all(tenant_rows)
+        await session.flush()
+
+        user_rows = [
+            User(
+                tenant_id=tenant.id,
+                email=f"lt-{run_id}-{t}-{u}@loadtest.local",
+                name=f"User {t}-{u}",
+                password_hash=password_hash,
+                role="manager" if u == 0 else "employee",
+            )
+            for t, tenant in enumerate(tenant_rows)
+            for u in range(users)
+        ]
+        session.add_all(user_rows)
+        await session.commit()
+
+    for tenant in tenant_rows:
+        await register_tenant(tenant.id)
+
+    tenants_by_id = {tenant.id: tenant for tenant in tenant_rows}
+    return [
+        {
+            "user_id": user.id,
+            "tenant_id": user.tenant_id,
+            "role": user.role,
+            "token": create_access_token(
+                {
+                    "user_id": user.id,
+                    "tenant_id": user.tenant_id,
+                    "email": user.email,
+                    "name": user.name,
+                    "role": user.role,
+                    "tenant_name": tenants_by_id[user.tenant_id].name,
+                    "tenant_type": tenants_by_id[user.tenant_id].type,
+                }
+            ),
+        }
+        for user in user_rows
+    ]
+
+
+class LoadTest:
+    def __init__(self, args: argparse.Namespace, users: list[dict]):
+        self.args = args
+        self.users = users
+        self.sent: dict[str, float] = {}  # session id -> send time
+        self.first_delta: set[str] = set()
+        self.enqueue_latencies: list[float] = []
+        self.first_delta_latencies: list[float] = []
+        self.latencies: list[float] = []
+        self.http_errors = 0
+        self.error_frames = 0
+        self.queue_lag: list[int] = []
+        self.pool_checked_out: list[int] = []
+        self.pool_size = 0
+        self.done = asyncio.Event()
+
+    async def listen(self, user: dict):
+        ws_url = self.args.base_url.replace("http", "ws", 1)
+        async with websockets.connect(f"{ws_url}/ws/?token={user['token']}") as ws:
+            user["connected"].set()
+            async for raw in ws:
+                data = json.loads(raw)
+                # Small frames sent close together arrive as one batch
+                frames = data["frames"] if data["type"] == "batch" else [data]
+                for frame in frames:
+                    self.record(frame)
+
+    def record(self, frame: dict):
+        session_id = frame.get("session_id")
+        if session_id not in self.sent:
+            return
+        elapsed = time.perf_counter() - self.sent[session_id]
+        if frame["type"] == "delta":
+            if session_id not in self.first_delta:
+                self.first_delta.add(session_id)
+                self.first_delta_latencies.append(elapsed)
+        elif frame["type"] in ("message", "error"):
+            del self.sent[session_id]
+            if frame["type"] == "error":
+                self.error_frames += 1
+            else:
+                self.latencies.append(elapsed)
+
+    async def send(self, client: httpx.AsyncClient, user: dict, index: int):
+        session_id = f"lt-{uuid.uuid4().hex[:12]}"
+        started = time.perf_counter()
+        self.sent[session_id] = started
+        try:
+            response = await client.post(
+                "/api/messages",
+                json={
+                    "session_id": session_id,
+                    "content": f"Load test message {index}: is the delivery "
+                    "still scheduled for tomorrow morning?",
+                },
+                headers={"Authorization": f"Bearer {user['token']}"},
+            )
+            response.raise_for_status()
+        except httpx.HTTPError:
+            self.http_errors += 1
+            self.sent.pop(session_id, None)
+            return
+        # The reply may already have arrived and removed sent[session_id]
+        self.enqueue_latencies.append(time.perf_counter() - started)
+
+    async def drive(self, client: httpx.AsyncClient) -> int:
+        """Send messages at the target rate for the configured duration."""
+        rng = random.Random(self.args.seed)
+        tasks = []
+        deadline = time.perf_counter() + self.args.duration
+        next_at = time.perf_counter()
+        while next_at < deadline:
+            await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+            user = rng.choice(self.users)
+            tasks.append(asyncio.create_task(self.send(client, user, len(tasks))))
+            next_at += rng.expovariate(self.args.rate)
+        await asyncio.gather(*tasks)
+        return len(tasks)
+
+    async def sample(self, client: httpx.AsyncClient):
+        """Record queue lag and DB pool usage once per second."""
+        redis = await get_redis()
+        stream_keys = [f"messages:{tenant_id}" for tenant_id in self.tenant_ids()]
+        # GET /api/metrics is restricted to managers
+        manager = next(user for user in self.users if user["role"] == "manager")
+        headers = {"Authorization": f"Bearer {manager['token']}"}
+        while not self.done.is_set():
+            lag = 0
+            for stream_key in stream_keys:
+                try:
+                    for group in await redis.xinfo_groups(stream_key):
+                        lag += (group.get("lag") or 0) + group.get("pending", 0)
+                except Exception:
+                    pass  # stream not created yet
+            self.queue_lag.append(lag)
+
+            try:
+                snapshot = (await client.get("/api/metrics", headers=headers)).json()
+                processes = [snapshot["api"], *snapshot["workers"].values()]
+                gauges = [process["gauges"] for process in processes]
+                self.pool_checked_out.append(
+                    sum(g.get("db.pool.checked_out", 0) for g in gauges)
+                )
+                self.pool_size = max(
+                    self.pool_size, sum(g.get("db.pool.size", 0) for g in gauges)
+                )
+            except (httpx.HTTPError, KeyError, ValueError):
+                pass
+            await asyncio.sleep(1)
+
+    def tenant_ids(self) -> set[int]:
+        return {user["tenant_id"] for user in self.users}
+
+    async def run(self) -> dict:
+        for user in self.users:
+            user["connected"] = asyncio.Event()
+        listeners = [asyncio.create_task(self.listen(user)) for user in self.users]
+        await asyncio.wait_for(
+            asyncio.gather(*(user["connected"].wait() for user in self.users)),
+            timeout=30,
+        )
+
+        limits = httpx.Limits(max_connections=self.args.connections)
+        async with httpx.AsyncClient(
+            base_url=self.args.base_url, limits=limits, timeout=30
+        ) as client:
+            sampler = asyncio.create_task(self.sample(client))
+            started = time.perf_counter()
+            sent = await self.drive(client)
+
+            drain_deadline = time.perf_counter() + self.args.drain
+            while self.sent and time.perf_counter() < drain_deadline:
+                await asyncio.sleep(0.1)
+            elapsed = time.perf_counter() - started
+            self.done.set()
+            await sampler
+
+        for listener in listeners:
+            listener.cancel()
+        await asyncio.gather(*listeners, return_exceptions=True)
+
+        return {
+            "sent": sent,
+            "completed": len(self.latencies),
+            "http_errors": self.http_errors,
+            "error_frames": self.error_frames,
+            "timed_out": len(self.sent),
+            "elapsed_seconds": round(elapsed, 2),
+            "throughput_per_second": round(len(self.latencies) / elapsed, 2),
+            "end_to_end_ms": summarize(self.latencies),
+            "first_delta_ms": summarize(self.first_delta_latencies),
+            "enqueue_ms": summarize(self.enqueue_latencies),
+            "queue_lag": {
+                "max": max(self.queue_lag, default=0),
+                "mean": round(sum(self.queue_lag) / max(len(self.queue_lag), 1), 2),
+            },
+            "db_pool": {
+                "size": self.pool_size,
+                "max_checked_out": max(self.pool_checked_out, default=0),
+                "mean_checked_out": round(
+                    sum(self.pool_checked_out) / max(len(self.pool_checked_out), 1),
+                    2,
+                ),
+            },
+        }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main(args: argparse.Namespace):
+    run_id = uuid.uuid4().hex[:8]
+    users = await seed(run_id, args.tenants, args.users)
+    print(f"Seeded {args.tenants} tenants and {len(users)} users (run {run_id})")
+
+    worker_task = None
+    if args.in_process_worker:
+        from app.services.worker import MessageWorker
+
+        worker = MessageWorker()
+        worker_task = asyncio.create_task(worker.start())
+
+    try:
+        results = await LoadTest(args, users).run()
+    finally:
+        if worker_task:
+            await worker.stop()
+            await worker_task
+        await close_redis()
+        await engine.dispose()
+
+    report = {
+        "commit": git_commit(),
+        "run_id": run_id,
+        "config": {
+            key: value for key, value in vars(args).items() if key not in ("output",)
+        },
+        "llm_provider": os.environ.get("LLM_PROVIDER"),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+        print(f"Results written to {args.output}")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--tenants", type=int, default=5)
+    parser.add_argument("--users", type=int, default=5, help="users per tenant")
+    parser.add_argument("--rate", type=float, default=10, help="messages per second")
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument(
+        "--drain", type=float, default=60, help="seconds to wait for replies"
+    )
+    parser.add_argument("--connections", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--in-process-worker", action="store_true")
+    parser.add_argument("--output", help="write JSON results to this file")
+    asyncio.run(main(parser.parse_args()))
@@ -16,6 +16,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import async_session_maker, engine, Base
 from app.core.security import get_password_hash
 from app.models import Tenant, User, TenantKnowledge
+from app.services.redis_service import register_tenant, close_redis
 
 
 async def seed_data():
@@ -127,6 +128,9 @@ async def seed_data():
         session.add_all(property_knowledge)
 
         await session.commit()
+        for tenant in (restaurant, property_mgmt):
+            await register_tenant(tenant.id)
+        await close_redis()
         print("Seed data created successfully!")
         print(f"Restaurant tenant ID: {restaurant.id}")
         print(f"Property tenant ID: {property_mgmt.id}")